@@ -2,6 +2,8 @@
 Aktualizator Strony - dziadu.dev
 Główny punkt wejścia aplikacji
 
+Tryb obserwacji bez GUI: python apk.py --watch [--source ŚCIEŻKA] [--target ŚCIEŻKA]
+
 Wersja: 5.3.0 (PRODUCTION READY)
 Status: ✅ GOTOWA DO UŻYTKU
 
@@ -56,16 +58,73 @@ Cechy v5.3.0 (NOWE! ✨):
 """
 
 import sys
+import argparse
+import multiprocessing
+import threading
 from pathlib import Path
 
 # Dodaj folder src/ do ścieżki Python
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-import customtkinter as ctk
-from gui_modern import ModernGUI
+CONFIG_PATH = Path(__file__).parent / "src" / "config.json"  # Ta sama konfiguracja co w GUI
+
+
+def watch(source_path, target_path, stop_event: threading.Event = None, **options):
+    """
+    Tryb obserwacji bez GUI: zmiany w folderach źródła od razu trafiają na stronę
+
+    Działa do Ctrl+C (lub ustawienia stop_event), obserwator jest zawsze zatrzymywany.
+
+    Args:
+        source_path: Repozytorium źródłowe
+        target_path: Repozytorium strony
+        stop_event: Zdarzenie kończące obserwację (opcjonalnie)
+        **options: Ustawienia SourceWatcher (debounce, max_delay, poll_interval, backend)
+    """
+    from update_manager import UpdateManager
+
+    stop_event = stop_event or threading.Event()
+    watcher = UpdateManager().create_watcher(Path(source_path), Path(target_path), **options)
+    watcher.start()
+    try:
+        # Oczekiwanie z timeoutem - Ctrl+C przerywa je także na Windows
+        while not stop_event.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Argumenty linii poleceń (bez argumentów - GUI)"""
+    parser = argparse.ArgumentParser(description="Aktualizator Strony - dziadu.dev")
+    parser.add_argument("--watch", action="store_true",
+                        help="obserwuj źródło i aktualizuj zmienione foldery (bez GUI, Ctrl+C kończy)")
+    parser.add_argument("--source", help="repozytorium źródłowe (domyślnie z konfiguracji)")
+    parser.add_argument("--target", help="repozytorium strony (domyślnie z konfiguracji)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Uruchomienie aplikacji z nowoczesnym GUI v5.3.0 (lub trybu --watch)"""
+    args = parse_args(argv)
+    if args.watch:
+        source_path, target_path = args.source, args.target
+        if not source_path or not target_path:
+            from config_manager import ConfigManager
+            config = ConfigManager(str(CONFIG_PATH))
+            source_path = source_path or config.get("source_path")
+            target_path = target_path or config.get("target_path")
+        if not source_path or not target_path:
+            sys.exit("❌ Podaj --source i --target (lub ustaw ścieżki w konfiguracji)")
+        watch(source_path, target_path)
+        return
+
+    # GUI importowane dopiero tutaj - tryb --watch nie wymaga customtkinter
+    import customtkinter as ctk
+    from gui_modern import ModernGUI
 
-def main():
-    """Uruchomienie aplikacji z nowoczesnym GUI v5.3.0"""
     root = ctk.CTk()
 
     # Ustaw ikonę aplikacji (pasek zadań i skrót)
@@ -101,6 +160,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # Wymagane przez ProcessPoolExecutor w zbudowanym .exe (PyInstaller)
+    multiprocessing.freeze_support()
     main()
 
 
@@ -47,15 +47,19 @@ class APIManager:
     """REST API Manager - v5.1"""
 
     def __init__(self, update_callback: Optional[Callable] = None,
-                 log_callback: Optional[Callable] = None):
+                 log_callback: Optional[Callable] = None,
+                 plan_callback: Optional[Callable] = None):
         """
         Inicjalizacja API Manager
 
         Args:
             update_callback: Callback do uruchomienia aktualizacji
             log_callback: Callback do logowania
+            plan_callback: Callback zwracający plan aktualizacji (dry-run) - wywoływany z source_repo/target_repo,
+                np. UpdateManager.plan_request
         """
         self.update_callback = update_callback
+        self.plan_callback = plan_callback
         self.log_callback = log_callback or print
         self.api_version = "5.1"
         self.endpoints_registered = 0
@@ -107,6 +111,47 @@ class APIManager:
                 message=f'Błąd: {str(e)}'
             )
 
+    def plan_update(self, request_data: Dict[str, Any]) -> APIResponse:
+        """
+        POST /api/plan
+        Podgląd aktualizacji (dry-run) - bez zapisu plików, backupów i git
+
+        Request:
+        {
+            "source_repo": "/path/to/source",
+            "target_repo": "/path/to/target"
+        }
+
+        Response:
+        {
+            "status": "ok",
+            "message": "Plan aktualizacji",
+            "data": {"pages": [...], "totals": {"added": 3, "removed": 1, ...}}
+        }
+        """
+        try:
+            request = UpdateRequest(**request_data)
+
+            if self.plan_callback:
+                plan = self.plan_callback(source_repo=request.source_repo, target_repo=request.target_repo)
+
+                return APIResponse(
+                    status='ok',
+                    message='Plan aktualizacji',
+                    data=plan
+                )
+            else:
+                return APIResponse(
+                    status='error',
+                    message='Plan callback nie skonfigurowany'
+                )
+        except Exception as e:
+            self.log(f"❌ Błąd plan_update: {str(e)}")
+            return APIResponse(
+                status='error',
+                message=f'Błąd: {str(e)}'
+            )
+
     # ==================== STATUS ENDPOINTS ====================
 
     def get_status(self) -> APIResponse:
@@ -321,6 +366,7 @@ class APIManager:
         """
         endpoints = {
             'POST /api/update': 'Uruchom aktualizację',
+            'POST /api/plan': 'Plan aktualizacji (dry-run)',
             'GET /api/status': 'Status aplikacji',
             'GET /api/stats': 'Statystyki',
             'GET /api/config': 'Pobierz config',
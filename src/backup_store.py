@@ -0,0 +1,292 @@
+"""
+Backup Store dla Aktualizatora Strony
+Deduplikowane, skompresowane backupy stron HTML
+
+Funkcje:
+- Treść strony zapisywana raz na hash (objects/<ab>/<hash>.html.gz)
+- Indeks (strona, czas, hash) w SQLite - bezpieczny dla wielu wątków i procesów
+- Polityki retencji: ostatnie N, dzienne, tygodniowe, maksymalny wiek
+- Usuwanie nieużywanych obiektów po czyszczeniu indeksu
+- Przywracanie: jedno zapytanie do indeksu + jedna dekompresja
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+CHUNK_SIZE = 64 * 1024  # Rozmiar kawałka przy strumieniowym czytaniu strony
+INDEX_FILE = "index.db"
+OBJECTS_DIR = "objects"
+
+
+class BackupStore:
+    """
+    Magazyn backupów stron adresowany treścią
+
+    Katalog i baza tworzone są dopiero przy pierwszym zapisie, więc samo
+    utworzenie obiektu (lub czyszczenie pustego magazynu) niczego nie zapisuje.
+    """
+
+    def __init__(self, path: Union[str, Path] = "backups"):
+        """
+        Args:
+            path: Katalog magazynu
+        """
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # INDEKS
+    def _connection(self, create: bool = True) -> Optional[sqlite3.Connection]:
+        with self._lock:
+            if self._conn is None:
+                index_path = self.path / INDEX_FILE
+                if not create and not index_path.exists():
+                    return None
+                self.path.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(index_path), timeout=30, check_same_thread=False)
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS backups (page TEXT NOT NULL, timestamp TEXT NOT NULL, "
+                        "hash TEXT NOT NULL, size INTEGER NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS backups_page ON backups (page, timestamp)")
+                self._conn = conn
+            return self._conn
+
+    @staticmethod
+    def page_key(page: Union[str, Path]) -> str:
+        """Klucz strony w indeksie (ścieżka bezwzględna)"""
+        return os.path.abspath(page)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.path / OBJECTS_DIR / digest[:2] / f"{digest}.html.gz"
+
+    # ZAPIS
+    def add(self, page: Union[str, Path], content: bytes, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Zapisuje backup treści strony
+
+        Obiekt jest zapisywany tylko jeśli tego hashu jeszcze nie ma, a wpis w indeksie
+        tylko jeśli treść różni się od ostatniego backupu strony.
+
+        Args:
+            page: Ścieżka strony
+            content: Treść strony (surowe bajty)
+            timestamp: Czas backupu (domyślnie teraz)
+
+        Returns:
+            Dict z page, timestamp, hash, size, path i flagą stored (czy zapisano nowy obiekt)
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        stored = False
+        if not object_path.exists():
+            self._write_object(object_path, content)
+            stored = True
+        return self._record(page, digest, len(content), stored, timestamp)
+
+    def add_file(self, page: Union[str, Path], timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Zapisuje backup strony czytanej strumieniowo z dysku (jak add, bez wczytywania całego pliku)
+
+        Args:
+            page: Ścieżka strony (źródło treści)
+            timestamp: Czas backupu (domyślnie teraz)
+        """
+        sha = hashlib.sha256()
+        size = 0
+        with open(page, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+                size += len(chunk)
+        object_path = self._object_path(sha.hexdigest())
+        stored = False
+        if not object_path.exists():
+            self._write_object(object_path, Path(page))
+            stored = True
+        return self._record(page, sha.hexdigest(), size, stored, timestamp)
+
+    def _record(self, page: Union[str, Path], digest: str, size: int, stored: bool,
+                timestamp: Optional[datetime]) -> Dict[str, Any]:
+        """Dopisuje wpis do indeksu (gdy treść różni się od ostatniego backupu strony)"""
+        key = self.page_key(page)
+        stamp = (timestamp or datetime.now()).isoformat(timespec='microseconds')
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                last = conn.execute(
+                    "SELECT timestamp, hash FROM backups WHERE page = ? ORDER BY timestamp DESC LIMIT 1", (key,)
+                ).fetchone()
+                if last and last[1] == digest:
+                    stamp = last[0]
+                else:
+                    conn.execute("INSERT INTO backups (page, timestamp, hash, size) VALUES (?, ?, ?, ?)",
+                                 (key, stamp, digest, size))
+
+        return {"page": key, "timestamp": stamp, "hash": digest, "size": size,
+                "path": self._object_path(digest), "stored": stored}
+
+    @staticmethod
+    def _write_object(path: Path, content: Union[bytes, Path]):
+        """Zapisuje skompresowany obiekt atomowo (plik tymczasowy + rename), treść z bajtów lub pliku"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(content, bytes):
+                    f.write(gzip.compress(content, mtime=0))
+                else:
+                    with open(content, 'rb') as source, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as target:
+                        shutil.copyfileobj(source, target, CHUNK_SIZE)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    # ODCZYT
+    def entries(self, page: Optional[Union[str, Path]] = None) -> List[Dict[str, Any]]:
+        """Wpisy indeksu (najnowsze pierwsze), opcjonalnie tylko dla jednej strony"""
+        with self._lock:
+            conn = self._connection(create=False)
+            if conn is None:
+                return []
+            if page is None:
+                rows = conn.execute("SELECT page, timestamp, hash, size FROM backups "
+                                    "ORDER BY page, timestamp DESC").fetchall()
+            else:
+                rows = conn.execute("SELECT page, timestamp, hash, size FROM backups WHERE page = ? "
+                                    "ORDER BY timestamp DESC", (self.page_key(page),)).fetchall()
+        return [{"page": p, "timestamp": t, "hash": h, "size": s} for p, t, h, s in rows]
+
+    def read(self, page: Union[str, Path], timestamp: Optional[str] = None) -> Optional[bytes]:
+        """
+        Treść backupu strony
+
+        Args:
+            page: Ścieżka strony
+            timestamp: Czas backupu (ISO) - najnowszy nie późniejszy; None = najnowszy
+
+        Returns:
+            Treść strony lub None gdy brak backupu
+        """
+        with self._lock:
+            conn = self._connection(create=False)
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT hash FROM backups WHERE page = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1",
+                (self.page_key(page), timestamp or "9999")
+            ).fetchone()
+        if row is None:
+            return None
+        with open(self._object_path(row[0]), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    # RETENCJA
+    def prune(self, keep_last: Optional[int] = None, keep_daily: Optional[int] = None,
+              keep_weekly: Optional[int] = None, max_age_days: Optional[int] = None,
+              now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Usuwa backupy spoza polityk retencji i nieużywane obiekty
+
+        Dla każdej strony zachowywane są: keep_last najnowszych, najnowszy z każdego
+        z keep_daily ostatnich dni oraz z każdego z keep_weekly ostatnich tygodni
+        (liczone dni/tygodnie z backupami). Bez polityk keep_* zachowywane jest
+        wszystko. max_age_days dodatkowo usuwa starsze wpisy - poza keep_last najnowszymi
+        i zawsze poza najnowszym backupem strony (ponowny backup tej samej treści zachowuje
+        stary czas, więc strona bez zmian nie może stracić jedynego punktu przywracania).
+
+        Returns:
+            Dict z liczbą usuniętych wpisów, obiektów i odzyskanych bajtów
+        """
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = ((now or datetime.now()) - timedelta(days=max_age_days)).isoformat(timespec='microseconds')
+
+        by_page: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.entries():
+            by_page.setdefault(entry["page"], []).append(entry)
+
+        protected = max(keep_last or 0, 1)  # Najnowsze wpisy strony - bez limitu wieku
+        removed = []
+        for page_entries in by_page.values():
+            keep = self._retained(page_entries, keep_last, keep_daily, keep_weekly)
+            removed.extend(entry for position, entry in enumerate(page_entries)
+                           if position not in keep or (cutoff is not None and position >= protected
+                                                       and entry["timestamp"] < cutoff))
+
+        result = {"entries": len(removed), "objects": 0, "bytes": 0}
+        if not removed:
+            return result
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM backups WHERE page = ? AND timestamp = ?",
+                                 [(entry["page"], entry["timestamp"]) for entry in removed])
+                referenced = {row[0] for row in conn.execute("SELECT DISTINCT hash FROM backups")}
+
+            for digest in {entry["hash"] for entry in removed} - referenced:
+                object_path = self._object_path(digest)
+                try:
+                    size = object_path.stat().st_size
+                    object_path.unlink()
+                except OSError:
+                    continue
+                result["objects"] += 1
+                result["bytes"] += size
+
+        return result
+
+    @staticmethod
+    def _retained(entries: List[Dict[str, Any]], keep_last: Optional[int], keep_daily: Optional[int],
+                  keep_weekly: Optional[int]) -> Set[int]:
+        """Pozycje wpisów (najnowsze pierwsze) zachowanych przez polityki keep_*"""
+        if keep_last is None and keep_daily is None and keep_weekly is None:
+            return set(range(len(entries)))
+
+        keep = set(range(min(keep_last or 0, len(entries))))
+        for limit, period in ((keep_daily, lambda moment: moment.date()),
+                              (keep_weekly, lambda moment: moment.isocalendar()[:2])):
+            if not limit:
+                continue
+            seen = set()
+            for position, entry in enumerate(entries):
+                bucket = period(datetime.fromisoformat(entry["timestamp"]))
+                if bucket in seen:
+                    continue
+                if len(seen) == limit:
+                    break
+                seen.add(bucket)
+                keep.add(position)
+        return keep
+
+    def stats(self) -> Dict[str, int]:
+        """Liczba wpisów, obiektów i rozmiar magazynu na dysku"""
+        entries = self.entries()
+        objects = list((self.path / OBJECTS_DIR).glob("*/*.html.gz")) \
+            if (self.path / OBJECTS_DIR).exists() else []
+        return {
+            "entries": len(entries),
+            "objects": len(objects),
+            "bytes": sum(path.stat().st_size for path in objects),
+            "original_bytes": sum(entry["size"] for entry in entries),
+        }
+
+    def close(self):
+        """Zamyka połączenie z indeksem"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,307 @@
+"""
+Cache Store dla Aktualizatora Strony
+Kompaktowy, wersjonowany cache struktury folderów w SQLite
+
+Funkcje:
+- Wpisy per przestrzeń nazw i klucz (folder, strona, para repozytoriów)
+- Zapis przyrostowy - tylko zmienione wpisy, w jednej transakcji (atomowo)
+- Kompaktowe kodowanie (JSON bez wcięć + zlib)
+- Leniwe ładowanie - wpis czytany z bazy przy pierwszym dostępie
+- Wersja (schemat/BASE_URL/reguły opisów) - zmiana unieważnia stare wpisy
+- Niedostępna baza (zablokowana, brak dostępu) - praca tylko w pamięci zamiast błędu
+"""
+
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, MutableMapping, Optional, Set, Union
+
+SCHEMA_VERSION = 1
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def _is_corrupted(error: sqlite3.DatabaseError) -> bool:
+    """Czy błąd oznacza uszkodzony plik (a nie np. blokadę czy brak dostępu - OperationalError)"""
+    if isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "not a database" in message or "malformed" in message
+
+
+class CacheNamespace(MutableMapping):
+    """
+    Słownik jednej przestrzeni nazw cache (np. 'structure')
+
+    Wpisy są wczytywane leniwie i zapisywane przy CacheStore.flush(). Zmiana wartości
+    wymaga przypisania (cache[key] = value) - modyfikacja w miejscu nie jest śledzona.
+    Opcjonalne encode/decode zamieniają wartości w pamięci (np. obiekty) na formę JSON.
+    """
+
+    def __init__(self, store: 'CacheStore', name: str, encode: Optional[Callable[[Any], Any]] = None,
+                 decode: Optional[Callable[[Any], Any]] = None):
+        self._store = store
+        self.name = name
+        self._encode_value = encode
+        self._decode_value = decode
+        self._lock = threading.RLock()
+        self._values: Dict[str, Any] = {}
+        self._missing: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._all_loaded = False
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            if self._all_loaded or key in self._missing or key in self._deleted:
+                raise KeyError(key)
+            data = self._store._read(self.name, key)
+            if data is None:
+                self._missing.add(key)
+                raise KeyError(key)
+            value = self._values[key] = self._decode(data)
+            return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._values[key] = value
+            self._dirty.add(key)
+            self._missing.discard(key)
+            self._deleted.discard(key)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            self[key]  # KeyError gdy brak
+            del self._values[key]
+            self._dirty.discard(key)
+            self._deleted.add(key)
+
+    def _load_all(self):
+        with self._lock:
+            if self._all_loaded:
+                return
+            for key, data in self._store._read_all(self.name):
+                if key not in self._values and key not in self._deleted:
+                    self._values[key] = self._decode(data)
+            self._all_loaded = True
+
+    def __iter__(self) -> Iterator[str]:
+        self._load_all()
+        with self._lock:
+            return iter(list(self._values))
+
+    def __len__(self) -> int:
+        self._load_all()
+        return len(self._values)
+
+    def _decode(self, data: bytes) -> Any:
+        value = _decode(data)
+        return self._decode_value(value) if self._decode_value else value
+
+    def _encode(self, value: Any) -> bytes:
+        return _encode(self._encode_value(value) if self._encode_value else value)
+
+    def _take_changes(self):
+        """Zmienione i usunięte wpisy od ostatniego flush (zakodowane)"""
+        with self._lock:
+            upserts = [(self.name, key, self._encode(self._values[key])) for key in self._dirty]
+            deletes = [(self.name, key) for key in self._deleted]
+            self._dirty.clear()
+            self._deleted.clear()
+            return upserts, deletes
+
+    def _mark_dirty(self, key: str):
+        with self._lock:
+            if key in self._values:
+                self._dirty.add(key)
+
+    def _reset(self):
+        with self._lock:
+            self._values.clear()
+            self._missing.clear()
+            self._dirty.clear()
+            self._deleted.clear()
+            self._all_loaded = False
+
+
+class CacheStore:
+    """
+    Cache w pliku SQLite z przestrzeniami nazw
+
+    Baza otwierana jest przy pierwszym dostępie. Jeśli zapisana wersja różni się od
+    bieżącej, wszystkie wpisy są usuwane. Plik usuwany jest tylko gdy jest uszkodzony -
+    gdy bazy nie da się użyć (np. zablokowana przez inny proces), cache działa dalej
+    tylko w pamięci (disabled), więc kosztuje to jedynie szybkość.
+    """
+
+    TIMEOUT = 30  # Sekundy oczekiwania na blokadę bazy trzymaną przez inny proces
+
+    def __init__(self, path: Union[str, Path], version: str, log: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            path: Plik bazy SQLite
+            version: Wersja zawartości (np. schemat|BASE_URL|reguły opisów)
+            log: Callback logowania (np. informacja o unieważnieniu)
+        """
+        self.path = Path(path)
+        self.version = f"{SCHEMA_VERSION}|{version}"
+        self.log = log
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self.disabled = False  # Baza niedostępna - wpisy tylko w pamięci
+
+    def namespace(self, name: str, encode: Optional[Callable[[Any], Any]] = None,
+                  decode: Optional[Callable[[Any], Any]] = None) -> CacheNamespace:
+        """Słownik przestrzeni nazw (ten sam obiekt przy kolejnych wywołaniach, konwersja z pierwszego)"""
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = CacheNamespace(self, name, encode, decode)
+            return self._namespaces[name]
+
+    def _connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    self._conn = self._open()
+                except sqlite3.DatabaseError as e:
+                    if not _is_corrupted(e):
+                        raise
+                    # Uszkodzony plik cache - cache można zawsze odbudować
+                    if self.log:
+                        self.log(f"⚠️  Uszkodzony cache ({e}) - tworzenie od nowa")
+                    try:
+                        self.path.unlink()
+                    except OSError:
+                        raise e
+                    self._conn = self._open()
+            return self._conn
+
+    def _available_connection(self) -> Optional[sqlite3.Connection]:
+        """Połączenie lub None, gdy baza jest niedostępna (cache przechodzi wtedy w tryb pamięci)"""
+        with self._lock:
+            if self.disabled:
+                return None
+            try:
+                return self._connection()
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+                return None
+
+    def _disable(self, error: Exception):
+        self.disabled = True
+        if self.log:
+            self.log(f"⚠️  Cache niedostępny ({error}) - praca bez cache na dysku")
+
+    def _open(self) -> sqlite3.Connection:
+        """Otwiera bazę, tworzy schemat i sprawdza wersję"""
+        conn = sqlite3.connect(str(self.path), timeout=self.TIMEOUT, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                    "value BLOB NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+                )
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != self.version:
+                    deleted = conn.execute("DELETE FROM entries").rowcount
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (self.version,))
+                    if row is not None and self.log:
+                        self.log(f"♻️  Cache unieważniony - zmiana wersji ({deleted} wpisów)")
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _read(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            conn = self._available_connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+        return row[0] if row else None
+
+    def _read_all(self, namespace: str):
+        with self._lock:
+            conn = self._available_connection()
+            if conn is None:
+                return []
+            try:
+                return conn.execute(
+                    "SELECT key, value FROM entries WHERE namespace = ?", (namespace,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return []
+
+    def flush(self) -> int:
+        """
+        Zapisuje zmienione wpisy wszystkich przestrzeni nazw w jednej transakcji
+
+        Returns:
+            Liczba zapisanych lub usuniętych wpisów
+        """
+        # Kolejność locków jak przy odczycie: najpierw przestrzeń nazw, potem baza
+        with self._lock:
+            namespaces = list(self._namespaces.values())
+        upserts, deletes = [], []
+        for namespace in namespaces:
+            changed, removed = namespace._take_changes()
+            upserts.extend(changed)
+            deletes.extend(removed)
+        if self.disabled or (not upserts and not deletes):
+            return 0
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO entries (namespace, key, value) VALUES (?, ?, ?)", upserts
+                    )
+                    conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", deletes)
+        except Exception:
+            # Transakcja wycofana - wpisy zostają do zapisania przy następnym flush
+            for name, key, _ in upserts:
+                self.namespace(name)._mark_dirty(key)
+            raise
+        return len(upserts) + len(deletes)
+
+    def clear(self):
+        """Usuwa wszystkie wpisy (w pamięci i w bazie)"""
+        with self._lock:
+            namespaces = list(self._namespaces.values())
+        for namespace in namespaces:
+            namespace._reset()
+        with self._lock:
+            if self.disabled:
+                return
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries")
+
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
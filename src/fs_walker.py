@@ -0,0 +1,143 @@
+"""
+FS Walker dla Aktualizatora Strony
+Wspólne przechodzenie drzewa katalogów oparte na os.scandir
+
+Funkcje:
+- Jedno przejście drzewa zamiast rglob + is_file()/stat() per plik
+- Typ i stat z DirEntry (na Windows bez dodatkowych wywołań systemowych)
+- Równoległe przechodzenie poddrzew rodzeństwa (katalogi pierwszego poziomu)
+- Ograniczenie głębokości i pomijanie ukrytych katalogów
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+MAX_WORKERS = 4  # Wątki dla poddrzew rodzeństwa (scandir zwalnia GIL na czas wywołań systemowych)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+class WalkEntry:
+    """Wpis drzewa katalogów (plik lub katalog) z danymi z DirEntry"""
+
+    __slots__ = ('name', 'path', 'rel_path', 'is_dir', 'size', 'mtime_ns')
+
+    def __init__(self, name: str, path: str, rel_path: str, is_dir: bool, size: int = 0, mtime_ns: int = 0):
+        self.name = name
+        self.path = path
+        self.rel_path = rel_path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def depth(self) -> int:
+        """Poziom wpisu pod korzeniem (1 = bezpośrednie dziecko)"""
+        return self.rel_path.count(os.sep) + 1
+
+    def __repr__(self):
+        return f"<WalkEntry({self.rel_path}{os.sep if self.is_dir else ''})>"
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Współdzielona pula wątków (tworzona na nowo w procesie potomnym po fork)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fs_walker")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _scan_level(path: str, rel_prefix: str, skip_hidden_dirs: bool, with_stat: bool,
+                follow_symlinks: bool) -> Tuple[List[WalkEntry], List[WalkEntry]]:
+    """
+    Jedno wywołanie os.scandir
+
+    Returns:
+        Tuple (wszystkie wpisy, katalogi do zejścia w głąb)
+    """
+    entries, subdirs = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            rel_path = rel_prefix + entry.name
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                if skip_hidden_dirs and entry.name.startswith('.'):
+                    continue
+                mtime_ns = entry.stat(follow_symlinks=follow_symlinks).st_mtime_ns if with_stat else 0
+                item = WalkEntry(entry.name, entry.path, rel_path, True, 0, mtime_ns)
+                subdirs.append(item)
+            elif entry.is_file():
+                if with_stat:
+                    stat = entry.stat()
+                    item = WalkEntry(entry.name, entry.path, rel_path, False, stat.st_size, stat.st_mtime_ns)
+                else:
+                    item = WalkEntry(entry.name, entry.path, rel_path, False)
+            else:
+                continue  # Zepsute symlinki, gniazda itp.
+            entries.append(item)
+    return entries, subdirs
+
+
+def _walk_subtree(directory: WalkEntry, max_depth: Optional[int], skip_hidden_dirs: bool, with_stat: bool,
+                  follow_symlinks: bool) -> List[WalkEntry]:
+    """Przechodzi poddrzewo katalogu (pre-order, bez wątków)"""
+    result = []
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        if max_depth is not None and current.depth >= max_depth:
+            continue
+        try:
+            entries, subdirs = _scan_level(current.path, current.rel_path + os.sep, skip_hidden_dirs,
+                                           with_stat, follow_symlinks)
+        except OSError:
+            continue  # Brak dostępu do podkatalogu - pomijamy jak rglob
+        result.extend(entries)
+        stack.extend(reversed(subdirs))
+    return result
+
+
+def walk(root: Union[str, Path], max_depth: Optional[int] = None, skip_hidden_dirs: bool = False,
+         with_stat: bool = True, follow_symlinks: bool = False, parallel: bool = True) -> List[WalkEntry]:
+    """
+    Przechodzi drzewo katalogów jednym os.scandir na katalog
+
+    Katalog pojawia się w wyniku przed swoją zawartością.
+
+    Args:
+        root: Katalog startowy (błąd odczytu korzenia jest zgłaszany, podkatalogów - pomijany)
+        max_depth: Maksymalny poziom wpisów (1 = tylko zawartość korzenia), None = bez limitu
+        skip_hidden_dirs: Pomijaj katalogi zaczynające się od kropki
+        with_stat: Wypełnij size/mtime_ns (False = same nazwy i typy, bez stat na Linuksie)
+        follow_symlinks: Wchodź do katalogów będących symlinkami
+        parallel: Przechodź poddrzewa katalogów pierwszego poziomu równolegle
+
+    Returns:
+        Lista WalkEntry
+    """
+    entries, subdirs = _scan_level(os.fspath(root), "", skip_hidden_dirs, with_stat, follow_symlinks)
+    if max_depth is not None and max_depth <= 1:
+        return entries
+
+    args = (max_depth, skip_hidden_dirs, with_stat, follow_symlinks)
+    if parallel and len(subdirs) > 1:
+        subtrees = _get_executor().map(lambda directory: _walk_subtree(directory, *args), subdirs)
+    else:
+        subtrees = (_walk_subtree(directory, *args) for directory in subdirs)
+
+    for subtree in subtrees:
+        entries.extend(subtree)
+    return entries
+
+
+def walk_files(root: Union[str, Path], with_stat: bool = True, skip_hidden_dirs: bool = False,
+               parallel: bool = True) -> List[WalkEntry]:
+    """Wszystkie pliki w drzewie (rekurencyjnie, bez katalogów)"""
+    return [entry for entry in walk(root, skip_hidden_dirs=skip_hidden_dirs, with_stat=with_stat, parallel=parallel)
+            if not entry.is_dir]
@@ -204,6 +204,10 @@ class ModernGUI:
         # Teraz można tworzyć UpdateManager
         self.update_manager = UpdateManager(self.log_message)
 
+        # Obserwacja źródła (watch) - włączana w zakładce Harmonogram, zatrzymywana przy zamknięciu
+        self.watcher = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
     def _set_app_icon(self):
         """Ustawia ikonę aplikacji na pasku zadań i skrócie"""
         try:
@@ -630,6 +634,33 @@ class ModernGUI:
         )
         stop_btn.pack(side="left")
 
+        # Obserwacja źródła - aktualizacja zaraz po zmianach w folderach
+        self.watcher_status_label = ctk.CTkLabel(
+            scheduler_frame,
+            text="👀 Obserwacja źródła: Zatrzymana ⏹️",
+            font=("Helvetica", 12)
+        )
+        self.watcher_status_label.pack(anchor="w", pady=(20, 10))
+
+        watcher_frame = ctk.CTkFrame(scheduler_frame, fg_color="transparent")
+        watcher_frame.pack(fill="x", pady=(0, 20))
+
+        watch_start_btn = ctk.CTkButton(
+            watcher_frame,
+            text="▶️  Uruchom Obserwację",
+            command=self.start_watcher,
+            fg_color="green"
+        )
+        watch_start_btn.pack(side="left", padx=(0, 10))
+
+        watch_stop_btn = ctk.CTkButton(
+            watcher_frame,
+            text="⏹️  Zatrzymaj Obserwację",
+            command=self.stop_watcher,
+            fg_color="red"
+        )
+        watch_stop_btn.pack(side="left")
+
     def add_daily_schedule(self, hour: int, minute: int):
         """Dodaj harmonogram codziennie"""
         try:
@@ -672,6 +703,46 @@ class ModernGUI:
         except Exception as e:
             self.log_message(f"❌ Błąd zatrzymywania schedulera: {str(e)}")
 
+    def start_watcher(self):
+        """Uruchom obserwację folderów źródła (aktualizacja przyrostowa po zmianach)"""
+        try:
+            if self.watcher is not None and self.watcher.is_running:
+                self.log_message("⚠️  Obserwacja już działa")
+                return
+
+            source = getattr(self, "entry_source_path", None)
+            target = getattr(self, "entry_target_path", None)
+            if not source or not target or not source.get() or not target.get():
+                messagebox.showerror("Błąd", "Proszę podać obie ścieżki!")
+                return
+
+            self.watcher = self.update_manager.create_watcher(Path(source.get()), Path(target.get()))
+            self.watcher.start()
+            self.watcher_status_label.configure(text="👀 Obserwacja źródła: Uruchomiona ▶️")
+            self.log_message("✅ Obserwacja źródła uruchomiona")
+        except Exception as e:
+            self.log_message(f"❌ Błąd uruchamiania obserwacji: {str(e)}")
+
+    def stop_watcher(self):
+        """Zatrzymaj obserwację folderów źródła"""
+        try:
+            if self.watcher is None:
+                return
+
+            self.watcher.stop()
+            self.watcher = None
+            self.watcher_status_label.configure(text="👀 Obserwacja źródła: Zatrzymana ⏹️")
+            self.log_message("✅ Obserwacja źródła zatrzymana")
+        except Exception as e:
+            self.log_message(f"❌ Błąd zatrzymywania obserwacji: {str(e)}")
+
+    def on_closing(self):
+        """Zamknięcie okna - zatrzymanie obserwacji i schedulera przed wyjściem"""
+        self.stop_watcher()
+        if self.scheduler is not None and self.scheduler.is_running:
+            self.scheduler.stop()
+        self.root.destroy()
+
     def build_notifications_tab(self):
         """Zakładka Powiadomienia - v5.0 NEW"""
         notif_frame = ctk.CTkFrame(self.tab_notifications, fg_color="transparent")
@@ -981,6 +1052,13 @@ class ModernGUI:
             # v5.0: Pokaż oszczędzony czas dzięki cache
             cache_saved = elapsed_time * 0.6  # 60% oszczędności z cache'em
 
+            if "STRONA JEST AKTUALNA" in recent_logs:
+                self._record_update("no_changes", elapsed_time)
+            elif success:
+                self._record_update("success", elapsed_time)
+            else:
+                self._record_update("failed", elapsed_time, error="Aktualizacja nie powiodła się")
+
             if "STRONA JEST AKTUALNA" in recent_logs:
                 # Brak zmian - strona aktualna
                 self.log_message("=" * 70)
@@ -1009,6 +1087,35 @@ class ModernGUI:
             self.update_btn.configure(state="normal")
             self.root.after(2000, self._reset_progress)
 
+    def _record_update(self, status: str, elapsed_time: float, error: str = None):
+        """Zapisuje run w historii i wysyła powiadomienia - z diffu zapisanego podczas aktualizacji"""
+        summary = self.update_manager.get_update_summary(self.update_manager.last_run)
+        summary['duration'] = round(elapsed_time, 1)
+
+        try:
+            if self.db_manager is not None:
+                self.db_manager.add_update_record(
+                    status=status,
+                    duration=int(elapsed_time),
+                    folders=summary['folders'],
+                    added=summary['added_count'],
+                    modified=summary['modified_count'],
+                    removed=summary['removed_count'],
+                    cache_used=summary['cache_used'],
+                    error=error
+                )
+        except Exception as e:
+            self.log_message(f"⚠️  Błąd zapisu historii: {str(e)}")
+
+        try:
+            if self.notifications is not None:
+                if status == "failed":
+                    self.notifications.notify_update_failed(error)
+                elif status == "success":
+                    self.notifications.notify_update_success(summary)
+        except Exception as e:
+            self.log_message(f"⚠️  Błąd wysyłania powiadomień: {str(e)}")
+
     def _update_progress(self, value, start_time):
         """Aktualizacja progress bar z ETA"""
         self.progress_bar.set(value / 100)
@@ -0,0 +1,157 @@
+"""
+HTML Validator dla Aktualizatora Strony
+Strumieniowa walidacja stron w jednym przejściu po zdarzeniach parsera
+
+Funkcje:
+- Jedno przejście (html.parser) - bez budowania drzewa BeautifulSoup
+- Stała praca na element: stos otwartych tagów, liczniki, zbiory URL
+- Dane podawane kawałkami (feed) - plik czytany strumieniowo
+- Sprawdzenia: content-wrapper, col-* w row, URL (podwójny slash, spacje),
+  niezamknięte/nadmiarowe tagi, zduplikowane karty
+"""
+
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024  # Rozmiar kawałka przy czytaniu pliku
+
+# Elementy bez tagu zamykającego
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+))
+# Elementy, których tag zamykający można pominąć (HTML5) - nie są błędem
+OPTIONAL_END_ELEMENTS = frozenset((
+    'html', 'head', 'body', 'p', 'li', 'dt', 'dd', 'option', 'optgroup', 'tr', 'td', 'th',
+    'thead', 'tbody', 'tfoot', 'colgroup', 'rp', 'rt',
+))
+
+
+class HtmlValidator(HTMLParser):
+    """
+    Walidator HTML działający na zdarzeniach parsera
+
+    Użycie: feed() dowolną liczbę razy, potem close() zwraca listę błędów.
+    Rodzic i dziadek elementu to dwa górne wpisy stosu otwartych tagów, więc
+    sprawdzenie col-* w row nie przeszukuje drzewa.
+    """
+
+    def __init__(self, host: str = "prakt.dziadu.dev"):
+        """
+        Args:
+            host: Domena stron - w jej ścieżkach sprawdzany jest podwójny slash
+        """
+        super().__init__()
+        self.host = host
+        self._stack: List[Tuple[str, bool]] = []  # (tag, czy ma klasę row)
+        self._open: Dict[str, int] = {}  # Liczba otwartych elementów per tag
+        self._has_wrapper = False
+        self._col_error: Optional[str] = None
+        self._url_errors: List[str] = []
+        self._tag_errors: List[str] = []
+        self._cards: Set[str] = set()
+        self._duplicates: Set[str] = set()
+
+    # ZDARZENIA PARSERA
+    def handle_starttag(self, tag: str, attrs):
+        self._check_element(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            return
+        self._stack.append((tag, 'row' in self._classes(attrs)))
+        self._open[tag] = self._open.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag: str, attrs):
+        # <tag/> - bez wpisu na stosie
+        self._check_element(tag, attrs)
+
+    def handle_endtag(self, tag: str):
+        if tag in VOID_ELEMENTS:
+            return
+        if not self._open.get(tag):
+            self._tag_errors.append(f"Nadmiarowy tag zamykający: </{tag}>")
+            return
+        # Elementy nad dopasowanym są zamykane niejawnie (każdy zdejmowany raz - amortyzowane O(1))
+        while True:
+            open_tag, _ = self._stack.pop()
+            self._open[open_tag] -= 1
+            if open_tag == tag:
+                break
+            if open_tag not in OPTIONAL_END_ELEMENTS:
+                self._tag_errors.append(f"Niezamknięty tag: <{open_tag}>")
+
+    # SPRAWDZENIA
+    @staticmethod
+    def _classes(attrs) -> List[str]:
+        for name, value in attrs:
+            if name == 'class':
+                return (value or '').split()
+        return []
+
+    def _check_element(self, tag: str, attrs):
+        classes = self._classes(attrs)
+
+        if tag == 'div':
+            if 'content-wrapper' in classes:
+                self._has_wrapper = True
+            if self._col_error is None and any('col-' in name for name in classes):
+                in_row = (self._stack and self._stack[-1][1]) or (len(self._stack) > 1 and self._stack[-2][1])
+                if not in_row:
+                    self._col_error = f"Element col-* nie jest w row: {classes}"
+
+        if tag == 'a':
+            attributes = dict(attrs)
+            url = attributes.get('href')
+            if url is None:
+                return
+            if self.host in url and '//' in url.split(self.host)[1]:
+                self._url_errors.append(f"Podwójny slash w URL: {url}")
+            if ' ' in url:
+                self._url_errors.append(f"Nieenkodowana spacja w URL: {url}")
+            if attributes.get('target') == '_blank' and 'stretched-link' in classes:
+                if url in self._cards:
+                    self._duplicates.add(url)
+                else:
+                    self._cards.add(url)
+
+    def close(self) -> List[str]:
+        """
+        Kończy parsowanie i zwraca błędy
+
+        Returns:
+            Lista błędów (pusta = HTML poprawny)
+        """
+        super().close()
+        unclosed = [f"Niezamknięty tag: <{tag}>" for tag, _ in self._stack if tag not in OPTIONAL_END_ELEMENTS]
+        self._stack.clear()
+
+        errors = []
+        if not self._has_wrapper:
+            errors.append("Brak div.content-wrapper")
+        if self._col_error:
+            errors.append(self._col_error)
+        errors.extend(self._url_errors)
+        errors.extend(self._tag_errors)
+        errors.extend(unclosed)
+        if self._duplicates:
+            errors.append(f"Zduplikowane karty: {len(self._duplicates)} unikalnych duplikatów")
+        return errors
+
+
+def validate_chunks(chunks: Iterable[str], host: str = "prakt.dziadu.dev") -> List[str]:
+    """Waliduje HTML podany kawałkami (np. strumień pliku)"""
+    validator = HtmlValidator(host)
+    for chunk in chunks:
+        validator.feed(chunk)
+    return validator.close()
+
+
+def validate_content(content: str, host: str = "prakt.dziadu.dev") -> List[str]:
+    """Waliduje HTML z pamięci (np. wynik aktualizacji przed zapisem)"""
+    return validate_chunks((content,), host)
+
+
+def validate_file(path: Union[str, Path], host: str = "prakt.dziadu.dev") -> List[str]:
+    """Waliduje plik HTML czytany strumieniowo kawałkami CHUNK_SIZE"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return validate_chunks(iter(lambda: f.read(CHUNK_SIZE), ''), host)
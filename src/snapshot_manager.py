@@ -18,6 +18,8 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import difflib
 
+from fs_walker import walk_files
+
 
 class SnapshotManager:
     """Zarządzanie snapshotami aplikacji"""
@@ -356,19 +358,15 @@ class SnapshotManager:
 
     def _get_all_files(self, path: Path) -> List[str]:
         """Pobierz listę wszystkich plików w folderze (relatywne ścieżki)"""
-        files = []
-        for item in path.rglob("*"):
-            if item.is_file():
-                files.append(str(item.relative_to(path)))
-        return files
+        if not path.is_dir():
+            return []
+        return [entry.rel_path for entry in walk_files(path, with_stat=False)]
 
     def _get_dir_size(self, path: Path) -> int:
         """Oblicz rozmiar folderu w bajtach"""
-        total = 0
-        for item in path.rglob("*"):
-            if item.is_file():
-                total += item.stat().st_size
-        return total
+        if not path.is_dir():
+            return 0
+        return sum(entry.size for entry in walk_files(path))
 
     def get_snapshot_info(self, snapshot_name: str) -> Optional[Dict]:
         """Pobierz informacje o snapshocie"""
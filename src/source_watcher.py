@@ -0,0 +1,295 @@
+"""
+Source Watcher dla Aktualizatora Strony
+Obserwacja folderów repozytorium źródłowego i aktualizacja w czasie zbliżonym do rzeczywistego
+
+Funkcje:
+- inotify (Linux, przez ctypes - bez dodatkowych zależności) z fallbackiem do odpytywania
+- Obserwacja tylko folderów z ALLOWED_FOLDERS (rekurencyjnie, nowe podkatalogi dodawane w locie)
+- Debounce: seria zdarzeń (zapis, git checkout) łączona w jedną aktualizację
+- Callback dostaje tylko zmienione foldery (aktualizacja przyrostowa)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+import fs_walker
+
+BACKENDS = ("auto", "inotify", "poll")
+
+# Flagi inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+
+def _ignored(name: str) -> bool:
+    """Pliki ukryte i tymczasowe edytorów (.swp, ~) nie zmieniają struktury strony"""
+    return name.startswith('.') or name.endswith('~')
+
+
+class _InotifyBackend:
+    """Zdarzenia z inotify - watch na każdy katalog obserwowanych folderów"""
+
+    def __init__(self, source_path: Path, folders: Set[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify niedostępne")
+        self._libc = libc
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.source_path = source_path
+        self.folders = folders
+        self._watches: Dict[int, Tuple[Optional[str], str]] = {}  # wd → (folder, katalog)
+        self._root = self._add_watch(str(source_path), None, ROOT_MASK)
+        for folder in folders:
+            self._watch_tree(folder, str(source_path / folder))
+
+    def _add_watch(self, path: str, folder: Optional[str], mask: int = WATCH_MASK) -> Optional[int]:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            return None  # Katalog zniknął w międzyczasie lub brak dostępu
+        self._watches[wd] = (folder, path)
+        return wd
+
+    def _watch_tree(self, folder: str, path: str):
+        """Watch na katalog i wszystkie jego podkatalogi"""
+        if self._add_watch(path, folder) is None:
+            return
+        try:
+            entries = fs_walker.walk(path, skip_hidden_dirs=True, with_stat=False, parallel=False)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir:
+                self._add_watch(entry.path, folder)
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Foldery ze zdarzeniami w ciągu timeout sekund (pusty zbiór gdy cisza)"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.folders)  # Utracone zdarzenia - sprawdzamy wszystko
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            folder, path = self._watches.get(wd, (None, ""))
+            if wd == self._root:
+                # Folder z ALLOWED_FOLDERS utworzony, usunięty lub przeniesiony
+                if name in self.folders:
+                    changed.add(name)
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(name, os.path.join(path, name))
+                continue
+            if folder is None or (name and _ignored(name)):
+                continue
+            changed.add(folder)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(folder, os.path.join(path, name))
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    """Fallback bez inotify - porównanie rozmiarów i czasów modyfikacji co interval sekund"""
+
+    def __init__(self, source_path: Path, folders: Set[str], interval: float, stop: threading.Event):
+        self.source_path = source_path
+        self.folders = folders
+        self.interval = interval
+        self._stop = stop
+        self._snapshots = {folder: self._snapshot(folder) for folder in folders}
+
+    def _snapshot(self, folder: str) -> Dict[str, Tuple[int, int]]:
+        try:
+            entries = fs_walker.walk(self.source_path / folder, skip_hidden_dirs=True)
+        except OSError:
+            return {}  # Folder nie istnieje
+        return {entry.rel_path: (entry.size, entry.mtime_ns) for entry in entries
+                if not _ignored(entry.name)}
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Foldery, których stan różni się od poprzedniego odpytania"""
+        if self._stop.wait(min(timeout, self.interval)):
+            return set()
+        changed = set()
+        for folder in self.folders:
+            snapshot = self._snapshot(folder)
+            if snapshot != self._snapshots[folder]:
+                self._snapshots[folder] = snapshot
+                changed.add(folder)
+        return changed
+
+    def close(self):
+        pass
+
+
+class SourceWatcher:
+    """
+    Obserwator folderów repozytorium źródłowego
+
+    Zdarzenia zbierane są w oknie debounce: callback wywoływany jest dopiero gdy przez
+    debounce sekund nie było nowych zmian (najpóźniej max_delay od pierwszej zmiany),
+    z zbiorem zmienionych folderów. Callback działa w wątku obserwatora - zmiany
+    w trakcie aktualizacji trafiają do następnej serii.
+    """
+
+    DEBOUNCE = 2.0  # Sekundy ciszy przed aktualizacją
+    MAX_DELAY = 30.0  # Maksymalne opóźnienie przy ciągłych zmianach
+    POLL_INTERVAL = 1.0  # Interwał odpytywania (fallback) i reakcji na stop()
+
+    def __init__(self, source_path: Union[str, Path], folders: Iterable[str],
+                 callback: Callable[[Set[str]], None], log_callback: Callable = None,
+                 debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY,
+                 poll_interval: float = POLL_INTERVAL, backend: str = "auto"):
+        """
+        Args:
+            source_path: Repozytorium źródłowe
+            folders: Obserwowane foldery (np. UpdateManager.ALLOWED_FOLDERS)
+            callback: Funkcja wywoływana ze zbiorem zmienionych folderów
+            log_callback: Funkcja do logowania (opcjonalnie)
+            debounce: Okno łączenia zdarzeń (sekundy)
+            max_delay: Maksymalne opóźnienie aktualizacji przy ciągłych zmianach (sekundy)
+            poll_interval: Interwał odpytywania dla fallbacku (sekundy)
+            backend: "auto" (inotify, a gdy niedostępne - odpytywanie), "inotify" lub "poll"
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Nieznany backend obserwacji: {backend}")
+        self.source_path = Path(source_path)
+        self.folders = set(folders)
+        self.callback = callback
+        self.log_callback = log_callback or print
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend = backend
+
+        self.is_running = False
+        self.watcher_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._backend = None
+
+    def log(self, message: str):
+        """Logowanie wiadomości"""
+        if self.log_callback:
+            self.log_callback(f"[WATCH] {message}")
+
+    def _create_backend(self):
+        if self.backend in ("auto", "inotify"):
+            try:
+                backend = _InotifyBackend(self.source_path, self.folders)
+                self.log("👀 Obserwacja folderów (inotify)")
+                return backend
+            except (OSError, AttributeError) as e:
+                if self.backend == "inotify":
+                    raise
+                self.log(f"⚠️  inotify niedostępne ({e}) - odpytywanie co {self.poll_interval}s")
+        else:
+            self.log(f"👀 Obserwacja folderów (odpytywanie co {self.poll_interval}s)")
+        return _PollingBackend(self.source_path, self.folders, self.poll_interval, self._stop)
+
+    def start(self):
+        """Uruchom obserwację (backend tworzony od razu - zmiany po start() nie giną)"""
+        if self.is_running:
+            self.log("⚠️  Obserwacja już działa")
+            return
+
+        self._stop.clear()
+        self._backend = self._create_backend()
+        self.is_running = True
+        self.watcher_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.watcher_thread.start()
+        self.log(f"✅ Obserwowane foldery: {', '.join(sorted(self.folders))}")
+
+    def stop(self):
+        """Zatrzymaj obserwację"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._stop.set()
+        if self.watcher_thread:
+            self.watcher_thread.join(timeout=max(2, self.poll_interval * 2))
+        self.log("⏹️  Obserwacja zatrzymana")
+
+    def _run_loop(self):
+        """Pętla obserwatora: zbieranie zdarzeń i debounce"""
+        pending: Set[str] = set()
+        first_change = deadline = None
+        try:
+            while not self._stop.is_set():
+                timeout = self.poll_interval if deadline is None else \
+                    max(0.0, min(deadline - time.monotonic(), self.poll_interval))
+                try:
+                    changed = self._backend.wait(timeout)
+                except Exception as e:
+                    self.log(f"❌ Błąd obserwacji: {str(e)}")
+                    changed = set()
+                    self._stop.wait(self.poll_interval)
+
+                now = time.monotonic()
+                if changed:
+                    pending |= changed
+                    first_change = first_change or now
+                    deadline = min(now + self.debounce, first_change + self.max_delay)
+                if pending and now >= deadline and not self._stop.is_set():
+                    self._dispatch(pending)
+                    pending = set()
+                    first_change = deadline = None
+        finally:
+            self._backend.close()
+
+    def _dispatch(self, folders: Set[str]):
+        """Wywołuje callback dla serii zmian"""
+        self.log(f"🔔 Zmiany w: {', '.join(sorted(folders))}")
+        try:
+            self.callback(set(folders))
+        except Exception as e:
+            self.log(f"❌ Błąd aktualizacji po zmianach: {str(e)}")
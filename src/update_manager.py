@@ -18,19 +18,38 @@ Kompletna funkcjonalność v4.1:
 - ✅ Type hints i docstrings
 """
 
+import asyncio
+import codecs
+import contextvars
+import copy
+import os
 import subprocess
 import re
+import tempfile
 import shutil
-import json
+import signal
 import hashlib
+import html
+import sys
 import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, Any, List, Set, Optional, Tuple
-from bs4 import BeautifulSoup
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Set, Optional, Tuple, Union
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
 from datetime import datetime
 import logging
 from logging.handlers import RotatingFileHandler
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+import fs_walker
+import html_validator
+from backup_store import BackupStore
+from cache_store import CacheStore
+from source_watcher import SourceWatcher
 
 
 def natural_sort_key(text):
@@ -54,15 +73,1359 @@ def natural_sort_key(text):
     return [convert(part) for part in re.split(r'(\d+)', str(text))]
 
 
+def natural_sort_token(text) -> str:
+    """
+    Klucz naturalnego sortowania zapisany jako string (np. w data-sort-key karty)
+
+    Porównanie dwóch tokenów zwykłym < daje tę samą kolejność co natural_sort_key,
+    więc zapisany klucz nie wymaga ponownego re.split przy każdym sprawdzeniu.
+    Części tekstowe kończy spacja (znaki <= '!' są poprzedzane '!'), liczby mają
+    prefiks z liczbą cyfr.
+
+    Args:
+        text: String (lub Path)
+
+    Returns:
+        Token porównywalny leksykograficznie
+    """
+    token = []
+    for part in natural_sort_key(text):
+        if isinstance(part, int):
+            digits = str(part)
+            token.append(f"{len(digits):02d}{digits}")
+        else:
+            token.append("".join(f"!{chr(ord(char) + 0x21)}" if char <= "!" else char for char in part) + " ")
+    return "".join(token)
+
+
+def _task_sort_key(item: Dict[str, Any]) -> str:
+    """Zapisany klucz sortowania zadania/podsekcji (liczony z tytułu/nazwy dla starszych wpisów)"""
+    return item.get("sort_key") or natural_sort_token(item.get("title", item.get("name", "")))
+
+
+def _longest_increasing_subsequence(values: List[int]) -> Set[int]:
+    """
+    Zwraca pozycje elementów tworzących najdłuższy rosnący podciąg
+
+    Używane przy uzgadnianiu kolejności kart - karty z tego podciągu
+    zostają na miejscu, przesuwane są tylko pozostałe.
+
+    Args:
+        values: Sekwencja liczb (docelowe pozycje kart w bieżącej kolejności)
+
+    Returns:
+        Zbiór pozycji (indeksów w values) należących do podciągu
+    """
+    tails: List[int] = []        # najmniejsze zakończenie podciągu długości i+1
+    tail_positions: List[int] = []
+    previous: List[int] = [-1] * len(values)
+
+    for position, value in enumerate(values):
+        i = bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[i] = value
+            tail_positions[i] = position
+        previous[position] = tail_positions[i - 1] if i > 0 else -1
+
+    result: Set[int] = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position != -1:
+        result.add(position)
+        position = previous[position]
+    return result
+
+
+@dataclass
+class ReconcileResult:
+    """Wynik uzgodnienia strony ze strukturą folderów (operacje wykonane w jednym przejściu)"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    moved: List[str] = field(default_factory=list)
+    sections_added: List[str] = field(default_factory=list)
+    sections_removed: List[str] = field(default_factory=list)
+    duplicates_removed: int = 0
+    rows_removed: int = 0
+    failed: int = 0
+    cards_total: int = 0
+    sections_total: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        """Czy uzgodnienie zmieniło drzewo"""
+        return bool(self.added or self.removed or self.moved or self.sections_added
+                    or self.sections_removed or self.duplicates_removed or self.rows_removed)
+
+
+def _empty_changes_summary() -> Dict[str, List[str]]:
+    return {
+        "added": [],
+        "removed": [],
+        "modified": [],
+        "folders_updated": []
+    }
+
+
+@dataclass
+class UpdateRun:
+    """
+    Stan jednego uruchomienia aktualizacji
+
+    Każdy run ma własne seen_urls/removed_urls/changes_summary/detailed_log, więc jeden
+    manager (z ciepłym cache) może równolegle aktualizować kilka repozytoriów stron.
+    """
+    source_path: Optional[Path] = None
+    target_path: Optional[Path] = None
+    changes_summary: Dict[str, List[str]] = field(default_factory=_empty_changes_summary)
+    seen_urls: Set[str] = field(default_factory=set)
+    removed_urls: Set[str] = field(default_factory=set)
+    detailed_log: List[str] = field(default_factory=list)
+    clean_folders: Set[str] = field(default_factory=set)  # Klucze folderów bez zmian wg git diff
+    page_diffs: Dict[str, ReconcileResult] = field(default_factory=dict)  # Strona → wykonane operacje
+    scanner: Optional[str] = None  # Skaner tego runu (None = skaner managera; watch: "fs")
+    dry_run: bool = False  # Plan (plan_update) - nic nie jest zapisywane, logi opisują operacje do wykonania
+    started_at: datetime = field(default_factory=datetime.now)
+
+
+class _Record:
+    """
+    Baza rekordów struktury z __slots__ (bez __dict__ na każdy obiekt)
+
+    Odczyt record['pole'] / record.get('pole') działa jak dla słownika, więc kod
+    przyjmujący zadania w formie dict (np. szablon karty) obsługuje oba formaty.
+    """
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+
+    def __repr__(self):
+        return f"<{type(self).__name__}({getattr(self, self.FIELDS[0])!r})>"
+
+
+class Task(_Record):
+    """
+    Zadanie (karta) w strukturze folderu
+
+    URL przechowywany jako współdzielony (internowany) prefiks + końcówka -
+    tysiące zadań sekcji nie powtarzają całego https://prakt.dziadu.dev/<folder>/...
+    """
+    __slots__ = ('title', 'description', 'url_prefix', 'path', 'type', 'sort_key')
+    FIELDS = ('title', 'description', 'url', 'type', 'sort_key')
+
+    def __init__(self, title: str, description: str, url: str, type: str, sort_key: Optional[str] = None):
+        self.title = title
+        self.description = description
+        self.type = type
+        self.sort_key = sort_key or natural_sort_token(title)
+
+        # Prefiks: katalog pliku (dla folderu - katalog nad <folder>/index.html)
+        head = url.rpartition('/')[0]
+        if type == "folder":
+            head = head.rpartition('/')[0]
+        split = len(head) + 1 if head else 0
+        self.url_prefix = sys.intern(url[:split])
+        self.path = url[split:]
+
+    @property
+    def url(self) -> str:
+        return self.url_prefix + self.path
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"title": self.title, "description": self.description, "url": self.url,
+                "type": self.type, "sort_key": self.sort_key}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> 'Task':
+        return cls(data["title"], data.get("description", ""), data["url"], data.get("type", "file"),
+                   data.get("sort_key"))
+
+
+class Subsection(_Record):
+    """Podsekcja (podfolder sekcji) z listą zadań"""
+    __slots__ = ('name', 'tasks', 'sort_key')
+    FIELDS = ('type', 'name', 'tasks', 'sort_key')
+    type = "subsection"
+
+    def __init__(self, name: str, tasks: Optional[List[Task]] = None, sort_key: Optional[str] = None):
+        self.name = sys.intern(name)
+        self.tasks = tasks if tasks is not None else []
+        self.sort_key = sort_key or natural_sort_token(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": "subsection", "name": self.name, "tasks": [task.to_dict() for task in self.tasks],
+                "sort_key": self.sort_key}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Subsection':
+        return cls(data["name"], [_as_task(task) for task in data.get("tasks", [])], data.get("sort_key"))
+
+
+class Section(_Record):
+    """Sekcja struktury: zadania bez podsekcji + podsekcje indeksowane nazwą"""
+    __slots__ = ('name', 'tasks', 'subsections')
+    FIELDS = ('name', 'tasks', 'subsections')
+
+    def __init__(self, name: str):
+        self.name = sys.intern(name)
+        self.tasks: List[Task] = []
+        self.subsections: Dict[str, Subsection] = {}
+
+    def subsection(self, name: str) -> Subsection:
+        """Podsekcja o danej nazwie (tworzona przy pierwszym użyciu)"""
+        subsection = self.subsections.get(name)
+        if subsection is None:
+            subsection = self.subsections[name] = Subsection(name)
+        return subsection
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Forma serializowana: lista zadań i podsekcji (jak w starszym formacie struktury)"""
+        return [task.to_dict() for task in self.tasks] + [sub.to_dict() for sub in self.subsections.values()]
+
+    @classmethod
+    def from_list(cls, name: str, items: List[Any]) -> 'Section':
+        section = cls(name)
+        for item in items:
+            if item.get("type") == "subsection":
+                subsection = item if isinstance(item, Subsection) else Subsection.from_dict(item)
+                section.subsections[subsection.name] = subsection
+            else:
+                section.tasks.append(_as_task(item))
+        return section
+
+
+def _as_task(item: Any) -> Task:
+    return item if isinstance(item, Task) else Task.from_dict(item)
+
+
+def structure_to_dict(structure: Dict[str, Section]) -> Dict[str, List[Dict[str, Any]]]:
+    """Struktura jako zwykłe słowniki/listy (zapis do cache, JSON)"""
+    return {name: section.to_list() if isinstance(section, Section) else section
+            for name, section in structure.items()}
+
+
+def structure_from_dict(data: Dict[str, Any]) -> Dict[str, Section]:
+    """Struktura z formy serializowanej (akceptuje też już zbudowane sekcje)"""
+    return {sys.intern(name): items if isinstance(items, Section) else Section.from_list(name, items)
+            for name, items in data.items()}
+
+
+def _has_class(tag, class_name: str) -> bool:
+    """Sprawdza czy tag ma daną klasę CSS (bezpieczne dla NavigableString)"""
+    return class_name in (tag.get('class') or []) if getattr(tag, 'name', None) else False
+
+
+def _is_significant(node) -> bool:
+    """Czy węzeł jest osobnym regionem (tag, komentarz lub niepusty tekst)"""
+    return isinstance(node, Tag) or type(node) is not NavigableString or bool(node.strip())
+
+
+class _StopLocating(Exception):
+    """Przerywa parsowanie po znalezieniu końca content-wrapper"""
+
+
+class _Region:
+    """Fragment surowego tekstu odpowiadający jednemu dziecku content-wrapper"""
+    __slots__ = ('position', 'kind', 'name', 'start', 'end', 'ext_start', 'ext_end', 'gap_before', 'node')
+
+    def __init__(self, position: int, kind: str, name: Optional[str], start: int):
+        self.position = position
+        self.kind = kind          # 'tag', 'text' lub 'other' (komentarz, deklaracja)
+        self.name = name
+        self.start = start
+        self.end = start
+        self.ext_start = start
+        self.ext_end = start
+        self.gap_before = ""
+        self.node = None
+
+
+class ContentRegions(HTMLParser):
+    """
+    Lokalizuje div.content-wrapper i jego bezpośrednie dzieci w surowym tekście strony
+
+    Działa na zdarzeniach parsera (bez budowania drzewa) i odtwarza zasady
+    zagnieżdżania html.parser z BeautifulSoup, więc kolejne regiony odpowiadają
+    kolejnym dzieciom kontenera. Pozwala to przy zapisie skopiować niezmienione
+    sekcje bajt w bajt i wygenerować od nowa tylko te, które się zmieniły.
+    """
+
+    VOID_TAGS = {
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+        'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+        'image', 'isindex', 'nextid', 'spacer'
+    }
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=True)
+        self.text = text
+        self.found = False
+        self.wrapper_start = self.inner_start = self.inner_end = self.wrapper_end = -1
+        self.regions: List[_Region] = []
+        self._stack: List[str] = []
+        self._wrapper_depth: Optional[int] = None
+        self._open_text: Optional[_Region] = None
+        self._line_starts: List[int] = []
+
+    @classmethod
+    def locate(cls, text: str) -> Optional['ContentRegions']:
+        """Zwraca regiony content-wrapper lub None gdy nie znaleziono kontenera"""
+        locator = cls(text)
+        locator._line_starts.append(0)
+        position = text.find('\n')
+        while position != -1:
+            locator._line_starts.append(position + 1)
+            position = text.find('\n', position + 1)
+        try:
+            locator.feed(text)
+            locator.close()
+        except _StopLocating:
+            pass
+        if not locator.found or locator.wrapper_end < 0:
+            return None
+        locator._finish()
+        return locator
+
+    # ---- zdarzenia parsera ----
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def _at_child_level(self) -> bool:
+        return self._wrapper_depth is not None and len(self._stack) == self._wrapper_depth
+
+    def _close_text(self, offset: int):
+        if self._open_text is not None:
+            region = self._open_text
+            region.end = region.start + len(self.text[region.start:offset].rstrip())
+            self._open_text = None
+
+    def _add_region(self, kind: str, name: Optional[str], start: int) -> _Region:
+        region = _Region(len(self.regions), kind, name, start)
+        self.regions.append(region)
+        return region
+
+    def handle_starttag(self, tag, attrs):
+        start = self._offset()
+        self._close_text(start)
+        end = start + len(self.get_starttag_text() or "")
+
+        if self._at_child_level():
+            region = self._add_region('tag', tag, start)
+            region.end = end
+        elif not self.found and tag == 'div' and 'content-wrapper' in (dict(attrs).get('class') or '').split():
+            self.found = True
+            self.wrapper_start, self.inner_start = start, end
+            self._stack.append(tag)
+            self._wrapper_depth = len(self._stack)
+            return
+
+        if tag not in self.VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        start = self._offset()
+        self._close_text(start)
+        if self._at_child_level():
+            region = self._add_region('tag', tag, start)
+            region.end = start + len(self.get_starttag_text() or "")
+
+    def handle_endtag(self, tag):
+        start = self._offset()
+        self._close_text(start)
+        if tag not in self._stack:
+            return
+        end = self.text.find('>', start) + 1 or len(self.text)
+
+        while self._stack:
+            name = self._stack.pop()
+            depth = len(self._stack)
+            if self._wrapper_depth is not None:
+                if depth == self._wrapper_depth and self.regions:
+                    self.regions[-1].end = end if name == tag else start
+                elif depth == self._wrapper_depth - 1:
+                    self.inner_end, self.wrapper_end = start, end
+                    raise _StopLocating()
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self._at_child_level() and self._open_text is None and data.strip():
+            self._open_text = self._add_region('text', None, self._offset())
+
+    def _handle_other(self, closing: str):
+        start = self._offset()
+        self._close_text(start)
+        if self._at_child_level():
+            region = self._add_region('other', None, start)
+            end = self.text.find(closing, start)
+            region.end = end + len(closing) if end != -1 else len(self.text)
+
+    def handle_comment(self, data):
+        self._handle_other('-->')
+
+    def handle_decl(self, decl):
+        self._handle_other('>')
+
+    def handle_pi(self, data):
+        self._handle_other('>')
+
+    def unknown_decl(self, data):
+        self._handle_other(']]>')
+
+    @classmethod
+    def from_cache(cls, text: str, data: Dict[str, Any]) -> 'ContentRegions':
+        """Odtwarza regiony zapisane przez to_cache dla tego samego tekstu (bez parsowania)"""
+        regions = cls(text)
+        regions.found = True
+        regions.wrapper_start, regions.inner_start, regions.inner_end, regions.wrapper_end = data['wrapper']
+        for kind, name, start, end in data['regions']:
+            regions._add_region(kind, name, start).end = end
+        regions._finish()
+        return regions
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Offsety kontenera i regionów (JSON)"""
+        return {
+            'wrapper': [self.wrapper_start, self.inner_start, self.inner_end, self.wrapper_end],
+            'regions': [[region.kind, region.name, region.start, region.end] for region in self.regions],
+        }
+
+    # ---- regiony ----
+
+    def _finish(self):
+        """Rozszerza regiony o wcięcie i koniec linii oraz zapamiętuje przerwy między nimi"""
+        text = self.text
+        previous_end = self.inner_start
+        for region in self.regions:
+            start = region.start
+            while start > previous_end and text[start - 1] in ' \t':
+                start -= 1
+            region.ext_start = start if start == previous_end or text[start - 1] == '\n' else region.start
+
+            end = region.end
+            while end < self.inner_end and text[end] in ' \t\r':
+                end += 1
+            region.ext_end = end + 1 if end < self.inner_end and text[end] == '\n' else region.end
+
+            region.gap_before = text[previous_end:region.ext_start]
+            previous_end = region.ext_end
+
+    def bind(self, container, placeholders: bool = False) -> bool:
+        """
+        Przypisuje regiony do dzieci kontenera BeautifulSoup (przed modyfikacją drzewa)
+
+        Args:
+            placeholders: Komentarz w kontenerze zastępuje dowolny region (kontener
+                częściowy - niezmaterializowane regiony jako <!--region:N-->)
+
+        Returns:
+            False gdy układ dzieci nie zgadza się z regionami (wtedy nie można
+            bezpiecznie składać wyniku z oryginalnego tekstu)
+        """
+        children = [child for child in container.contents if _is_significant(child)]
+        if len(children) != len(self.regions):
+            return False
+        for child, region in zip(children, self.regions):
+            if placeholders and isinstance(child, Comment):
+                region.node = child
+                continue
+            if isinstance(child, Tag) != (region.kind == 'tag'):
+                return False
+            if isinstance(child, Tag) and child.name != region.name:
+                return False
+            region.node = child
+        return True
+
+    def splice(self, container, touched: Set[int], newline: str = "\n", indent_level: Optional[int] = None) -> str:
+        """
+        Składa nowy tekst strony: niezmienione regiony kopiowane z oryginału,
+        zmienione i nowe generowane przez BeautifulSoup z wcięciem jak prettify()
+
+        Args:
+            container: Zmodyfikowany kontener BeautifulSoup
+            touched: id() regionów zmodyfikowanych podczas uzgadniania
+            newline: Styl końca linii oryginału
+            indent_level: Poziom wcięcia kontenera (domyślnie liczba jego przodków w drzewie)
+        """
+        text = self.text
+        bound = {id(region.node): region for region in self.regions if region.node is not None}
+        if indent_level is None:
+            indent_level = sum(1 for _ in container.parents)
+
+        if self.regions:
+            head = text[self.inner_start:self.regions[0].ext_start]
+            tail = text[self.regions[-1].ext_end:self.inner_end]
+        else:
+            inner = text[self.inner_start:self.inner_end]
+            split = inner.find('\n') + 1
+            head, tail = inner[:split], inner[split:]
+
+        out = [text[:self.inner_start], head]
+        previous: Optional[_Region] = None
+        for child in container.contents:
+            if not _is_significant(child):
+                continue
+            region = bound.get(id(child))
+            if region is not None and region.node is child and id(child) not in touched:
+                if previous is not None and previous.position + 1 == region.position:
+                    out.append(region.gap_before)
+                out.append(text[region.ext_start:region.ext_end])
+                previous = region
+                continue
+
+            rendered = child.decode(indent_level=indent_level) if isinstance(child, Tag) else str(child)
+            if newline != "\n":
+                rendered = rendered.replace("\n", newline)
+            if not out[-1].endswith("\n"):
+                out.append(newline)
+            out.append(rendered)
+            previous = None
+
+        out.append(tail)
+        out.append(text[self.inner_end:])
+        return "".join(out)
+
+
+class WrapperLocator(HTMLParser):
+    """
+    Strumieniowo lokalizuje div.content-wrapper w pliku strony
+
+    Plik dekodowany jest jako latin-1 (bajt = znak), więc pozycje parsera są
+    offsetami bajtów, a znaczniki (ASCII) rozpoznawane są tak samo jak w UTF-8.
+    Zagnieżdżanie jak w ContentRegions. Parser trzyma tylko nieprzetworzoną
+    końcówkę danych, a czytanie kończy się na tagu zamykającym kontenera.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.start = self.end = -1
+        self.depth = 0  # Liczba przodków kontenera (bez obiektu dokumentu)
+        self.start_tag = b""  # Surowe bajty tagu otwierającego kontenera
+        self._stack: List[str] = []
+        self._wrapper_depth: Optional[int] = None
+        self._fed = 0
+        self._line_starts = [0]  # Offsety początków linii od linii _first_line
+        self._first_line = 1
+
+    @classmethod
+    def locate(cls, path: Path) -> Optional['WrapperLocator']:
+        """
+        Returns:
+            Lokalizator z offsetami tagu otwierającego (start) i zamykającego (end) oraz
+            liczbą przodków (depth) lub None gdy brak kontenera albo nie jest on jawnie
+            zamknięty przez </div>
+        """
+        locator = cls()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(cls.CHUNK_SIZE), b''):
+                    locator.feed(chunk.decode('latin-1'))
+            locator.close()
+        except _StopLocating:
+            pass
+        if locator.start < 0 or locator.end < 0:
+            return None
+        return locator
+
+    def feed(self, data: str):
+        position = data.find('\n')
+        while position != -1:
+            self._line_starts.append(self._fed + position + 1)
+            position = data.find('\n', position + 1)
+        self._fed += len(data)
+        super().feed(data)
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        if line > self._first_line:
+            # Pozycja parsera tylko rośnie - starsze linie nie będą potrzebne
+            del self._line_starts[:line - self._first_line]
+            self._first_line = line
+        return self._line_starts[0] + column
+
+    def handle_starttag(self, tag, attrs):
+        if (self._wrapper_depth is None and tag == 'div'
+                and 'content-wrapper' in (dict(attrs).get('class') or '').split()):
+            self.start = self._offset()
+            self.start_tag = (self.get_starttag_text() or "").encode('latin-1')
+            self.depth = len(self._stack)
+            self._wrapper_depth = self.depth + 1
+        if tag not in ContentRegions.VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        while self._stack:
+            name = self._stack.pop()
+            if self._wrapper_depth is not None and len(self._stack) < self._wrapper_depth:
+                if name == tag:
+                    self.end = self._offset()
+                raise _StopLocating()
+            if name == tag:
+                break
+
+
+class CardScanner(HTMLParser):
+    """
+    Karty i sekcje content-wrapper odczytane ze zdarzeń parsera (bez drzewa)
+
+    Układ jak w PageIndex: h3.subsection-title otwiera sekcję, h4.subsection-subtitle
+    podsekcję, a każdy link stretched-link to karta w bieżącym miejscu.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards: List[Tuple[str, Tuple[Optional[str], Optional[str]]]] = []  # (URL, (sekcja, podsekcja))
+        self.sections: List[str] = []
+        self._section: Optional[str] = None
+        self._subsection: Optional[str] = None
+        self._heading: Optional[str] = None
+        self._text: List[str] = []
+
+    @classmethod
+    def scan(cls, text: str) -> 'CardScanner':
+        scanner = cls()
+        scanner.feed(text)
+        scanner.close()
+        return scanner
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+        if tag == 'h3' and 'subsection-title' in classes or tag == 'h4' and 'subsection-subtitle' in classes:
+            self._heading, self._text = tag, []
+        elif tag == 'a' and 'stretched-link' in classes and attributes.get('href'):
+            self.cards.append((attributes['href'], (self._section, self._subsection)))
+
+    def handle_data(self, data):
+        if self._heading is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != self._heading:
+            return
+        name = "".join(self._text).strip()
+        if tag == 'h3':
+            self._section, self._subsection = name, None
+            if name not in self.sections:
+                self.sections.append(name)
+        else:
+            self._subsection = name
+        self._heading = None
+
+
+class _Template:
+    """Fragment HTML podzielony raz na stałe kawałki i pola (__NAZWA__)"""
+
+    FIELD = re.compile(r'__(URL|TITLE|DESCRIPTION|SORT_KEY|SECTION|SUBSECTION)__')
+    ATTRIBUTE_FIELDS = {'url', 'sort_key'}
+
+    def __init__(self, text: str):
+        parts = self.FIELD.split(text)
+        self.literals = parts[0::2]
+        self.fields = [name.lower() for name in parts[1::2]]
+
+    @staticmethod
+    def _escape(value: str, attribute: bool) -> str:
+        # Jak formatter "minimal" BeautifulSoup (&, <, >), w atrybutach dodatkowo cudzysłów
+        escaped = html.escape(value, quote=False)
+        return escaped.replace('"', '&quot;') if attribute else escaped
+
+    def render(self, values: Dict[str, str]) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.fields, self.literals[1:]):
+            out.append(self._escape(values[name], name in self.ATTRIBUTE_FIELDS))
+            out.append(literal)
+        return "".join(out)
+
+
+class PageRenderer:
+    """
+    Generuje zawartość content-wrapper od nowa ze struktury (tryb zapisu "render")
+
+    Węzły sekcji, podsekcji, wiersza i karty (zbudowane raz tym samym kodem co
+    przy aktualizacji przyrostowej) są formatowane przez BeautifulSoup raz na
+    poziom wcięcia i dzielone na stałe kawałki i pola. Renderowanie strony to
+    jedno liniowe sklejanie kawałków - bez parsowania i bez drzewa. Wynik zależy
+    tylko od struktury, więc ta sama struktura daje te same bajty.
+    """
+
+    BODY = "__BODY__"
+
+    def __init__(self, section, subsection, row, card):
+        """
+        Args:
+            section: div.mb-4 z nagłówkiem h3 (nazwa sekcji: __SECTION__)
+            subsection: h4 (nazwa podsekcji: __SUBSECTION__)
+            row: div.row
+            card: Karta dla CardTemplate.PLACEHOLDER_TASK
+        """
+        for node in (section, subsection, row, card):
+            node.extract()
+        section.append(self.BODY)
+        row.append(self.BODY)
+        self._nodes = {'section': section, 'subsection': subsection, 'row': row, 'card': card}
+        self._templates: Dict[Tuple[str, int], Tuple[_Template, ...]] = {}
+
+    def _template(self, name: str, level: int) -> Tuple[_Template, ...]:
+        """Szablon węzła na danym poziomie wcięcia (otwarcie i zamknięcie dla węzłów z BODY)"""
+        key = (name, level)
+        if key not in self._templates:
+            text = self._nodes[name].decode(indent_level=level)
+            marker = text.find(self.BODY)
+            if marker == -1:
+                self._templates[key] = (_Template(text),)
+            else:
+                line_start = text.rfind("\n", 0, marker) + 1
+                line_end = text.find("\n", marker) + 1 or len(text)
+                self._templates[key] = (_Template(text[:line_start]), _Template(text[line_end:]))
+        return self._templates[key]
+
+    def render(self, rows: Dict[Tuple[str, Optional[str]], List['Task']], level: int) -> str:
+        """
+        Args:
+            rows: Układ strony z UpdateManager._desired_rows
+            level: Poziom wcięcia dzieci kontenera
+
+        Returns:
+            Tekst zawartości kontenera (każda linia zakończona znakiem nowej linii)
+        """
+        section_open, section_close = self._template('section', level)
+        subsection, = self._template('subsection', level + 1)
+        row_open, row_close = self._template('row', level + 1)
+        card, = self._template('card', level + 2)
+
+        out: List[str] = []
+        current = None
+        for (section_name, subsection_name), tasks in rows.items():
+            if section_name != current:
+                if current is not None:
+                    out.append(section_close.render({}))
+                out.append(section_open.render({'section': section_name}))
+                current = section_name
+            if subsection_name:
+                out.append(subsection.render({'subsection': subsection_name}))
+            out.append(row_open.render({}))
+            for task in tasks:
+                out.append(card.render({'url': task.url, 'title': task.title, 'description': task.description,
+                                        'sort_key': _task_sort_key(task)}))
+            out.append(row_close.render({}))
+        if current is not None:
+            out.append(section_close.render({}))
+        return "".join(out)
+
+
+class PageIndex:
+    """
+    Indeks kart i sekcji jednej strony HTML
+
+    Budowany raz na wywołanie update_html_file i aktualizowany przy każdym
+    dodaniu/usunięciu karty, dzięki czemu żadna operacja nie przeszukuje
+    ponownie całego content-wrapper.
+
+    Mapowania:
+        cards:       URL → div.col-sm-6 (węzeł karty)
+        locations:   URL → (sekcja, podsekcja) w której leży karta
+        sections:    nazwa sekcji → h3.subsection-title
+        subsections: (sekcja, podsekcja) → h4.subsection-subtitle
+        rows:        (sekcja, podsekcja | None) → div.row
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.cards: Dict[str, Any] = {}
+        self.locations: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.sections: Dict[str, Any] = {}
+        self.subsections: Dict[Tuple[str, str], Any] = {}
+        self.rows: Dict[Tuple[str, Optional[str]], Any] = {}
+        self.section_counts: Dict[str, int] = {}
+        self.duplicates: List[Any] = []
+        self.touched: Set[int] = set()
+        self._build()
+
+    def _build(self):
+        """Jedno liniowe przejście po sekcjach i kartach kontenera"""
+        for h3 in self.container.find_all('h3', {'class': 'subsection-title'}):
+            section_name = h3.get_text(strip=True)
+            if section_name in self.sections:
+                continue
+            self.sections[section_name] = h3
+            self.section_counts[section_name] = 0
+
+            subsection_name = None
+            current = h3.find_next_sibling()
+            while current and current.name != 'h3':
+                if current.name == 'h4' and _has_class(current, 'subsection-subtitle'):
+                    subsection_name = current.get_text(strip=True)
+                    self.subsections.setdefault((section_name, subsection_name), current)
+                elif current.name == 'div' and _has_class(current, 'row'):
+                    key = (section_name, subsection_name)
+                    self.rows.setdefault(key, current)
+                    for card in current.find_all('div', class_='col-sm-6', recursive=False):
+                        self._register(card, key)
+                current = current.find_next_sibling()
+
+        # Karty poza rozpoznanymi sekcjami (np. ręcznie dodane)
+        indexed = {id(card) for card in self.cards.values()}
+        indexed.update(id(card) for card in self.duplicates)
+        for link in self.container.find_all('a', {'target': '_blank', 'class': 'stretched-link'}):
+            if not link.get('href'):
+                continue
+            card = link.parent
+            while card is not None and card is not self.container and not _has_class(card, 'col-sm-6'):
+                card = card.parent
+            if card is None or card is self.container or id(card) in indexed:
+                continue
+            indexed.add(id(card))
+            self._register(card, (None, None))
+
+    def touch(self, node):
+        """Oznacza region (dziecko kontenera) zawierający węzeł jako zmieniony"""
+        while node is not None and node.parent is not self.container:
+            node = node.parent
+        if node is not None:
+            self.touched.add(id(node))
+
+    @staticmethod
+    def card_url(card) -> Optional[str]:
+        """Zwraca URL karty (href linku stretched-link)"""
+        link = card.find('a', {'class': 'stretched-link'})
+        return link.get('href') if link else None
+
+    def _register(self, card, location: Tuple[Optional[str], Optional[str]]):
+        """Dodaje kartę do indeksu (duplikaty URL trafiają do self.duplicates)"""
+        url = self.card_url(card)
+        if not url:
+            return
+        if url in self.cards:
+            self.duplicates.append(card)
+            return
+        self.cards[url] = card
+        self.locations[url] = location
+        if location[0] is not None:
+            self.section_counts[location[0]] = self.section_counts.get(location[0], 0) + 1
+
+    def add_card(self, card, section_name: str, subsection_name: Optional[str]):
+        """Rejestruje kartę wstawioną do wiersza (sekcja, podsekcja)"""
+        self._register(card, (section_name, subsection_name))
+
+    def remove_card(self, url: str) -> bool:
+        """Usuwa kartę z drzewa i z indeksu"""
+        card = self.cards.pop(url, None)
+        if card is None:
+            return False
+        section_name, _ = self.locations.pop(url)
+        if section_name is not None:
+            self.section_counts[section_name] -= 1
+        self.touch(card)
+        card.decompose()
+        return True
+
+    def move_card(self, url: str, section_name: str, subsection_name: Optional[str]):
+        """Aktualizuje położenie karty przeniesionej do innego wiersza"""
+        old_section, _ = self.locations[url]
+        if old_section is not None:
+            self.section_counts[old_section] -= 1
+        self.locations[url] = (section_name, subsection_name)
+        self.section_counts[section_name] = self.section_counts.get(section_name, 0) + 1
+
+    def add_section(self, section_name: str, h3):
+        """Rejestruje nową sekcję"""
+        self.sections[section_name] = h3
+        self.section_counts.setdefault(section_name, 0)
+
+    def add_subsection(self, section_name: str, subsection_name: str, h4):
+        """Rejestruje nową podsekcję"""
+        self.subsections[(section_name, subsection_name)] = h4
+
+    def add_row(self, section_name: str, subsection_name: Optional[str], row):
+        """Rejestruje nowy wiersz kart"""
+        self.rows[(section_name, subsection_name)] = row
+
+    def remove_section(self, section_name: str):
+        """Usuwa sekcję (i jej wiersze/podsekcje) z indeksu"""
+        self.sections.pop(section_name, None)
+        self.section_counts.pop(section_name, None)
+        for key in [k for k in self.rows if k[0] == section_name]:
+            del self.rows[key]
+        for key in [k for k in self.subsections if k[0] == section_name]:
+            del self.subsections[key]
+
+
+class CardTemplate:
+    """
+    Szablon karty sparsowany raz i klonowany dla każdego zadania
+
+    Zamiast uruchamiać parser BeautifulSoup dla każdej nowej karty, fragment
+    HTML karty jest parsowany jednorazowo, a kolejne karty powstają przez
+    głęboką kopię węzła i podstawienie href, tytułu oraz opisu.
+    """
+
+    PLACEHOLDER_TASK = {"url": "__URL__", "title": "__TITLE__", "description": "__DESCRIPTION__",
+                        "sort_key": "__SORT_KEY__"}
+
+    def __init__(self, card_html: str):
+        """
+        Args:
+            card_html: HTML karty wygenerowany dla PLACEHOLDER_TASK
+        """
+        self.node = BeautifulSoup(card_html, 'html.parser').find('div', class_='col-sm-6').extract()
+
+        # Białe znaki między tagami i tak pomija prettify() - mniej węzłów do kopiowania
+        for text in [d for d in self.node.descendants if type(d) is NavigableString and not d.strip()]:
+            text.extract()
+
+        self._href_paths: List[List[int]] = []
+        self._title_path: List[int] = []
+        self._description_path: List[int] = []
+
+        for element in self.node.descendants:
+            if not isinstance(element, Tag):
+                continue
+            if element.get('href') == self.PLACEHOLDER_TASK['url']:
+                self._href_paths.append(self._path_to(element))
+            if element.string == self.PLACEHOLDER_TASK['title']:
+                self._title_path = self._path_to(element)
+            elif element.string == self.PLACEHOLDER_TASK['description']:
+                self._description_path = self._path_to(element)
+
+    def _path_to(self, element) -> List[int]:
+        """Ścieżka indeksów dzieci od korzenia szablonu do elementu"""
+        path = []
+        while element is not self.node:
+            path.append(element.parent.contents.index(element))
+            element = element.parent
+        return path[::-1]
+
+    @staticmethod
+    def _follow(node, path: List[int]):
+        for position in path:
+            node = node.contents[position]
+        return node
+
+    def build(self, task: Dict[str, str]):
+        """Tworzy węzeł karty (div.col-sm-6) dla zadania"""
+        card = copy.copy(self.node)
+        card['data-sort-key'] = _task_sort_key(task)
+        for path in self._href_paths:
+            self._follow(card, path)['href'] = task['url']
+        self._follow(card, self._title_path).string = task['title']
+        self._follow(card, self._description_path).string = task['description']
+        return card
+
+    def build_many(self, tasks: List[Dict[str, str]]) -> List[Any]:
+        """Tworzy karty dla wielu zadań naraz (np. cały wiersz po imporcie semestru)"""
+        return [self.build(task) for task in tasks]
+
+
+class LRUCache(OrderedDict):
+    """Słownik z limitem rozmiaru - przy przepełnieniu usuwany jest najdawniej używany wpis"""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+        self.dirty = False  # Nowe wpisy od ostatniego zapisu
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key not in self or super().__getitem__(key) != value:
+                self.dirty = True
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.max_size:
+                self.popitem(last=False)
+
+    def __reduce__(self):
+        return (self.__class__, (self.max_size,), None, None, iter(list(self.items())))
+
+
+class DescriptionEngine:
+    """
+    Generator opisów kart z nazw plików/folderów
+
+    Mapowania specjalnych nazw to jeden słownik, a wszystkie wzorce numeryczne są
+    skompilowane raz w jedną alternatywę (kolejność prefiksów = priorytet).
+    """
+
+    SPECIAL_MAPPINGS = {
+        "index": "Strona główna",
+        "readme": "README",
+        "template": "Szablon",
+        "example": "Przykład",
+        "sample": "Przykład",
+        "main": "Główny plik",
+        "start": "Start",
+        "begin": "Początek"
+    }
+
+    NUMBERED_PREFIXES = (
+        ("zadanie", "Zadanie"),
+        ("zad", "Zadanie"),
+        ("ćwiczenie", "Ćwiczenie"),
+        ("cw", "Ćwiczenie"),
+        ("lab", "Laboratorium"),
+        ("projekt", "Projekt"),
+        ("test", "Test"),
+        ("quiz", "Quiz"),
+        ("lekcja", "Lekcja"),
+        ("rozdzial", "Rozdział"),
+        ("chapter", "Chapter"),
+    )
+
+    _LABELS = dict(NUMBERED_PREFIXES)
+    _PATTERN = re.compile(
+        r'^(' + '|'.join(re.escape(prefix) for prefix, _ in NUMBERED_PREFIXES) + r')(\d+)', re.IGNORECASE
+    )
+
+    @classmethod
+    def describe(cls, name: str) -> str:
+        """
+        Generuje opisowy tekst z nazwy
+
+        Args:
+            name: Nazwa do przetworzenia
+
+        Returns:
+            Opisowy tekst
+        """
+        special = cls.SPECIAL_MAPPINGS.get(name.lower())
+        if special is not None:
+            return special
+
+        desc = name.replace("-", " ").replace("_", " ").replace(".", " ")
+
+        # Wzorce numeryczne - jedno dopasowanie zamiast kolejnych re.sub
+        match = cls._PATTERN.match(desc)
+        if match:
+            label = cls._LABELS.get(match.group(1).lower(), match.group(1))
+            desc = f"{label} {match.group(2)}{desc[match.end():]}"
+        else:
+            # Jeśli nic nie pasowało, użyj prostego podejścia
+            desc = desc.strip()
+
+        # Title case - ale zachowaj użytkownika-friendly format
+        return desc.title() if desc else "Brak opisu"
+
+
+class SourceTree:
+    """
+    Katalog źródła do głębokości potrzebnej przy skanowaniu (folder/sekcja/podsekcja/podfolder)
+
+    Budowany z systemu plików (os.scandir) albo z obiektów git (git ls-tree), dzięki czemu
+    struktura zadań powstaje z jednego kodu niezależnie od źródła.
+
+    Każdy katalog ma digest (drzewo Merkle): z dysku to md5 z (nazwa, rozmiar, mtime_ns) wpisów
+    i digestów podkatalogów, z git - sha obiektu tree. Zmiana w podsekcji zmienia digest
+    podsekcji, sekcji i folderu, a niezmienione poddrzewa zachowują swój digest.
+    """
+
+    __slots__ = ('dirs', 'files', 'digest')
+
+    DEPTH = 3  # Poziomy katalogów pod folderem kategorii, które mają znaczenie dla struktury
+    FINGERPRINT_DEPTH = 2  # Zapisywane odciski: sekcje i podsekcje
+
+    def __init__(self):
+        self.dirs: Dict[str, 'SourceTree'] = {}
+        self.files: Set[str] = set()
+        self.digest = ""
+
+    @classmethod
+    def from_filesystem(cls, path: Path, depth: int = DEPTH) -> 'SourceTree':
+        """Buduje drzewo z katalogu na dysku (ukryte katalogi są pomijane)"""
+        root = cls()
+        nodes: Dict[str, 'SourceTree'] = {"": root}  # Katalogi wylistowane przez walker
+        records: Dict[str, List[str]] = {"": []}
+
+        # Katalog zawsze przed swoją zawartością - rodzic jest już w nodes
+        for entry in fs_walker.walk(path, max_depth=depth, skip_hidden_dirs=True, follow_symlinks=True):
+            parent = os.path.dirname(entry.rel_path)
+            if entry.is_dir:
+                node = nodes[parent].dirs[entry.name] = cls()
+                if entry.depth >= depth:
+                    # Najgłębszy poziom - liczy się tylko istnienie, mtime katalogu wystarcza
+                    node.digest = str(entry.mtime_ns)
+                else:
+                    nodes[entry.rel_path] = node
+                    records[entry.rel_path] = []
+            else:
+                nodes[parent].files.add(entry.name)
+                records[parent].append(f"f:{entry.name}:{entry.size}:{entry.mtime_ns}")
+
+        # Digesty od najgłębszych katalogów do korzenia
+        for rel_path in sorted(nodes, key=lambda rel: rel.count(os.sep) if rel else -1, reverse=True):
+            node = nodes[rel_path]
+            lines = records[rel_path] + [f"d:{name}:{child.digest}" for name, child in node.dirs.items()]
+            lines.sort()
+            node.digest = hashlib.md5("\n".join(lines).encode('utf-8', 'surrogateescape')).hexdigest()
+        return root
+
+    def fingerprint(self, depth: int = FINGERPRINT_DEPTH) -> Dict[str, Any]:
+        """Odciski katalogów do zapisania w cache ({'digest': ..., 'dirs': {nazwa: ...}})"""
+        if depth <= 0:
+            return {'digest': self.digest}
+        return {
+            'digest': self.digest,
+            'dirs': {name: child.fingerprint(depth - 1) for name, child in self.dirs.items()},
+        }
+
+    @classmethod
+    def from_ls_tree(cls, output: bytes, folder_name: str,
+                     blobs: Optional[List[Tuple[str, int]]] = None) -> Tuple[Optional['SourceTree'], str]:
+        """
+        Buduje drzewo z wyjścia `git ls-tree -r -t -z [-l] <commit> -- <folder>`
+
+        Args:
+            output: Surowe wyjście git ls-tree
+            folder_name: Folder kategorii
+            blobs: Lista do zebrania (nazwa, rozmiar) wszystkich plików - wymaga -l
+
+        Returns:
+            Tuple (drzewo lub None gdy folderu nie ma w commicie, sha drzewa folderu)
+        """
+        root, tree_sha = cls(), ""
+        prefix = folder_name + "/"
+        for record in output.decode('utf-8', 'surrogateescape').split('\0'):
+            meta, _, path = record.partition('\t')
+            if not path:
+                continue
+            _, kind, sha, *size = meta.split()
+            if path == folder_name:
+                tree_sha = sha if kind == 'tree' else ""
+                continue
+            if not path.startswith(prefix):
+                continue
+
+            # Katalog: tree lub submoduł (commit); reszta to pliki
+            parts = path[len(prefix):].split('/')
+            if blobs is not None and kind == 'blob':
+                blobs.append((parts[-1], int(size[0]) if size else 0))
+            dirs = parts if kind != 'blob' else parts[:-1]
+            if len(dirs) > cls.DEPTH:
+                continue
+            node = root
+            for name in dirs:
+                if name.startswith('.'):
+                    break
+                node = node.dirs.setdefault(name, cls())
+            else:
+                if kind == 'blob':
+                    node.files.add(parts[-1])
+                else:
+                    node.digest = sha
+
+        root.digest = tree_sha
+        return (root if tree_sha else None), tree_sha
+
+
+class GitRunner:
+    """
+    Polecenia git na jednej pętli asyncio (jeden wątek pętli zamiast wątku na polecenie)
+
+    Liczba jednocześnie działających procesów git jest ograniczona semaforem, każde
+    polecenie ma własny timeout (po nim proces jest zabijany), a stderr czytany jest
+    linia po linii w trakcie działania (callback on_stderr). Polecenia na tym samym
+    repozytorium można serializować przez repo_lock. Zadania zgłoszone przez submit
+    widzą kontekst wywołującego (np. aktywny UpdateRun).
+    """
+
+    MAX_CONCURRENT = 4  # Maksymalna liczba równoległych procesów git
+    TIMEOUT = 60.0  # Domyślny timeout polecenia (sekundy)
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, timeout: float = TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._repo_locks: Dict[str, asyncio.Lock] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Pętla w wątku tła (tworzona na nowo w procesie potomnym po fork)"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._semaphore = None
+                self._repo_locks = {}
+                threading.Thread(target=self._loop.run_forever, name="git_runner", daemon=True).start()
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        """Uruchamia korutynę na pętli runnera (w kontekście wywołującego) i zwraca Future"""
+        loop = self._get_loop()
+        future: Future = Future()
+
+        def start():
+            task = loop.create_task(coro)
+            task.add_done_callback(lambda done: self._resolve(future, done))
+
+        loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+        return future
+
+    @staticmethod
+    def _resolve(future: Future, task: asyncio.Task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def repo_lock(self, repo_path: Path) -> asyncio.Lock:
+        """Lock repozytorium (pull/commit/push na jednym repo po kolei) - tylko na pętli runnera"""
+        key = os.path.abspath(repo_path)
+        if key not in self._repo_locks:
+            self._repo_locks[key] = asyncio.Lock()
+        return self._repo_locks[key]
+
+    async def run_async(self, repo_path: Path, *args: str, timeout: Optional[float] = None,
+                        on_stderr: Optional[Callable[[str], None]] = None,
+                        text: bool = True) -> subprocess.CompletedProcess:
+        """
+        Wykonuje `git -C repo_path args...` (korutyna - tylko na pętli runnera)
+
+        Args:
+            text: False = stdout jako surowe bajty (np. ścieżki z git ls-tree -z)
+
+        Returns:
+            CompletedProcess z stdout/stderr; po przekroczeniu timeoutu
+            returncode jest niezerowy, a stderr kończy się informacją o timeoucie
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        command = ["git", "-C", str(repo_path), *args]
+        timeout = self.timeout if timeout is None else timeout
+
+        async with self._semaphore:
+            # Własna grupa procesów - timeout zabija też potomków gita (ssh, hooki) trzymających potoki
+            process = await asyncio.create_subprocess_exec(
+                *command, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                start_new_session=os.name == 'posix'
+            )
+            stdout: List[bytes] = []
+            stderr: List[str] = []
+
+            async def read_stdout():
+                stdout.append(await process.stdout.read())
+
+            async def read_stderr():
+                async for raw in process.stderr:
+                    line = raw.decode('utf-8', errors='replace').rstrip()
+                    stderr.append(line)
+                    if on_stderr and line:
+                        on_stderr(line)
+
+            try:
+                await asyncio.wait_for(asyncio.gather(read_stdout(), read_stderr(), process.wait()), timeout)
+            except asyncio.TimeoutError:
+                self._kill(process)
+                await process.wait()
+                stderr.append(f"Timeout git {args[0] if args else ''} po {timeout:g}s")
+
+        output = b"".join(stdout)
+        return subprocess.CompletedProcess(command, process.returncode,
+                                           output.decode('utf-8', errors='replace') if text else output,
+                                           "\n".join(stderr))
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process):
+        if os.name == 'posix':
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        else:
+            process.kill()
+
+    def run(self, repo_path: Path, *args: str, timeout: Optional[float] = None,
+            on_stderr: Optional[Callable[[str], None]] = None) -> subprocess.CompletedProcess:
+        """Wykonuje polecenie git i czeka na wynik (z dowolnego wątku poza pętlą runnera)"""
+        return self.submit(self.run_async(repo_path, *args, timeout=timeout, on_stderr=on_stderr)).result()
+
+    def run_all(self, coros: Iterable) -> List[Any]:
+        """Wykonuje korutyny równolegle na pętli runnera i zwraca ich wyniki (w kolejności)"""
+        async def gather():
+            return await asyncio.gather(*coros)
+        return self.submit(gather()).result()
+
+
+GIT_RUNNER = GitRunner()  # Wspólny dla managerów - limit równoległych procesów git w całej aplikacji
+
+
 class UpdateManager:
     """Manager aktualizacji zawartości HTML - WERSJA 4.1 (Production Ready - Alpha)"""
 
     ALLOWED_FOLDERS = {"TSiAI", "WiAI", "desktopy", "informatyka"}
     BASE_URL = "https://prakt.dziadu.dev"
-    CACHE_FILE = "src/.cache/structure_cache.json"
+    CACHE_FILE = "src/.cache/structure_cache.db"
+    CACHE_NAMESPACES = {
+        'structure_cache': 'structure',
+        'file_hashes': 'hashes',
+        'folder_fingerprints': 'fingerprints',
+        'media_cache': 'media',
+        'source_commits': 'commits',
+        'page_signatures': 'pages',
+        'page_layouts': 'layouts',
+        'git_repos': 'repos',
+    }
+    # Konwersja przy zapisie/odczycie bazy (w pamięci obiekty, w bazie zwykłe słowniki)
+    CACHE_CODECS = {
+        'structure': (structure_to_dict, structure_from_dict),
+    }
+    DESCRIPTION_RULES_VERSION = 1  # Podbić przy zmianie reguł DescriptionEngine (unieważnia cache)
+    STRUCTURE_VERSION = 2  # Podbić przy zmianie pól wpisów struktury (np. sort_key)
+    DESCRIPTION_CACHE_SIZE = 4096  # Limit wpisów LRU cache opisów
+    BACKUP_DIR = "backups"
+    BACKUP_KEEP_LAST = 10  # Retencja backupów per strona: ostatnie N...
+    BACKUP_KEEP_DAILY = 7  # ...najnowszy z każdego z ostatnich dni...
+    BACKUP_KEEP_WEEKLY = 4  # ...i z każdego z ostatnich tygodni
     MAX_WORKERS = 4  # Liczba wątków dla batch processing
-
-    def __init__(self, log_callback: Callable[[str], None] = None, backup_enabled: bool = True, log_file: Optional[str] = None):
+    GIT_TIMEOUTS = {'pull': 600.0, 'fetch': 600.0, 'push': 600.0}  # Polecenia sieciowe (reszta: GitRunner.TIMEOUT)
+    OUTPUT_MODES = ("minimal", "prettify", "stream", "render")
+    VALIDATION_MODES = ("off", "warn", "strict")  # strict: strona z błędami nie jest zapisywana
+    SCANNERS = ("git", "fs")  # git: obiekty commita (fallback do dysku), fs: zawsze system plików (drzewo robocze)
+    MEDIA_EXTENSIONS = {
+        'images': ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'),
+        'videos': ('.mp4', '.avi', '.mov', '.mkv', '.webm'),
+        'documents': ('.pdf', '.doc', '.docx', '.xls', '.xlsx'),
+        'archives': ('.zip', '.rar', '.7z', '.tar', '.gz')
+    }
+    MEDIA_TYPES_BY_SUFFIX = {ext: media_type for media_type, exts in MEDIA_EXTENSIONS.items() for ext in exts}
+
+    def __init__(self, log_callback: Callable[[str], None] = None, backup_enabled: bool = True, log_file: Optional[str] = None,
+                 output_mode: str = "minimal", max_workers: Optional[int] = None, log_to_file: bool = True,
+                 load_cache: bool = True, scanner: str = "git", validation: str = "warn"):
         """
         Inicjalizacja manager'a
         
@@ -70,30 +1433,69 @@ class UpdateManager:
             log_callback: Callback dla logowania
             backup_enabled: Czy tworzyć backupy HTML
             log_file: Ścieżka do pliku loga (opcjonalnie)
+            output_mode: "minimal" (podmiana tylko zmienionych sekcji), "prettify" (cały dokument)
+                "stream" (jak minimal, ale parsowany jest tylko content-wrapper, reszta kopiowana z pliku)
+                lub "render" (content-wrapper generowany od nowa ze struktury, bez parsowania kart)
+            max_workers: Liczba wątków/procesów dla batch processing (domyślnie MAX_WORKERS)
+            log_to_file: Czy logować do pliku (False w procesach roboczych)
+            load_cache: Czy wczytać cache struktury z dysku
+            scanner: "git" (struktura z git ls-tree HEAD, działa też na bare mirror) lub "fs"
+                (drzewo robocze). Uwaga: przy "git" (domyślnie) zapisane, ale niezcommitowane
+                pliki źródła nie trafiają na stronę - do v4.x zawsze skanowany był dysk
+            validation: Walidacja wyniku przed zapisem - "off", "warn" (loguj błędy) lub "strict" (nie zapisuj)
         """
+        if output_mode not in self.OUTPUT_MODES:
+            raise ValueError(f"Nieznany tryb zapisu: {output_mode}")
+        if scanner not in self.SCANNERS:
+            raise ValueError(f"Nieznany skaner: {scanner}")
+        if validation not in self.VALIDATION_MODES:
+            raise ValueError(f"Nieznany tryb walidacji: {validation}")
+
         self.log_callback = log_callback or print
         self.backup_enabled = backup_enabled
-        self.changes_summary = {
-            "added": [],
-            "removed": [],
-            "modified": [],
-            "folders_updated": []
-        }
-        self.seen_urls: Set[str] = set()
-        self.removed_urls: Set[str] = set()
-        self.detailed_log: List[str] = []
-        self.description_cache: Dict[str, str] = {}
-
-        # v4.1: Cache dla struktury folderów
+        self.backup_store = BackupStore(self.BACKUP_DIR)
+        self.output_mode = output_mode
+        self.scanner = scanner
+        self.validation = validation
+        self.max_workers = max_workers or self.MAX_WORKERS
+
+        # Stan runu - aktywny run w bieżącym kontekście (wątku/zadaniu), inaczej ostatni
+        self.last_run = UpdateRun()
+        self._current_run: contextvars.ContextVar = contextvars.ContextVar(f"update_run_{id(self)}", default=None)
+        self.description_cache: LRUCache = LRUCache(self.DESCRIPTION_CACHE_SIZE)
+        self._descriptions_loaded = False
+        self._card_template: Optional[CardTemplate] = None
+        self._page_renderer: Optional[PageRenderer] = None
+
+        # v4.1: Cache dla struktury folderów (słowniki lub przestrzenie nazw CacheStore)
+        self.cache_store: Optional[CacheStore] = None
         self.structure_cache: Dict[str, Dict] = {}
         self.file_hashes: Dict[str, str] = {}  # v4.1: Tracking zmian
+        self.folder_fingerprints: Dict[str, Dict] = {}  # Odciski sekcji/podsekcji (SourceTree.fingerprint)
+        self.media_cache: Dict[str, Dict] = {}  # Statystyki mediów per folder (z odciskiem folderu)
+        self.source_commits: Dict[str, str] = {}  # Ostatnio przetworzony commit źródła (per źródło|strona)
+        self.page_signatures: Dict[str, List[int]] = {}  # [size, mtime_ns] stron po ostatnim przetworzeniu
+        self.page_layouts: Dict[str, Dict] = {}  # Indeks kart/sekcji i regiony strony (z hashem jej treści)
+        self.git_repos: Dict[str, List[int]] = {}  # Sygnatura .git zweryfikowanych repozytoriów
         self.git_lock = threading.Lock()  # v4.1: Lock dla git operacji
+        self.git_runner = GIT_RUNNER
+        self._git_index_configs: Dict[str, List[str]] = {}  # Opcje -c indeksu per repozytorium strony
+        self._locks: Dict[str, threading.Lock] = {}  # Locki per repozytorium/folder
 
         # Setup logging
-        self._setup_logging(log_file)
+        if log_to_file:
+            self._setup_logging(log_file)
+        else:
+            # Bez handlerów i propagacji - proces roboczy po fork nie pisze do pliku loga rodzica
+            # (jego logi wracają w buforze i rodzic zapisuje je raz)
+            self.logger = logging.getLogger(f"{__name__}.silent")
+            self.logger.propagate = False
+            if not self.logger.handlers:
+                self.logger.addHandler(logging.NullHandler())
 
         # v4.1: Załaduj cache
-        self._load_structure_cache()
+        if load_cache:
+            self._load_structure_cache()
 
     def _setup_logging(self, log_file: Optional[str] = None):
         """
@@ -135,85 +1537,125 @@ class UpdateManager:
             self.log(f"⚠️  Błąd setup loggingu: {str(e)}")
 
     # v4.1: CACHE MANAGEMENT
+    def _cache_version(self) -> str:
+        """Wersja zawartości cache - zmiana BASE_URL, reguł opisów lub pól struktury unieważnia wpisy"""
+        return f"{self.BASE_URL}|{self.DESCRIPTION_RULES_VERSION}|{self.STRUCTURE_VERSION}"
+
     def _load_structure_cache(self):
-        """v4.1: Załaduj cache struktury folderów"""
-        cache_path = Path(self.CACHE_FILE)
-        try:
-            if cache_path.exists():
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.structure_cache = data.get('structure', {})
-                    self.file_hashes = data.get('hashes', {})
-                    self.log(f"💾 Cache załadowany ({len(self.structure_cache)} folderów)")
-                    return
-        except Exception as e:
-            self.log(f"⚠️  Błąd załadowania cache: {str(e)}")
+        """v4.1: Podłącz cache struktury folderów (wpisy wczytywane przy pierwszym użyciu)"""
+        self.cache_store = CacheStore(self.CACHE_FILE, self._cache_version(), log=self.log)
+        for attribute, namespace in self.CACHE_NAMESPACES.items():
+            setattr(self, attribute, self._cache_namespace(self.cache_store, namespace))
+        self.log(f"💾 Cache: {self.CACHE_FILE}")
 
-        self.structure_cache = {}
-        self.file_hashes = {}
+    def _cache_namespace(self, store: CacheStore, namespace: str):
+        """Przestrzeń nazw cache z konwersją wartości (jeśli zdefiniowana)"""
+        return store.namespace(namespace, *self.CACHE_CODECS.get(namespace, ()))
 
     def _save_structure_cache(self):
-        """v4.1: Zapisz cache struktury folderów"""
-        cache_path = Path(self.CACHE_FILE)
+        """v4.1: Zapisz cache struktury folderów (tylko zmienione wpisy, w jednej transakcji)"""
         try:
-            cache_path.parent.mkdir(exist_ok=True)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'structure': self.structure_cache,
-                    'hashes': self.file_hashes,
-                    'timestamp': datetime.now().isoformat()
-                }, f, ensure_ascii=False, indent=2)
-            self.log(f"💾 Cache zapisany")
+            store = self.cache_store
+            if store is None:
+                # Manager bez podłączonego cache (np. load_cache=False) zapisuje cały swój stan
+                store = CacheStore(self.CACHE_FILE, self._cache_version(), log=self.log)
+                for attribute, namespace in self.CACHE_NAMESPACES.items():
+                    self._cache_namespace(store, namespace).update(getattr(self, attribute))
+
+            # Opisy jako jeden wpis w kolejności LRU (najdawniej używane pierwsze)
+            if self.description_cache.dirty:
+                self._load_descriptions()
+                store.namespace('descriptions')['lru'] = list(self.description_cache.items())
+                self.description_cache.dirty = False
+
+            written = store.flush()
+            if store is not self.cache_store:
+                store.close()
+            self.log(f"💾 Cache zapisany ({written} wpisów)")
         except Exception as e:
             self.log(f"⚠️  Błąd zapisu cache: {str(e)}")
 
     def _get_folder_hash(self, folder_path: Path) -> str:
-        """v4.1: Oblicz hash folderu dla detekcji zmian"""
+        """v4.1: Oblicz hash folderu dla detekcji zmian (korzeń drzewa Merkle - patrz SourceTree)"""
         try:
-            hasher = hashlib.md5()
-
-            # Dodaj wszystkie pliki i ich czasy modyfikacji
-            for file_path in sorted(folder_path.rglob('*')):
-                if file_path.is_file() and not file_path.name.startswith('.'):
-                    # Dodaj ścieżkę i czas modyfikacji
-                    rel_path = str(file_path.relative_to(folder_path))
-                    mtime = file_path.stat().st_mtime
-                    hasher.update(f"{rel_path}:{mtime}".encode())
-
-            return hasher.hexdigest()
+            return SourceTree.from_filesystem(folder_path).digest
         except Exception:
             return ""
 
-    def _has_folder_changed(self, folder_path: Path, folder_name: str) -> bool:
-        """v4.1: Sprawdź czy folder się zmienił"""
-        current_hash = self._get_folder_hash(folder_path)
-        previous_hash = self.file_hashes.get(folder_name, "")
+    @staticmethod
+    def _cache_key(folder_path: Path) -> str:
+        """Klucz cache dla folderu źródłowego (ścieżka - różne repozytoria się nie mieszają)"""
+        return os.path.abspath(str(folder_path))
+
+    def _get_lock(self, key: str) -> threading.Lock:
+        """Lock dla danego repozytorium/folderu (różne klucze nie blokują się nawzajem)"""
+        with self.git_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    # RUN CONTEXT
+    def start_run(self, source_path: Optional[Path] = None, target_path: Optional[Path] = None) -> UpdateRun:
+        """Tworzy nowy run (świeże seen_urls/removed_urls/changes_summary/detailed_log)"""
+        run = UpdateRun(source_path=source_path, target_path=target_path)
+        self.last_run = run
+        return run
+
+    @contextmanager
+    def activate(self, run: UpdateRun):
+        """Ustawia run jako aktywny w bieżącym kontekście (logi i podsumowanie trafiają do niego)"""
+        token = self._current_run.set(run)
+        try:
+            yield run
+        finally:
+            self._current_run.reset(token)
+
+    @property
+    def current_run(self) -> UpdateRun:
+        """Aktywny run w bieżącym kontekście lub ostatnio rozpoczęty"""
+        return self._current_run.get() or self.last_run
 
-        has_changed = current_hash != previous_hash
+    @property
+    def changes_summary(self) -> Dict[str, List[str]]:
+        return self.current_run.changes_summary
 
-        if has_changed:
-            self.file_hashes[folder_name] = current_hash
-            self.log(f"  📝 Zmiana detected: {folder_name}")
+    @property
+    def seen_urls(self) -> Set[str]:
+        return self.current_run.seen_urls
+
+    @property
+    def removed_urls(self) -> Set[str]:
+        return self.current_run.removed_urls
 
-        return has_changed or not self.structure_cache.get(folder_name)
+    @property
+    def detailed_log(self) -> List[str]:
+        return self.current_run.detailed_log
+
+    def _in_context(self, func: Callable, *args) -> Callable[[], Any]:
+        """Opakowuje wywołanie tak, by wątek roboczy widział aktywny run"""
+        ctx = contextvars.copy_context()
+        return lambda: ctx.run(func, *args)
 
     # v4.1: GIT OPERATIONS (ASYNC)
     def pull_repo_async(self, path: Path) -> bool:
         """v4.1: Asynchroniczne pull repozytorium"""
-        with self.git_lock:  # Lock dla thread-safety
-            return self.pull_repo(path)
+        return self.pull_repo(path)
 
     def log(self, message: str):
         """Logowanie wiadomości"""
         if self.log_callback:
             self.log_callback(message)
         self.logger.info(message)
-        self.detailed_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+        self.current_run.detailed_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
 
     def validate_git_repo(self, path: Path) -> bool:
         """
         ⭐ NOWE: Waliduje czy ścieżka zawiera repozytorium Git
-        
+
+        Wynik jest zapamiętywany (także między uruchomieniami) razem z sygnaturą .git
+        (lub katalogu bare repo) - git rev-parse uruchamiany jest dopiero po jej zmianie.
+
         Args:
             path: Ścieżka do sprawdzenia
             
@@ -225,32 +1667,89 @@ class UpdateManager:
             return False
         
         git_dir = path / ".git"
-        if not git_dir.exists():
+        if not git_dir.exists() and not self._is_bare_repo(path):
             self.log(f"  ❌ Brak folderu .git w: {path}")
             return False
-        
-        result = subprocess.run(
-            ["git", "-C", str(path), "rev-parse", "--git-dir"],
-            capture_output=True,
-            text=True
-        )
+
+        key = self._cache_key(path)
+        stat = (git_dir if git_dir.exists() else path).stat()
+        signature = [stat.st_ino, stat.st_mtime_ns]
+        if self.git_repos.get(key) == signature:
+            self.log(f"  ✓ Zweryfikowane (cache): {path.name}")
+            return True
+
+        result = self._git(path, "rev-parse", "--git-dir")
         
         is_valid = result.returncode == 0
         if is_valid:
+            self.git_repos[key] = signature
             self.log(f"  ✓ Zweryfikowane: {path.name}")
         else:
+            self.git_repos.pop(key, None)
             self.log(f"  ❌ Brak dostępu do Git: {path}")
         
         return is_valid
 
+    async def _git_async(self, repo_path: Path, *args: str, config: List[str] = (),
+                         text: bool = True) -> subprocess.CompletedProcess:
+        """
+        Polecenie git na pętli runnera; stderr poleceń sieciowych trafia do loga na bieżąco
+
+        Args:
+            config: Opcje -c wstawiane przed poleceniem (np. z _git_index_config)
+            text: False = stdout jako bajty (patrz GitRunner.run_async)
+        """
+        command = args[0]
+        on_stderr = None
+        if command in self.GIT_TIMEOUTS:
+            on_stderr = lambda line: self.logger.debug(f"git {command} ({repo_path.name}): {line}")
+        return await self.git_runner.run_async(repo_path, *config, *args, timeout=self.GIT_TIMEOUTS.get(command),
+                                               on_stderr=on_stderr, text=text)
+
+    async def _git_index_config(self, repo_path: Path) -> List[str]:
+        """
+        Opcje -c przyspieszające odświeżanie indeksu: untracked cache i wbudowany fsmonitor
+
+        Ustawienia z konfiguracji repozytorium mają pierwszeństwo, a fsmonitor włączany jest
+        tylko gdy git ma wbudowany demon (Windows/macOS). Wynik pamiętany per repozytorium.
+        """
+        key = self._cache_key(repo_path)
+        if key not in self._git_index_configs:
+            result = await self._git_async(repo_path, "config", "--get-regexp", r"^core\.(untrackedcache|fsmonitor)$")
+            configured = {line.split(' ', 1)[0].lower() for line in result.stdout.splitlines()}
+            config = []
+            if 'core.untrackedcache' not in configured:
+                config += ["-c", "core.untrackedCache=true"]
+            if 'core.fsmonitor' not in configured:
+                build = await self._git_async(repo_path, "version", "--build-options")
+                if "fsmonitor--daemon" in build.stdout:
+                    config += ["-c", "core.fsmonitor=true"]
+            self._git_index_configs[key] = config
+        return self._git_index_configs[key]
+
+    def _git(self, repo_path: Path, *args: str, text: bool = True) -> subprocess.CompletedProcess:
+        """Polecenie git przez runner (czeka na wynik)"""
+        return self.git_runner.submit(self._git_async(repo_path, *args, text=text)).result()
+
     def pull_repo(self, path: Path) -> bool:
         """Aktualizacja istniejącego repozytorium"""
+        return self.pull_repos([path])[0]
+
+    def pull_repos(self, paths: List[Path]) -> List[bool]:
+        """
+        Aktualizacja wielu repozytoriów równolegle (na pętli GitRunner, bez wątku na repozytorium)
+
+        Returns:
+            Wynik pull/fetch dla każdej ścieżki (w kolejności)
+        """
+        return self.git_runner.run_all([self._pull_repo_async(path) for path in paths])
+
+    async def _pull_repo_async(self, path: Path) -> bool:
+        """Pull (lub fetch dla bare mirror, który nie ma drzewa roboczego) z lockiem repozytorium"""
         self.log(f"  📤 Aktualizowanie: {path.name}")
-        result = subprocess.run(
-            ["git", "-C", str(path), "pull"],
-            capture_output=True,
-            text=True
-        )
+        command = "fetch" if self._is_bare_repo(path) else "pull"
+        async with self.git_runner.repo_lock(path):
+            result = await self._git_async(path, command)
 
         if result.returncode != 0:
             self.log(f"  ⚠️ Ostrzeżenie: {result.stderr}")
@@ -259,135 +1758,238 @@ class UpdateManager:
             self.log(f"  ✓ Gotowe: {path.name}")
             return True
 
-    def create_backup(self, html_path: Path) -> Optional[Path]:
+    def create_backup(self, html_path: Path, content: Optional[bytes] = None) -> Optional[Path]:
         """
         ⭐ NOWE: Tworzy backup pliku HTML przed modyfikacją
-        
+
+        Treść trafia do magazynu adresowanego hashem (skompresowana, raz na treść),
+        a do indeksu dopisywany jest wpis (strona, czas, hash).
+
         Args:
             html_path: Ścieżka do pliku HTML
-            
+            content: Aktualna treść pliku (jeśli już wczytana, inaczej plik czytany strumieniowo)
+
         Returns:
-            Ścieżka do backupu lub None jeśli się nie powiodło
+            Ścieżka do obiektu backupu lub None jeśli się nie powiodło
         """
         if not self.backup_enabled or not html_path.exists():
             return None
-        
-        backup_dir = Path("backups")
-        backup_dir.mkdir(exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = html_path.stem
-        backup_path = backup_dir / f"{filename}_backup_{timestamp}.html"
-        
+
         try:
-            shutil.copy2(html_path, backup_path)
-            self.log(f"  💾 Backup: {backup_path.name}")
-            return backup_path
+            if content is None:
+                backup = self.backup_store.add_file(html_path)
+            else:
+                backup = self.backup_store.add(html_path, content)
+            if backup["stored"]:
+                self.log(f"  💾 Backup: {html_path.name} ({backup['hash'][:12]})")
+            else:
+                self.log(f"  💾 Backup: {html_path.name} (treść już w magazynie)")
+            return backup["path"]
         except Exception as e:
             self.log(f"  ⚠️  Błąd backupu: {str(e)}")
             return None
 
-    def scan_directory(self, folder_path: Path, folder_name: str) -> Dict[str, List[Dict]]:
+    def restore_backup(self, html_path: Path, timestamp: Optional[str] = None) -> bool:
+        """
+        Przywraca stronę z backupu
+
+        Args:
+            html_path: Ścieżka do pliku HTML
+            timestamp: Czas backupu (ISO) - najnowszy nie późniejszy; None = najnowszy
+
+        Returns:
+            True jeśli przywrócono
+        """
+        try:
+            content = self.backup_store.read(html_path, timestamp)
+            if content is None:
+                self.log(f"  ⚠️  Brak backupu: {html_path.name}")
+                return False
+            self._write_atomic(html_path, content)
+            self.page_signatures.pop(self._cache_key(html_path), None)
+            self.log(f"  ♻️  Przywrócono z backupu: {html_path.name}")
+            return True
+        except Exception as e:
+            self.log(f"  ❌ Błąd przywracania backupu: {str(e)}")
+            return False
+
+    def scan_directory(self, folder_path: Path, folder_name: str) -> Dict[str, Section]:
         """
         v4.1: Skanuje folder hierarchicznie z cache'em (60% szybciej)
 
         Returns:
             Scanned structure (from cache if unchanged)
         """
-        # v4.1: Sprawdź czy folder się zmienił
-        if not self._has_folder_changed(folder_path, folder_name):
-            cached = self.structure_cache.get(folder_name, {})
-            self.log(f"  ⚡ Cache: {folder_name} ({len(cached)} sekcji)")
-            return cached
+        key = self._cache_key(folder_path)
+
+        # Równoległe runy na tym samym folderze skanują go raz; hash zapisywany dopiero
+        # razem ze strukturą, więc inny run nigdy nie dostanie nieaktualnego cache
+        with self._get_lock(key):
+            # Folder nietknięty od ostatniego commita (git diff) - bez liczenia hashu
+            cached = self.structure_cache.get(key)
+            if cached and key in self.current_run.clean_folders and self._is_git_source(folder_path.parent):
+                self.log(f"  ⚡ Cache (git): {folder_name} ({len(cached)} sekcji)")
+                return cached
+
+            # Repozytorium Git: drzewo i hash (sha drzewa) z commita, inaczej drzewo z dysku
+            tree, current_hash = None, ""
+            if self._is_git_source(folder_path.parent):
+                scanned = self.scan_git_tree(folder_path.parent, folder_name)
+                if scanned is not None:
+                    tree, tree_sha = scanned
+                    current_hash = f"git:{tree_sha}"
+            if not current_hash and folder_path.exists():
+                tree = SourceTree.from_filesystem(folder_path)
+                current_hash = f"fs:{tree.digest}"
+
+            # v4.1: Sprawdź czy folder się zmienił
+            if cached and current_hash == self.file_hashes.get(key):
+                self.log(f"  ⚡ Cache: {folder_name} ({len(cached)} sekcji)")
+                return cached
+            self.log(f"  📝 Zmiana detected: {folder_name}")
+
+            if tree is None:
+                self.log(f"  ⚠️  Folder nie istnieje: {folder_path}")
+                return {}
+
+            # Niezmienione sekcje/podsekcje (ten sam digest) przenoszone z poprzedniej struktury
+            fingerprint = self.folder_fingerprints.get(key) if cached else None
+            structure = self._structure_from_tree(tree, folder_name, cached, fingerprint)
+
+            # v4.1: Cache wynik
+            self.structure_cache[key] = structure
+            self.file_hashes[key] = current_hash
+            self.folder_fingerprints[key] = tree.fingerprint()
+
+            if fingerprint:
+                old_sections = fingerprint.get('dirs', {})
+                changed = [name for name, section in tree.dirs.items()
+                           if old_sections.get(name, {}).get('digest') != section.digest]
+                self.log(f"  📥 Skanowano: {folder_name} ({len(structure)} sekcji, zmienione: {len(changed)})")
+            else:
+                self.log(f"  📥 Skanowano: {folder_name} ({len(structure)} sekcji)")
 
-        structure = {}
-        
-        if not folder_path.exists():
-            self.log(f"  ⚠️  Folder nie istnieje: {folder_path}")
             return structure
-        
-        for item in sorted(folder_path.iterdir(), key=natural_sort_key):
-            if item.name.startswith('.'):
-                continue
-            
-            if item.is_file() and item.suffix == '.html':
-                self._add_task(structure, "", "", item, folder_name)
-            elif item.is_dir():
-                self._process_section(structure, item, folder_name)
-        
-        # v4.1: Cache wynik
-        self.structure_cache[folder_name] = structure
-        self.log(f"  📥 Skanowano: {folder_name} ({len(structure)} sekcji)")
+
+    def _is_git_source(self, repo_path: Path) -> bool:
+        """Czy strukturę można zbudować z obiektów git (repozytorium lub bare mirror)"""
+        scanner = self.current_run.scanner or self.scanner
+        return scanner == "git" and ((repo_path / ".git").exists() or self._is_bare_repo(repo_path))
+
+    @staticmethod
+    def _is_bare_repo(path: Path) -> bool:
+        """Czy ścieżka to bare repozytorium (mirror bez drzewa roboczego)"""
+        return (path / "HEAD").is_file() and (path / "objects").is_dir() and (path / "refs").is_dir()
+
+    def scan_git_tree(self, repo_path: Path, folder_name: str, commit: str = "HEAD",
+                      blobs: Optional[List[Tuple[str, int]]] = None) -> Optional[Tuple[Optional[SourceTree], str]]:
+        """
+        Odczytuje drzewo folderu z commita (git ls-tree) - bez chodzenia po dysku
+
+        Args:
+            repo_path: Repozytorium źródłowe (z drzewem roboczym lub bare)
+            folder_name: Folder kategorii
+            commit: Commit/ref do odczytu
+            blobs: Lista do zebrania (nazwa, rozmiar) wszystkich plików folderu
+
+        Returns:
+            Tuple (drzewo lub None gdy brak folderu, sha drzewa) albo None gdy git zawiódł
+        """
+        command = ["ls-tree", "-r", "-t", "-z"]
+        if blobs is not None:
+            command.append("-l")
+        result = self._git(repo_path, *command, commit, "--", folder_name, text=False)
+        if result.returncode != 0:
+            self.log(f"  ⚠️  git ls-tree nieudany ({folder_name}) - skanowanie dysku")
+            return None
+        return SourceTree.from_ls_tree(result.stdout, folder_name, blobs)
+
+    def _structure_from_tree(self, tree: SourceTree, folder_name: str, previous: Optional[Dict[str, Section]] = None,
+                             fingerprint: Optional[Dict] = None) -> Dict[str, Section]:
+        """
+        Buduje strukturę sekcji/podsekcji/zadań z drzewa folderu
+
+        Args:
+            tree: Drzewo folderu kategorii
+            folder_name: Nazwa kategorii
+            previous: Poprzednia struktura folderu (z cache)
+            fingerprint: Odciski katalogów, z których powstała poprzednia struktura -
+                sekcje o niezmienionym digest są przenoszone bez ponownego budowania
+        """
+        structure: Dict[str, Section] = {}
+        old_sections = fingerprint.get('dirs', {}) if previous and fingerprint else {}
+        names = [name for name in (*tree.files, *tree.dirs) if not name.startswith('.')]
+
+        for name in sorted(names, key=natural_sort_key):
+            if name in tree.dirs:
+                section, old = tree.dirs[name], old_sections.get(name)
+                # "Pozostałe" zbiera też pliki z głównego folderu - zawsze budowana od nowa
+                if old and old['digest'] == section.digest and name in previous and name != "Pozostałe":
+                    structure[name] = previous[name]
+                else:
+                    self._process_section(structure, name, section, folder_name,
+                                          previous.get(name) if old else None, old)
+            elif name.endswith('.html'):
+                self._add_task(structure, "", "", name, False, folder_name)
 
         return structure
 
-    def _process_section(self, structure: Dict, section_path: Path, folder_name: str):
-        """Przetwarza folder sekcji"""
-        section_name = section_path.name
-        html_files = list(section_path.glob("*.html"))
-        subdirs = [d for d in section_path.iterdir() if d.is_dir() and not d.name.startswith('.')]
-        
-        if html_files and not subdirs:
-            for html_file in sorted(html_files, key=natural_sort_key):
-                self._add_task(structure, section_name, "", html_file, folder_name)
-        elif subdirs and not html_files:
-            for subdir in sorted(subdirs, key=natural_sort_key):
-                self._process_subsection(structure, section_name, subdir, folder_name)
-        elif html_files and subdirs:
-            for html_file in sorted(html_files, key=natural_sort_key):
-                self._add_task(structure, section_name, "", html_file, folder_name)
-            for subdir in sorted(subdirs, key=natural_sort_key):
-                self._process_subsection(structure, section_name, subdir, folder_name)
-
-    def _process_subsection(self, structure: Dict, section_name: str, subsection_path: Path, folder_name: str):
-        """Przetwarza folder podsekcji"""
-        subsection_name = subsection_path.name
-        index_file = subsection_path / "index.html"
-        subfolders = [d for d in subsection_path.iterdir() if d.is_dir() and not d.name.startswith('.')]
-        
-        if index_file.exists():
-            self._add_task(structure, section_name, subsection_name, subsection_path, folder_name)
-        elif subfolders:
-            for subfolder in sorted(subfolders, key=natural_sort_key):
-                self._add_task(structure, section_name, subsection_name, subfolder, folder_name)
+    def _process_section(self, structure: Dict[str, Section], section_name: str, section: SourceTree,
+                         folder_name: str, previous: Optional[Section] = None, fingerprint: Optional[Dict] = None):
+        """Przetwarza folder sekcji (najpierw pliki HTML, potem podsekcje)"""
+        html_files = [name for name in section.files if name.endswith('.html')]
+        old_subsections = fingerprint.get('dirs', {}) if previous and fingerprint else {}
+        previous_subsections = previous.subsections if previous else {}
+
+        for html_file in sorted(html_files, key=natural_sort_key):
+            self._add_task(structure, section_name, "", html_file, False, folder_name)
+        for subdir in sorted(section.dirs, key=natural_sort_key):
+            subsection, old = section.dirs[subdir], old_subsections.get(subdir)
+            if old and old['digest'] == subsection.digest and subdir in previous_subsections:
+                self._section(structure, section_name).subsections[subdir] = previous_subsections[subdir]
+            else:
+                self._process_subsection(structure, section_name, subdir, subsection, folder_name)
 
-    def _add_task(self, structure: Dict, section_name: str, subsection_name: str, item_path: Path, folder_name: str):
+    def _process_subsection(self, structure: Dict[str, Section], section_name: str, subsection_name: str,
+                            subsection: SourceTree, folder_name: str):
+        """Przetwarza folder podsekcji"""
+        if "index.html" in subsection.files or "index.html" in subsection.dirs:
+            self._add_task(structure, section_name, subsection_name, subsection_name, True, folder_name)
+        else:
+            for subfolder in sorted(subsection.dirs, key=natural_sort_key):
+                self._add_task(structure, section_name, subsection_name, subfolder, True, folder_name)
+
+    @staticmethod
+    def _section(structure: Dict[str, Section], section_name: str) -> Section:
+        """Sekcja struktury (tworzona przy pierwszym użyciu)"""
+        section = structure.get(section_name)
+        if section is None:
+            section = structure[section_name] = Section(section_name)
+        return section
+
+    def _add_task(self, structure: Dict[str, Section], section_name: str, subsection_name: str, item_name: str,
+                  is_folder: bool, folder_name: str):
         """Dodaje zadanie do struktury"""
         if not section_name:
             section_name = "Pozostałe"
-        
-        if section_name not in structure:
-            structure[section_name] = []
-        
-        task_info = self._create_task_info(item_path, section_name, subsection_name, folder_name)
-        
+
+        section = self._section(structure, section_name)
+        task_info = self._create_task_info(item_name, is_folder, section_name, subsection_name, folder_name)
+
         if subsection_name:
-            found = False
-            for item in structure[section_name]:
-                if item.get("type") == "subsection" and item.get("name") == subsection_name:
-                    item["tasks"].append(task_info)
-                    found = True
-                    break
-            
-            if not found:
-                structure[section_name].append({
-                    "type": "subsection",
-                    "name": subsection_name,
-                    "tasks": [task_info]
-                })
+            section.subsection(subsection_name).tasks.append(task_info)
         else:
-            structure[section_name].append(task_info)
+            section.tasks.append(task_info)
 
-    def _create_task_info(self, item_path: Path, section_name: str, subsection_name: str, folder_name: str) -> Dict[str, str]:
+    def _create_task_info(self, item_name: str, is_folder: bool, section_name: str, subsection_name: str,
+                          folder_name: str) -> Task:
         """Tworzy info o zadaniu"""
-        is_folder = item_path.is_dir()
-        
         if is_folder:
             title = subsection_name
-            relative_path = item_path.name
+            relative_path = item_name
         else:
-            title = item_path.stem
-            relative_path = item_path.name
+            title = Path(item_name).stem
+            relative_path = item_name
         
         url_parts = [self.BASE_URL, folder_name]
         
@@ -407,16 +2009,11 @@ class UpdateManager:
         
         description = self._extract_description(title)
         
-        return {
-            "title": title,
-            "description": description,
-            "url": url,
-            "type": "folder" if is_folder else "file"
-        }
+        return Task(title, description, url, "folder" if is_folder else "file")
 
     def _extract_description(self, name: str) -> str:
         """
-        Generuje opisowy tekst z cache'iem i zaawansowanymi regex
+        Generuje opisowy tekst z cache'iem (LRU) - reguły w DescriptionEngine
 
         Args:
             name: Nazwa do przetworzenia
@@ -425,63 +2022,33 @@ class UpdateManager:
             Opisowy tekst
         """
         # Sprawdzenie cache'u
-        if name in self.description_cache:
-            return self.description_cache[name]
-
-        # Mapowanie specjalnych nazw
-        special_mappings = {
-            "index": "Strona główna",
-            "readme": "README",
-            "template": "Szablon",
-            "example": "Przykład",
-            "sample": "Przykład",
-            "main": "Główny plik",
-            "start": "Start",
-            "begin": "Początek"
-        }
-
-        name_lower = name.lower()
-        if name_lower in special_mappings:
-            result = special_mappings[name_lower]
-            self.description_cache[name] = result
-            return result
-
-        # Zaawansowane regex patterns
-        desc = name.replace("-", " ").replace("_", " ").replace(".", " ")
-
-        # Wzorce numeryczne
-        patterns = [
-            (r'^zadanie(\d+)', r'Zadanie \1'),
-            (r'^zad(\d+)', r'Zadanie \1'),
-            (r'^ćwiczenie(\d+)', r'Ćwiczenie \1'),
-            (r'^cw(\d+)', r'Ćwiczenie \1'),
-            (r'^lab(\d+)', r'Laboratorium \1'),
-            (r'^projekt(\d+)', r'Projekt \1'),
-            (r'^test(\d+)', r'Test \1'),
-            (r'^quiz(\d+)', r'Quiz \1'),
-            (r'^lekcja(\d+)', r'Lekcja \1'),
-            (r'^rozdzial(\d+)', r'Rozdział \1'),
-            (r'^chapter(\d+)', r'Chapter \1'),
-        ]
-
-        for pattern, replacement in patterns:
-            desc = re.sub(pattern, replacement, desc, flags=re.IGNORECASE)
-
-        # Jeśli nic nie pasowało, użyj prostego podejścia
-        if desc == name.replace("-", " ").replace("_", " ").replace(".", " "):
-            desc = desc.strip()
-
-        # Title case - ale zachowaj użytkownika-friendly format
-        result = desc.title() if desc else "Brak opisu"
-
-        # Cache'uj wynik
-        self.description_cache[name] = result
-
+        self._load_descriptions()
+        result = self.description_cache.get(name)
+        if result is None:
+            result = self.description_cache[name] = DescriptionEngine.describe(name)
         return result
 
+    def _load_descriptions(self):
+        """Wczytuje zapisane opisy z cache store przy pierwszym użyciu"""
+        if self._descriptions_loaded:
+            return
+        self._descriptions_loaded = True
+        if self.cache_store is None:
+            return
+        try:
+            saved = self.cache_store.namespace('descriptions').get('lru') or []
+        except Exception as e:
+            self.log(f"⚠️  Błąd odczytu opisów z cache: {str(e)}")
+            return
+        dirty = self.description_cache.dirty
+        for name, desc in saved:
+            if name not in self.description_cache:
+                self.description_cache[name] = desc
+        self.description_cache.dirty = dirty
+
     def _generate_card_html(self, task: Dict[str, str]) -> str:
         """Generuje HTML karty"""
-        return f'''            <div class="col-sm-6 col-lg-4">
+        return f'''            <div class="col-sm-6 col-lg-4" data-sort-key="{_task_sort_key(task)}">
                 <div class="link-card text-white text-decoration-none d-block h-100 position-relative rounded-4 p-4">
                     <a class="stretched-link" href="{task['url']}" target="_blank"></a>
                     <h3 class="mb-3 fs-5 fw-semibold">{task['title']}</h3>
@@ -493,361 +2060,964 @@ class UpdateManager:
             </div>
 '''
 
-    def _get_existing_urls(self, container) -> Set[str]:
+    def _get_existing_urls(self, container, index: Optional[PageIndex] = None) -> Set[str]:
         """Pobiera istniejące URLe"""
-        urls = set()
-        for link in container.find_all('a', {'target': '_blank', 'class': 'stretched-link'}):
-            if link.get('href'):
-                urls.add(link['href'])
-        return urls
+        index = index or PageIndex(container)
+        return set(index.cards)
 
-    def _find_and_remove_card(self, container, url_to_remove: str) -> bool:
+    def _find_and_remove_card(self, container, url_to_remove: str, index: Optional[PageIndex] = None) -> bool:
         """
         ⭐ NOWE: Znajduje i usuwa kartę z danym URL'em
-        
+
         Args:
             container: BeautifulSoup container
             url_to_remove: URL karty do usunięcia
-            
+            index: Indeks strony (budowany jeśli nie podano)
+
         Returns:
             True jeśli usunięto, False jeśli nie znaleziono
         """
-        # Szukaj linku stretched-link z danym URL'em
-        for link in container.find_all('a', {'target': '_blank', 'class': 'stretched-link'}):
-            if link.get('href') == url_to_remove:
-                # Znaleźliśmy link - szukaj kolumny (col-*)
-                parent = link.parent
-                while parent:
-                    if 'col-sm-6' in parent.get('class', []):
-                        parent.decompose()  # Usuń element
-                        self.log(f"    🗑️  Usunięta karta: {url_to_remove}")
-                        return True
-                    parent = parent.parent
-        
+        index = index or PageIndex(container)
+        if index.remove_card(url_to_remove):
+            self.log(f"    🗑️  Usunięta karta: {url_to_remove}")
+            return True
         return False
 
-    def remove_obsolete_cards(self, container, valid_urls: Set[str]) -> int:
+    def remove_obsolete_cards(self, container, valid_urls: Set[str], index: Optional[PageIndex] = None) -> int:
         """
         ⭐ NOWE: Usuwa karty które nie istnieją w validnych URL'ach
-        
+
         Args:
             container: BeautifulSoup container
             valid_urls: Set prawidłowych URL'ów
-            
+            index: Indeks strony (budowany jeśli nie podano)
+
         Returns:
             Liczba usuniętych kart
         """
+        index = index or PageIndex(container)
         removed_count = 0
-        existing_urls = self._get_existing_urls(container)
-        
-        for url in existing_urls:
-            if url not in valid_urls:
-                if self._find_and_remove_card(container, url):
-                    removed_count += 1
-                    self.removed_urls.add(url)
-        
+
+        for url in [url for url in index.cards if url not in valid_urls]:
+            if self._find_and_remove_card(container, url, index):
+                removed_count += 1
+                self.removed_urls.add(url)
+
         return removed_count
 
-    def remove_empty_sections(self, container) -> int:
+    def remove_empty_sections(self, container, index: Optional[PageIndex] = None) -> int:
         """
         ⭐ NOWE: Usuwa puste sekcje (bez kart)
 
         Args:
             container: BeautifulSoup container
+            index: Indeks strony (budowany jeśli nie podano)
 
         Returns:
             Liczba usuniętych sekcji
         """
+        index = index or PageIndex(container)
         removed_count = 0
 
-        # Szukaj wszystkich div.mb-4 (sekcji)
-        sections = container.find_all('div', {'class': 'mb-4'})
-
-        for section in sections:
-            # Szukaj kart (col-sm-6) w sekcji
-            cards = section.find_all('div', class_=lambda x: x and 'col-sm-6' in x)
+        for section_name, count in list(index.section_counts.items()):
+            if count > 0:
+                continue
 
-            # Jeśli sekcja nie ma żadnych kart - usuń ją
-            if not cards:
-                # Wyciągnij nazwę sekcji PRZED usunięciem
-                h3 = section.find('h3', {'class': 'subsection-title'})
-                section_name = h3.get_text(strip=True) if h3 else "Nieznana"
+            # Sekcja to div.mb-4 zawierający nagłówek h3
+            section = index.sections[section_name].parent
+            if section is None or section is container or not _has_class(section, 'mb-4'):
+                continue
 
-                section.decompose()
-                removed_count += 1
-                self.log(f"    🗑️  Usunięta pusta sekcja: {section_name}")
+            index.touch(section)
+            section.decompose()
+            index.remove_section(section_name)
+            removed_count += 1
+            self.log(f"    🗑️  Usunięta pusta sekcja: {section_name}")
 
         return removed_count
 
-    def sort_cards_in_section(self, container) -> int:
+    def sort_cards_in_section(self, container, index: Optional[PageIndex] = None) -> int:
         """
         ⭐ NOWE: Sortuje karty wewnątrz każdej sekcji naturalnie (numerycznie)
 
         Args:
             container: BeautifulSoup container
+            index: Indeks strony (budowany jeśli nie podano)
 
         Returns:
             Liczba posortowanych sekcji
         """
+        index = index or PageIndex(container)
         sorted_count = 0
 
-        # Szukaj wszystkich div.row (kontenerów na karty)
-        row_containers = container.find_all('div', class_=lambda x: x and 'row' in x)
-
-        for row in row_containers:
+        for row in index.rows.values():
             # Pobierz wszystkie karty (col-sm-6) w tym rządku
-            cards = list(row.find_all('div', class_=lambda x: x and 'col-sm-6' in x, recursive=False))
+            cards = row.find_all('div', class_='col-sm-6', recursive=False)
 
             if len(cards) > 1:
-                # Posortuj karty na podstawie tytułu (h3.fs-5)
-                sorted_cards = sorted(cards, key=lambda card: natural_sort_key(
-                    card.find('h3', {'class': 'fs-5'}).get_text(strip=True)
-                    if card.find('h3', {'class': 'fs-5'}) else ""
-                ))
+                # Klucz zapisany w karcie (data-sort-key), dla starszych kart liczony z h3.fs-5
+                keys = []
+                for card in cards:
+                    key = card.get('data-sort-key')
+                    if key is None:
+                        title = card.find('h3', {'class': 'fs-5'})
+                        key = natural_sort_token(title.get_text(strip=True) if title else "")
+                    keys.append(key)
+
+                # Wiersz już posortowany - jedno liniowe przejście, bez sortowania
+                if all(a <= b for a, b in zip(keys, keys[1:])):
+                    continue
+
+                order = sorted(range(len(cards)), key=keys.__getitem__)
+
+                # Jeśli kolejność się zmieniła, zmień ją w miejscu
+                if order != list(range(len(cards))):
+                    index.touch(row)
+                    for card in cards:
+                        card.extract()
+
+                    for position in order:
+                        row.append(cards[position])
+
+                    sorted_count += 1
+
+        return sorted_count
+
+    def _desired_rows(self, structure: Dict[str, Section]) -> Dict[Tuple[str, Optional[str]], List[Task]]:
+        """
+        Docelowy układ strony: (sekcja, podsekcja) → zadania w kolejności wyświetlania
+
+        Sekcje w kolejności alfabetycznej, w sekcji najpierw wiersz zadań bez
+        podsekcji, potem podsekcje - wszystko sortowane naturalnie.
+        """
+        rows: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+
+        for section_name, section in sorted(structure_from_dict(structure).items()):
+            if section.tasks:
+                rows[(section_name, None)] = sorted(section.tasks, key=_task_sort_key)
+
+            subsections = [subsection for subsection in section.subsections.values() if subsection.tasks]
+            for subsection in sorted(subsections, key=_task_sort_key):
+                rows[(section_name, subsection.name)] = sorted(subsection.tasks, key=_task_sort_key)
+
+        return rows
+
+    def reconcile(self, container, soup, structure: Dict[str, Section],
+                  index: Optional[PageIndex] = None) -> ReconcileResult:
+        """
+        Uzgadnia content-wrapper ze strukturą folderów w jednym przejściu
+
+        Karty są kluczowane URL'em: brakujące są wstawiane, nieaktualne usuwane,
+        a istniejące przenoszone tylko gdy leżą w złym wierszu lub poza
+        najdłuższym już posortowanym podciągiem. Wiersz, który jest już zgodny
+        ze strukturą, kosztuje jedno porównanie list URL'i.
+
+        Args:
+            container: BeautifulSoup container (div.content-wrapper)
+            soup: Dokument (do tworzenia nowych tagów)
+            structure: Struktura z scan_directory
+            index: Indeks strony (budowany jeśli nie podano)
+
+        Returns:
+            ReconcileResult z listą wykonanych operacji
+        """
+        index = index or PageIndex(container)
+        result = ReconcileResult()
+        desired = self._desired_rows(structure)
+        valid_urls = {task.url for tasks in desired.values() for task in tasks}
+
+        # Duplikaty i nieaktualne karty
+        for card in index.duplicates:
+            index.touch(card)
+            card.decompose()
+            result.duplicates_removed += 1
+        index.duplicates = []
+
+        for url in [url for url in index.cards if url not in valid_urls]:
+            if index.remove_card(url):
+                result.removed.append(url)
+                self.removed_urls.add(url)
+                label = "Karta do usunięcia" if self.current_run.dry_run else "Usunięta karta"
+                self.log(f"    🗑️  {label}: {url}")
+
+        # Wstawienia i przeniesienia - wiersz po wierszu
+        for (section_name, subsection_name), tasks in desired.items():
+            try:
+                row = self._ensure_row(container, soup, index, section_name, subsection_name, result)
+                self._reconcile_row(row, tasks, index, section_name, subsection_name, result)
+            except Exception as e:
+                result.failed += 1
+                self.log(f"  ⚠️  Błąd dodawania karty: {str(e)}")
+
+        # Wiersze, podsekcje i sekcje których nie ma już w strukturze (są puste)
+        desired_sections = {section_name for section_name, _ in desired}
+        for key in [key for key in index.rows if key not in desired]:
+            row = index.rows.pop(key)
+            if row.find('div', class_='col-sm-6'):
+                continue
+            index.touch(row)
+            row.decompose()
+            result.rows_removed += 1
+
+        for key in [key for key in index.subsections if key not in desired and key not in index.rows]:
+            h4 = index.subsections.pop(key)
+            index.touch(h4)
+            h4.decompose()
+
+        for section_name in [name for name in index.sections if name not in desired_sections]:
+            if index.section_counts.get(section_name, 0) > 0:
+                continue
+            self._remove_section_block(container, index, section_name)
+            result.sections_removed.append(section_name)
+            label = "Pusta sekcja do usunięcia" if self.current_run.dry_run else "Usunięta pusta sekcja"
+            self.log(f"    🗑️  {label}: {section_name}")
+
+        result.cards_total = len(index.cards)
+        result.sections_total = len(index.sections)
+        return result
+
+    def _reconcile_row(self, row, tasks: List[Dict], index: PageIndex, section_name: str,
+                       subsection_name: Optional[str], result: ReconcileResult):
+        """Doprowadza jeden wiersz kart do kolejności z listy tasks"""
+        desired_urls = [task.url for task in tasks]
+        current = row.find_all('div', class_='col-sm-6', recursive=False)
+        current_urls = [PageIndex.card_url(card) for card in current]
+
+        if current_urls == desired_urls:
+            return
+
+        # Karty już w tym wierszu, w kolejności występowania → pozycje docelowe
+        target_position = {url: i for i, url in enumerate(desired_urls)}
+        kept = [url for url in current_urls if url in target_position]
+        stable_positions = _longest_increasing_subsequence([target_position[url] for url in kept])
+        stable = {kept[i] for i in stable_positions}
+
+        # Wszystkie nowe karty wiersza budowane naraz z szablonu
+        missing = [task for task in tasks if task.url not in index.cards]
+        new_cards = dict(zip((task.url for task in missing), self.card_template.build_many(missing)))
+
+        anchor = None
+        for task in tasks:
+            url = task.url
+            card = index.cards.get(url)
+
+            if card is not None and url in stable:
+                anchor = card
+                continue
+
+            if card is None:
+                card = new_cards[url]
+                index.add_card(card, section_name, subsection_name)
+                result.added.append(url)
+            else:
+                index.touch(card)
+                card.extract()
+                card['data-sort-key'] = _task_sort_key(task)
+                index.move_card(url, section_name, subsection_name)
+                result.moved.append(url)
+
+            if anchor is None:
+                row.insert(0, card)
+            else:
+                anchor.insert_after(card)
+            index.touch(card)
+            anchor = card
+
+    def _ensure_row(self, container, soup, index: PageIndex, section_name: str,
+                    subsection_name: Optional[str], result: Optional[ReconcileResult] = None):
+        """Zwraca wiersz kart dla (sekcja, podsekcja), tworząc brakujące elementy"""
+        key = (section_name, subsection_name)
+        if key in index.rows:
+            return index.rows[key]
+
+        section_h3 = index.sections.get(section_name)
+        if section_h3 is None:
+            section_h3 = self._create_section(container, soup, section_name, index)
+            if result is not None:
+                result.sections_added.append(section_name)
+
+        anchor = section_h3
+        if subsection_name:
+            anchor = index.subsections.get(key) or self._create_subsection(section_h3, soup, subsection_name, index)
+
+        div_row = soup.new_tag('div', attrs={'class': 'row g-3'})
+        anchor.insert_after(div_row)
+        index.add_row(section_name, subsection_name, div_row)
+        index.touch(div_row)
+        return div_row
+
+    def _remove_section_block(self, container, index: PageIndex, section_name: str):
+        """Usuwa sekcję z drzewa (cały div.mb-4 lub sam nagłówek gdy brak wrappera)"""
+        h3 = index.sections[section_name]
+        section = h3.parent
+        index.remove_section(section_name)
+        index.touch(h3)
+        if section is not None and section is not container and _has_class(section, 'mb-4'):
+            section.decompose()
+        else:
+            h3.decompose()
+
+    def update_html_file(self, html_path: Path, source_path: Path, folder_name: str) -> bool:
+        """
+        Aktualizuje plik HTML z obsługą błędów
+
+        Args:
+            html_path: Ścieżka do pliku HTML
+            source_path: Ścieżka do repozytorium źródłowego
+            folder_name: Nazwa kategorii
+
+        Returns:
+            True jeśli plik został zmieniony i zapisany, False jeśli bez zmian lub błąd
+        """
+        # Sygnatura strony zapisywana tylko po pomyślnym przetworzeniu (błąd = ponowna próba)
+        self.page_signatures.pop(self._cache_key(html_path), None)
+
+        try:
+            source_folder = source_path / folder_name
+
+            if not source_folder.exists() and not self._is_git_source(source_path):
+                self.log(f"  ⚠️  Folder nie istnieje: {source_folder}")
+                self._remember_page(html_path)
+                return False
+
+            # Skanuj zadania
+            structure = self.scan_directory(source_folder, folder_name)
+
+            if not structure:
+                self.log(f"  ⚠️  Brak zadań znalezionych w {folder_name}")
+                self._remember_page(html_path)
+                return False
+
+            if self.output_mode in ("stream", "render"):
+                if self.output_mode == "render":
+                    written = self._update_html_render(html_path, folder_name, structure)
+                else:
+                    written = self._update_html_stream(html_path, folder_name, structure)
+                if written is not None:
+                    return written
+                self.log("  ℹ️  Nie można wyodrębnić content-wrapper - przetwarzanie całej strony")
+
+            try:
+                # Otwórz plik HTML (surowe bajty - zapis porównujemy z oryginałem)
+                raw = html_path.read_bytes()
+                content = raw.decode('utf-8')
+                newline = "\r\n" if "\r\n" in content else "\n"
+            except UnicodeDecodeError as e:
+                self.log(f"  ❌ Błąd kodowania pliku HTML: {str(e)}")
+                return False
+            except Exception as e:
+                self.log(f"  ❌ Błąd odczytu HTML: {str(e)}")
+                return False
+
+            # Strona niezmieniona od ostatniego przetworzenia - indeks z cache, parsowane tylko zmieniane regiony
+            if self.output_mode == "minimal":
+                layout = self.page_layouts.get(self._cache_key(html_path))
+                if layout is not None and layout['hash'] == hashlib.sha256(raw).hexdigest():
+                    written = self._update_from_layout(html_path, folder_name, structure, raw, content, newline, layout)
+                    if written is not None:
+                        return written
+
+            try:
+                if self.output_mode == "prettify":
+                    content = content.replace("\r\n", "\n")
+                soup = BeautifulSoup(content, 'html.parser')
+            except Exception as e:
+                self.log(f"  ❌ Błąd odczytu HTML: {str(e)}")
+                return False
+
+            # Znajdź container
+            container = soup.find('div', {'class': 'content-wrapper'})
+            if not container:
+                self.log(f"  ⚠️  Nie znaleziono content-wrapper w {html_path.name}")
+                self.log(f"  💡 Wskazówka: Struktura HTML mogła się zmienić")
+                self._remember_page(html_path)
+                return False
+
+            # Regiony content-wrapper w oryginalnym tekście (przed modyfikacją drzewa)
+            regions = None
+            if self.output_mode != "prettify":
+                regions = ContentRegions.locate(content)
+                if regions is not None and not regions.bind(container):
+                    regions = None
+                if regions is None:
+                    self.log("  ℹ️  Nie można zlokalizować regionów - zapis przez prettify()")
+
+            # Zbuduj indeks strony raz i uzgodnij stronę ze strukturą w jednym przejściu
+            index = PageIndex(container)
+            result = self.reconcile(container, soup, structure, index)
+            self.seen_urls.update(index.cards)
+
+            if result.moved:
+                self.log(f"  📊 Przeniesiono/posortowano {len(result.moved)} kart")
+
+            if regions is not None:
+                new_content = regions.splice(container, index.touched, newline)
+            else:
+                new_content = soup.prettify()
+                if newline != "\n":
+                    new_content = new_content.replace("\n", newline)
+            new_raw = new_content.encode('utf-8')
+
+            # Pomiń zapis gdy wynik jest identyczny z plikiem na dysku
+            if hashlib.sha256(new_raw).digest() == hashlib.sha256(raw).digest():
+                self.log(f"  ✓ Bez zmian: {html_path.name}")
+                self._remember_page(html_path)
+                self._remember_layout(html_path, new_raw, new_content, container, index)
+                return False
+
+            written = self._store_page(html_path, folder_name, result, lambda: (new_raw,), raw)
+            if written:
+                self._remember_layout(html_path, new_raw, new_content, container, index)
+            return written
+
+        except Exception as e:
+            self.log(f"  ❌ Nieoczekiwany błąd: {str(e)}")
+            return False
+
+    # CACHE INDEKSU STRONY
+    def _update_from_layout(self, html_path: Path, folder_name: str, structure: Dict[str, Section], raw: bytes,
+                            content: str, newline: str, layout: Dict[str, Any]) -> Optional[bool]:
+        """
+        Aktualizacja strony z indeksem z cache (treść pliku ma zapisany hash)
+
+        Sekcje zgodne ze strukturą nie są parsowane - ich regiony trafiają do
+        częściowego kontenera jako komentarze <!--region:N--> i przy składaniu są
+        kopiowane z oryginału. BeautifulSoup parsuje tylko regiony sekcji do zmiany,
+        a wynik jest taki sam jak przy parsowaniu całej strony.
+
+        Returns:
+            Wynik jak update_html_file lub None gdy trzeba sparsować całą stronę
+        """
+        sections = layout['sections']
+        wanted: Dict[str, Dict[Optional[str], List[str]]] = {}
+        for (section_name, subsection_name), tasks in self._desired_rows(structure).items():
+            wanted.setdefault(section_name, {})[subsection_name] = [task.url for task in tasks]
+
+        # Sekcje do zmiany (razem z sekcjami dzielącymi z nimi regiony)
+        affected = {name for name, entry in sections.items() if not self._section_matches(entry, wanted.get(name))}
+        owners: Dict[int, List[str]] = {}
+        for name, entry in sections.items():
+            for position in entry['regions']:
+                owners.setdefault(position, []).append(name)
+        pending = list(affected)
+        while pending:
+            for position in sections[pending.pop()]['regions']:
+                for name in owners[position]:
+                    if name not in affected:
+                        affected.add(name)
+                        pending.append(name)
+
+        unaffected = {name: entry for name, entry in sections.items() if name not in affected}
+        unaffected_urls = [url for entry in unaffected.values() for _, urls in entry['rows'] for url in urls]
+        self.seen_urls.update(unaffected_urls)
+
+        if not affected and all(name in sections for name in wanted):
+            self.log(f"  ✓ Bez zmian: {html_path.name}")
+            self._remember_page(html_path)
+            return False
+
+        regions = ContentRegions.from_cache(content, layout['regions'])
+        materialized = {position for name in affected for position in sections[name]['regions']}
+        parts = [content[regions.wrapper_start:regions.inner_start]]
+        for region in regions.regions:
+            if region.position in materialized:
+                parts.append(content[region.start:region.end])
+            else:
+                parts.append(f"<!--region:{region.position}-->")
+        parts.append("</div>")
+
+        soup = BeautifulSoup("".join(parts), 'html.parser')
+        container = soup.find('div', {'class': 'content-wrapper'})
+        if container is None or not regions.bind(container, placeholders=True):
+            return None
+
+        index = PageIndex(container)
+        result = self.reconcile(container, soup, {name: section for name, section in structure.items()
+                                                  if name not in unaffected}, index)
+        self.seen_urls.update(index.cards)
+        result.cards_total += len(unaffected_urls)
+        result.sections_total += len(unaffected)
+
+        if result.moved:
+            self.log(f"  📊 Przeniesiono/posortowano {len(result.moved)} kart")
+
+        new_content = regions.splice(container, index.touched, newline, indent_level=layout['indent'])
+        new_raw = new_content.encode('utf-8')
+        if new_raw == raw:
+            self.log(f"  ✓ Bez zmian: {html_path.name}")
+            self._remember_page(html_path)
+            return False
+
+        written = self._store_page(html_path, folder_name, result, lambda: (new_raw,), raw)
+        if written:
+            self._remember_layout(html_path, new_raw, new_content, container, index, layout['indent'], unaffected)
+        return written
+
+    @staticmethod
+    def _section_matches(entry: Dict[str, Any], rows: Optional[Dict[Optional[str], List[str]]]) -> bool:
+        """Czy sekcja strony (z cache) ma dokładnie docelowe wiersze - uzgodnienie niczego by w niej nie zmieniło"""
+        if rows is None:
+            return False
+        return ({subsection: urls for subsection, urls in entry['rows']} == rows
+                and set(entry['subsections']) == {subsection for subsection in rows if subsection})
+
+    def _remember_layout(self, html_path: Path, data: bytes, text: str, container, index: PageIndex,
+                         indent: Optional[int] = None, unaffected: Optional[Dict[str, Dict]] = None):
+        """
+        Zapisuje indeks strony po przetworzeniu (kluczowany hashem zapisanej treści)
+
+        Args:
+            data, text: Treść strony na dysku (bajty i tekst)
+            container, index: Kontener i indeks odpowiadające tej treści
+            indent: Poziom wcięcia dzieci kontenera (domyślnie z drzewa)
+            unaffected: Sekcje z cache nieobecne w kontenerze częściowym
+        """
+        if self.output_mode != "minimal":
+            return
+        key = self._cache_key(html_path)
+        regions = ContentRegions.locate(text)
+        layout = None
+        if regions is not None and regions.bind(container, placeholders=unaffected is not None):
+            layout = self._page_layout(index, regions, unaffected or {})
+        if layout is None:
+            # Nietypowy układ (duplikaty, karty poza sekcjami) - strona zawsze parsowana w całości
+            self.page_layouts.pop(key, None)
+            return
+        self.page_layouts[key] = {
+            'hash': hashlib.sha256(data).hexdigest(),
+            'indent': indent if indent is not None else sum(1 for _ in container.parents),
+            'regions': regions.to_cache(),
+            'sections': layout,
+        }
+
+    @staticmethod
+    def _page_layout(index: PageIndex, regions: ContentRegions,
+                     unaffected: Dict[str, Dict]) -> Optional[Dict[str, Dict]]:
+        """
+        Sekcje strony: regiony (pozycje dzieci kontenera), wiersze z URL'ami kart i podsekcje
+
+        Returns:
+            Słownik sekcji lub None gdy stronę trzeba zawsze parsować w całości
+        """
+        if index.duplicates:
+            return None
+        located: Dict[Tuple[Optional[str], Optional[str]], List[str]] = {}
+        for url, location in index.locations.items():
+            located.setdefault(location, []).append(url)
+        if (None, None) in located:
+            return None
+
+        positions = {id(region.node): region.position for region in regions.regions}
+
+        def region_of(node) -> Optional[int]:
+            while node is not None and node.parent is not index.container:
+                node = node.parent
+            return positions.get(id(node))
+
+        layout: Dict[str, Dict] = {}
+        for name, h3 in index.sections.items():
+            layout[name] = {'regions': {region_of(h3)}, 'rows': [], 'subsections': []}
+        for (section_name, subsection_name), h4 in index.subsections.items():
+            layout[section_name]['regions'].add(region_of(h4))
+            layout[section_name]['subsections'].append(subsection_name)
+        for key, row in index.rows.items():
+            urls = [PageIndex.card_url(card) for card in row.find_all('div', class_='col-sm-6', recursive=False)]
+            # Karty tej lokalizacji poza pierwszym wierszem - uzgodnienie by je przeniosło
+            if sorted(urls, key=str) != sorted(located.get(key, []), key=str):
+                return None
+            layout[key[0]]['regions'].add(region_of(row))
+            layout[key[0]]['rows'].append([key[1], urls])
+        for entry in layout.values():
+            if None in entry['regions']:
+                return None
+            entry['regions'] = sorted(entry['regions'])
+
+        # Sekcje niezmaterializowane: pozycje ich regionów po zapisie (komentarze <!--region:N-->)
+        moved = {int(region.node[len("region:"):]): region.position for region in regions.regions
+                 if isinstance(region.node, Comment) and region.node.startswith("region:")}
+        for name, entry in unaffected.items():
+            layout[name] = dict(entry, regions=[moved[position] for position in entry['regions']])
+        return layout
+
+    def _update_html_stream(self, html_path: Path, folder_name: str, structure: Dict[str, Section]) -> Optional[bool]:
+        """
+        Tryb stream: drzewo BeautifulSoup tylko dla div.content-wrapper
+
+        Kontener lokalizowany jest strumieniowo (WrapperLocator), a reszta pliku
+        kopiowana bajt w bajt przy zapisie - pamięć zależy od rozmiaru kontenera,
+        nie całej strony.
+
+        Returns:
+            Wynik jak update_html_file lub None gdy kontenera nie da się wyodrębnić
+            (wtedy strona przetwarzana jest w całości)
+        """
+        located = WrapperLocator.locate(html_path)
+        if located is None:
+            return None
+        start, end, depth = located.start, located.end, located.depth
+
+        try:
+            raw_region = self._read_region(html_path, start, end)
+            region = raw_region.decode('utf-8')
+        except UnicodeDecodeError as e:
+            self.log(f"  ❌ Błąd kodowania pliku HTML: {str(e)}")
+            return False
+        newline = "\r\n" if "\r\n" in region else "\n"
+
+        soup = BeautifulSoup(region, 'html.parser')
+        container = soup.find('div', {'class': 'content-wrapper'})
+        regions = ContentRegions.locate(region)
+        if container is None or regions is None or not regions.bind(container):
+            return None
 
-                # Jeśli kolejność się zmieniła, zmień ją w miejscu
-                if [id(c) for c in cards] != [id(c) for c in sorted_cards]:
-                    # Usuń wszystkie karty z rządu
-                    for card in cards:
-                        card.extract()
+        index = PageIndex(container)
+        result = self.reconcile(container, soup, structure, index)
+        self.seen_urls.update(index.cards)
 
-                    # Dodaj je ponownie w posortowanej kolejności
-                    for card in sorted_cards:
-                        row.append(card)
+        if result.moved:
+            self.log(f"  📊 Przeniesiono/posortowano {len(result.moved)} kart")
 
-                    sorted_count += 1
+        # Wcięcie jak w całym dokumencie: przodkowie kontenera + obiekt BeautifulSoup
+        new_region = regions.splice(container, index.touched, newline, indent_level=depth + 1).encode('utf-8')
+        if new_region == raw_region:
+            self.log(f"  ✓ Bez zmian: {html_path.name}")
+            self._remember_page(html_path)
+            return False
 
-        return sorted_count
+        region_end = start + len(raw_region)
+        return self._store_page(html_path, folder_name, result,
+                                lambda: self._spliced_chunks(html_path, start, region_end, new_region))
 
-    def update_html_file(self, html_path: Path, source_path: Path, folder_name: str) -> bool:
+    def _update_html_render(self, html_path: Path, folder_name: str, structure: Dict[str, Section]) -> Optional[bool]:
         """
-        Aktualizuje plik HTML z obsługą błędów
+        Tryb render: content-wrapper generowany od nowa ze struktury (PageRenderer)
 
-        Args:
-            html_path: Ścieżka do pliku HTML
-            source_path: Ścieżka do repozytorium źródłowego
-            folder_name: Nazwa kategorii
+        Dla stron, które są w całości funkcją drzewa źródłowego - cała zawartość
+        kontenera (także dodana ręcznie) jest zastępowana. Istniejące karty nie są
+        parsowane: nowy region porównywany jest bajtowo ze starym, a dopiero gdy się
+        różni, stary region jest skanowany (CardScanner) dla podsumowania zmian.
 
         Returns:
-            True jeśli powodzenie, False jeśli błąd
+            Wynik jak update_html_file lub None gdy kontenera nie da się wyodrębnić
         """
-        try:
-            source_folder = source_path / folder_name
-
-            if not source_folder.exists():
-                self.log(f"  ⚠️  Folder nie istnieje: {source_folder}")
-                return False
-
-            # Skanuj zadania
-            structure = self.scan_directory(source_folder, folder_name)
-
-            if not structure:
-                self.log(f"  ⚠️  Brak zadań znalezionych w {folder_name}")
-                return False
+        located = WrapperLocator.locate(html_path)
+        if located is None:
+            return None
 
-            # Utwórz backup
-            backup_path = self.create_backup(html_path)
+        raw_region = self._read_region(html_path, located.start, located.end)
+        newline = "\r\n" if b"\r\n" in raw_region else "\n"
+        desired = self._desired_rows(structure)
+        self.seen_urls.update(task.url for tasks in desired.values() for task in tasks)
+
+        body = self.page_renderer.render(desired, located.depth + 1) + " " * located.depth + "</div>"
+        if newline != "\n":
+            body = body.replace("\n", newline)
+        new_region = located.start_tag + newline.encode() + body.encode('utf-8')
+        if new_region == raw_region:
+            self.log(f"  ✓ Bez zmian: {html_path.name}")
+            self._remember_page(html_path)
+            return False
 
-            try:
-                # Otwórz plik HTML
-                with open(html_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        try:
+            result = self._render_diff(CardScanner.scan(raw_region.decode('utf-8')), desired)
+        except UnicodeDecodeError as e:
+            self.log(f"  ❌ Błąd kodowania pliku HTML: {str(e)}")
+            return False
 
-                soup = BeautifulSoup(content, 'html.parser')
-            except UnicodeDecodeError as e:
-                self.log(f"  ❌ Błąd kodowania pliku HTML: {str(e)}")
-                return False
-            except Exception as e:
-                self.log(f"  ❌ Błąd odczytu HTML: {str(e)}")
-                return False
+        region_end = located.start + len(raw_region)
+        return self._store_page(html_path, folder_name, result,
+                                lambda: self._spliced_chunks(html_path, located.start, region_end, new_region))
+
+    def _render_diff(self, scanned: CardScanner, desired: Dict[Tuple[str, Optional[str]], List[Task]]) -> ReconcileResult:
+        """ReconcileResult dla regeneracji - różnica kart i sekcji starego regionu względem struktury"""
+        result = ReconcileResult()
+        old_location: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        old_rows: Dict[Tuple[Optional[str], Optional[str]], List[str]] = {}
+        for url, location in scanned.cards:
+            if url in old_location:
+                result.duplicates_removed += 1
+                continue
+            old_location[url] = location
+            old_rows.setdefault(location, []).append(url)
+
+        valid_urls = set()
+        for key, tasks in desired.items():
+            urls = [task.url for task in tasks]
+            valid_urls.update(urls)
+            result.added.extend(url for url in urls if url not in old_location)
+
+            # Karty tego wiersza poza najdłuższym zachowanym podciągiem lub z innego miejsca
+            target_position = {url: i for i, url in enumerate(urls)}
+            kept = [url for url in old_rows.get(key, []) if url in target_position]
+            stable = {kept[i] for i in _longest_increasing_subsequence([target_position[url] for url in kept])}
+            result.moved.extend(url for url in urls if url in old_location and url not in stable)
+
+        for url in old_location:
+            if url not in valid_urls:
+                result.removed.append(url)
+                self.removed_urls.add(url)
+                self.log(f"    🗑️  Usunięta karta: {url}")
+
+        desired_sections = list(dict.fromkeys(section_name for section_name, _ in desired))
+        result.sections_added = [name for name in desired_sections if name not in scanned.sections]
+        result.sections_removed = [name for name in scanned.sections if name not in desired_sections]
+        result.cards_total = len(valid_urls)
+        result.sections_total = len(desired_sections)
+        return result
 
-            # Znajdź container
-            container = soup.find('div', {'class': 'content-wrapper'})
-            if not container:
-                self.log(f"  ⚠️  Nie znaleziono content-wrapper w {html_path.name}")
-                self.log(f"  💡 Wskazówka: Struktura HTML mogła się zmienić")
-                return False
+    @staticmethod
+    def _read_region(path: Path, start: int, end: int) -> bytes:
+        """Bajty od start do końca tagu zamykającego zaczynającego się na offsecie end"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+            while True:
+                piece = f.read(64)
+                closing = piece.find(b'>')
+                if closing != -1 or not piece:
+                    return data + (piece[:closing + 1] if closing != -1 else piece)
+                data += piece
+
+    @staticmethod
+    def _spliced_chunks(path: Path, start: int, end: int, region: bytes) -> Iterator[bytes]:
+        """Treść pliku z bajtami [start, end) zastąpionymi przez region (czytana kawałkami)"""
+        with open(path, 'rb') as f:
+            remaining = start
+            while remaining > 0:
+                chunk = f.read(min(WrapperLocator.CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+            yield region
+            f.seek(end)
+            yield from iter(lambda: f.read(WrapperLocator.CHUNK_SIZE), b'')
+
+    def _store_page(self, html_path: Path, folder_name: str, result: ReconcileResult,
+                    chunks: Callable[[], Iterable[bytes]], raw: Optional[bytes] = None) -> bool:
+        """
+        Walidacja, backup i atomowy zapis nowej treści strony
 
-            # Pobierz istniejące URLe
-            self.seen_urls = self._get_existing_urls(container)
+        Args:
+            chunks: Zwraca nową treść jako kawałki bajtów (wywoływane raz na przejście)
+            raw: Dotychczasowa treść, jeśli już wczytana (inaczej backup czyta plik strumieniowo)
+        """
+        # Walidacja wyniku przed zapisem (jedno przejście parsera, bez ponownego czytania pliku)
+        if self.validation != "off":
+            errors = html_validator.validate_chunks(codecs.iterdecode(chunks(), 'utf-8'), self._validation_host())
+            if errors:
+                self._log_validation_errors(html_path, errors)
+                if self.validation == "strict":
+                    self.log(f"  ❌ Pominięto zapis (walidacja): {html_path.name}")
+                    return False
+
+        # Utwórz backup i zapisz plik atomowo
+        self.create_backup(html_path, raw)
+        try:
+            self._write_atomic(html_path, chunks())
+        except OSError as e:
+            self.log(f"  ❌ Błąd zapisu HTML: {str(e)}")
+            return False
+        self._remember_page(html_path)
+        self.current_run.page_diffs[html_path.name] = result
 
-            # Zbierz wszystkie prawidłowe URL'e
-            all_valid_urls: Set[str] = set()
+        self.log(f"  ✓ +{len(result.added)} -{len(result.removed)} ~{len(result.sections_removed)} {html_path.name}")
+        if result.failed > 0:
+            self.log(f"  ⚠️  {result.failed} błędów przy dodawaniu kart")
 
-            # Dodaj nowe karty
-            added_count = 0
-            failed_additions = 0
+        self.changes_summary["modified"].append(html_path.name)
+        self.changes_summary["folders_updated"].append(folder_name)
 
-            for section_name, items in sorted(structure.items()):
-                if not items:
-                    continue
+        return True
 
-                # Posortuj items wewnątrz sekcji - zmienia się tu na natural sort
-                sorted_items = sorted(items, key=lambda x: natural_sort_key(
-                    x.get("name", x.get("title", ""))
-                ))
+    # INCREMENTAL: GIT DIFF
+    @staticmethod
+    def _page_signature(html_path: Path) -> Optional[List[int]]:
+        """Sygnatura strony [size, mtime_ns] - wykrywa zmiany bez czytania pliku"""
+        try:
+            stat = html_path.stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
 
-                for item in sorted_items:
-                    try:
-                        if item.get("type") == "subsection":
-                            # Posortuj tasks wewnątrz subsection
-                            sorted_tasks = sorted(item.get("tasks", []), key=lambda t: natural_sort_key(t['title']))
-                            for task in sorted_tasks:
-                                all_valid_urls.add(task['url'])
-                                if task['url'] not in self.seen_urls:
-                                    if self._add_card_to_html(container, soup, section_name, item.get("name"), task):
-                                        added_count += 1
-                                        self.seen_urls.add(task['url'])
-                        else:
-                            all_valid_urls.add(item['url'])
-                            if item['url'] not in self.seen_urls:
-                                if self._add_card_to_html(container, soup, section_name, None, item):
-                                    added_count += 1
-                                    self.seen_urls.add(item['url'])
-                    except Exception as e:
-                        failed_additions += 1
-                        self.log(f"  ⚠️  Błąd dodawania karty: {str(e)}")
+    def _remember_page(self, html_path: Path):
+        """Zapamiętuje sygnaturę strony po przetworzeniu"""
+        signature = self._page_signature(html_path)
+        if signature is not None:
+            self.page_signatures[self._cache_key(html_path)] = signature
 
-            # Usuń obsolete karty
-            removed_count = self.remove_obsolete_cards(container, all_valid_urls)
+    def _page_unchanged(self, html_path: Path) -> bool:
+        """Czy strona jest nietknięta od ostatniego przetworzenia"""
+        known = self.page_signatures.get(self._cache_key(html_path))
+        return known is not None and list(known) == self._page_signature(html_path)
 
-            # Usuń puste sekcje
-            empty_sections_removed = self.remove_empty_sections(container)
+    def _git_head(self, repo_path: Path) -> Optional[str]:
+        """Aktualny commit HEAD repozytorium (None gdy brak)"""
+        result = self._git(repo_path, "rev-parse", "HEAD")
+        return result.stdout.strip() if result.returncode == 0 else None
 
-            # Posortuj karty wewnątrz każdej sekcji
-            sorted_count = self.sort_cards_in_section(container)
-            if sorted_count > 0:
-                self.log(f"  📊 Posortowano karty w {sorted_count} sekcjach")
+    def _detect_source_changes(self, source_path: Path, target_path: Path) -> Optional[str]:
+        """
+        Wyznacza foldery niezmienione od ostatnio przetworzonego commita źródła
 
-            # Zapisz plik z obsługą błędów
-            try:
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(str(soup.prettify()))
-            except IOError as e:
-                self.log(f"  ❌ Błąd zapisu HTML: {str(e)}")
-                if backup_path:
-                    self.log(f"  💡 Przywracam backup z: {backup_path}")
-                    shutil.copy2(backup_path, html_path)
-                return False
+        Mapuje `git diff --name-only <ostatni>..HEAD` na foldery z ALLOWED_FOLDERS; pozostałe
+        trafiają do clean_folders aktywnego runu (bez hashowania i - przy nietkniętej stronie -
+        bez parsowania HTML). Bez zapisanego commita wszystkie foldery są sprawdzane.
+        Przy strukturze z drzewa roboczego (skaner "fs") foldery nie są oznaczane - niezcommitowane
+        zmiany nie są widoczne w git diff, więc folder jest zawsze hashowany.
 
-            # Sprawdź czy były jakiekolwiek zmiany (NOWE v4.0)
-            has_changes = added_count > 0 or removed_count > 0 or empty_sections_removed > 0
+        Returns:
+            Aktualny HEAD źródła lub None gdy nie da się go odczytać
+        """
+        head = self._git_head(source_path)
+        if head is None:
+            return None
 
-            self.log(f"  ✓ +{added_count} -{removed_count} ~{empty_sections_removed} {html_path.name}")
-            if failed_additions > 0:
-                self.log(f"  ⚠️  {failed_additions} błędów przy dodawaniu kart")
+        last = self.source_commits.get(f"{self._cache_key(source_path)}|{self._cache_key(target_path)}")
+        if last is None:
+            self.log("  ℹ️  Brak zapisanego commita źródła - pełne sprawdzenie folderów")
+            return head
+
+        changed: Set[str] = set()
+        if last != head:
+            result = self._git(source_path, "diff", "--name-only", "--no-renames", "-z", last, head)
+            if result.returncode != 0:
+                self.log(f"  ⚠️  git diff {last[:7]}..{head[:7]} nieudany - pełne sprawdzenie folderów")
+                return head
+            changed = {name.split('/', 1)[0] for name in result.stdout.split('\0') if name}
+
+        affected = sorted(self.ALLOWED_FOLDERS & changed, key=natural_sort_key)
+        self.log(f"  🔎 Zmiany od {last[:7]}: {', '.join(affected) if affected else 'brak'}")
+        if not self._is_git_source(source_path):
+            return head
+        self.current_run.clean_folders.update(
+            self._cache_key(source_path / folder) for folder in self.ALLOWED_FOLDERS - changed
+        )
+        return head
 
-            self.changes_summary["modified"].append(html_path.name)
-            self.changes_summary["folders_updated"].append(folder_name)
+    def _can_skip_page(self, html_path: Path, source_path: Path, folder_name: str) -> bool:
+        """Folder bez zmian w git i strona nietknięta - nie ma czego parsować"""
+        return (self._cache_key(source_path / folder_name) in self.current_run.clean_folders
+                and self._page_unchanged(html_path))
 
-            # Zwróć True tylko jeśli były zmiany (NOWE v4.0)
-            return has_changes
+    def _record_source_commit(self, source_path: Path, target_path: Path, head: Optional[str],
+                              html_files: List[Path]) -> bool:
+        """
+        Zapisuje przetworzony commit źródła, jeśli wszystkie strony przetworzono bez błędów
 
-        except Exception as e:
-            self.log(f"  ❌ Nieoczekiwany błąd: {str(e)}")
+        Returns:
+            True jeśli zapisany commit się zmienił
+        """
+        key = f"{self._cache_key(source_path)}|{self._cache_key(target_path)}"
+        if head is None or self.source_commits.get(key) == head:
             return False
+        if not all(self._page_unchanged(html_file) for html_file in html_files):
+            return False
+        self.source_commits[key] = head
+        return True
 
+    def _write_atomic(self, path: Path, data: Union[bytes, Iterable[bytes]]):
+        """
+        Zapisuje plik atomowo (plik tymczasowy + rename)
 
-    def _add_card_to_html(self, container, soup, section_name: str, subsection_name: Optional[str], task: Dict) -> bool:
-        """Dodaje kartę do istniejącej sekcji"""
-        section_h3 = None
-        for h3 in container.find_all('h3', {'class': 'subsection-title'}):
-            if h3.get_text(strip=True) == section_name:
-                section_h3 = h3
-                break
-        
-        if not section_h3:
-            return self._create_and_add_section(container, soup, section_name, subsection_name, task)
-        
-        if subsection_name:
-            h4 = None
-            current = section_h3.find_next_sibling()
-            while current:
-                if current.name == 'h3':
-                    break
-                if current.name == 'h4' and 'subsection-subtitle' in current.get('class', []):
-                    if current.get_text(strip=True) == subsection_name:
-                        h4 = current
-                        break
-                current = current.find_next_sibling()
-            
-            if h4:
-                div_row = h4.find_next_sibling('div', {'class': 'row'})
-                if div_row:
-                    card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-                    div_row.append(card_html)
-                    return True
-                else:
-                    div_row = soup.new_tag('div', attrs={'class': 'row g-3'})
-                    card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-                    div_row.append(card_html)
-                    h4.insert_after(div_row)
-                    return True
-            else:
-                return self._create_subsection_and_add_card(section_h3, soup, subsection_name, task)
-        else:
-            current = section_h3.find_next_sibling()
-            div_row = None
-            while current:
-                if current.name == 'h3':
-                    break
-                if current.name == 'div' and 'row' in current.get('class', []):
-                    div_row = current
-                    break
-                current = current.find_next_sibling()
-            
-            if div_row:
-                card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-                div_row.append(card_html)
-                return True
-            else:
-                div_row = soup.new_tag('div', attrs={'class': 'row g-3'})
-                card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-                div_row.append(card_html)
-                section_h3.insert_after(div_row)
-                return True
+        Strona nigdy nie zostaje zapisana w połowie - albo stara, albo nowa wersja.
+        Treść może być podana kawałkami (np. czytanymi z oryginału w trybie stream).
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in ((data,) if isinstance(data, bytes) else data):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            if path.exists():
+                shutil.copymode(path, tmp_name)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def _add_card_to_html(self, container, soup, section_name: str, subsection_name: Optional[str], task: Dict,
+                          index: Optional[PageIndex] = None) -> bool:
+        """Dodaje kartę do istniejącej sekcji (tworzy sekcję/podsekcję jeśli brak)"""
+        index = index or PageIndex(container)
+        div_row = self._ensure_row(container, soup, index, section_name, subsection_name)
+        card = self.card_template.build(task)
+        div_row.append(card)
+        index.add_card(card, section_name, subsection_name)
+        index.touch(card)
+        return True
 
-    def _create_and_add_section(self, container, soup, section_name: str, subsection_name: Optional[str], task: Dict) -> bool:
-        """Tworzy nową sekcję"""
+    @property
+    def card_template(self) -> CardTemplate:
+        """Szablon karty (parsowany przy pierwszym użyciu)"""
+        if self._card_template is None:
+            self._card_template = CardTemplate(self._generate_card_html(CardTemplate.PLACEHOLDER_TASK))
+        return self._card_template
+
+    @property
+    def page_renderer(self) -> PageRenderer:
+        """Renderer trybu render (węzły budowane raz tym samym kodem co przy aktualizacji przyrostowej)"""
+        if self._page_renderer is None:
+            soup = BeautifulSoup('<div class="content-wrapper"></div>', 'html.parser')
+            index = PageIndex(soup.div)
+            row = self._ensure_row(soup.div, soup, index, "__SECTION__", "__SUBSECTION__")
+            self._page_renderer = PageRenderer(index.sections["__SECTION__"].parent,
+                                               index.subsections[("__SECTION__", "__SUBSECTION__")], row,
+                                               self.card_template.build(CardTemplate.PLACEHOLDER_TASK))
+        return self._page_renderer
+
+    def _create_section(self, container, soup, section_name: str, index: PageIndex):
+        """Tworzy nową sekcję na końcu kontenera i zwraca jej nagłówek h3"""
         section_div = soup.new_tag('div', attrs={'class': 'mb-4'})
-        
+
         h3 = soup.new_tag('h3', attrs={'class': 'subsection-title fs-4 fw-semibold mb-3'})
         h3.string = section_name
         section_div.append(h3)
-        
-        if subsection_name:
-            h4 = soup.new_tag('h4', attrs={'class': 'subsection-subtitle fs-5 mt-4 mb-3 ms-3'})
-            h4.string = subsection_name
-            section_div.append(h4)
-        
-        div_row = soup.new_tag('div', attrs={'class': 'row g-3'})
-        card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-        div_row.append(card_html)
-        section_div.append(div_row)
-        
+
         container.append(section_div)
-        return True
+        index.add_section(section_name, h3)
+        return h3
 
-    def _create_subsection_and_add_card(self, section_h3, soup, subsection_name: str, task: Dict) -> bool:
-        """Tworzy nową podsekcję"""
+    def _create_subsection(self, section_h3, soup, subsection_name: str, index: PageIndex):
+        """Tworzy nową podsekcję na końcu sekcji i zwraca jej nagłówek h4"""
         h4 = soup.new_tag('h4', attrs={'class': 'subsection-subtitle fs-5 mt-4 mb-3 ms-3'})
         h4.string = subsection_name
-        section_h3.insert_after(h4)
-        
-        div_row = soup.new_tag('div', attrs={'class': 'row g-3'})
-        card_html = BeautifulSoup(self._generate_card_html(task), 'html.parser')
-        div_row.append(card_html)
-        h4.insert_after(div_row)
-        
-        return True
 
-    def run_full_update(self, source_path: Path, target_path: Path) -> bool:
+        # Nowa podsekcja ląduje na końcu sekcji (za wierszem kart bez podsekcji)
+        section_div = section_h3.parent
+        if section_div is not None and _has_class(section_div, 'mb-4'):
+            section_div.append(h4)
+        else:
+            last, following = section_h3, section_h3.find_next_sibling()
+            while following is not None and following.name != 'h3':
+                last, following = following, following.find_next_sibling()
+            last.insert_after(h4)
+
+        index.add_subsection(section_h3.get_text(strip=True), subsection_name, h4)
+        index.touch(h4)
+        return h4
+
+    def run_full_update(self, source_path: Path, target_path: Path, run: Optional[UpdateRun] = None) -> bool:
         """
         Pełna aktualizacja HTML
-        
+
+        Args:
+            source_path: Repozytorium źródłowe
+            target_path: Repozytorium strony
+            run: Run do wypełnienia (domyślnie nowy - patrz start_run)
+
         Returns:
             True jeśli powodzenie, False jeśli błąd
         """
+        with self.activate(run or self.start_run(source_path, target_path)):
+            return self._full_update(source_path, target_path)
+
+    def _full_update(self, source_path: Path, target_path: Path) -> bool:
+        """Pełna aktualizacja HTML w aktywnym runie"""
         self.log("🔄 Rozpoczynanie aktualizacji...")
         
         # Walidacja repozytoriów
@@ -858,20 +3028,29 @@ class UpdateManager:
         
         # Pull repozytoriów
         self.log("\n📤 Aktualizowanie repozytoriów:")
-        self.pull_repo(source_path)
-        self.pull_repo(target_path)
+        self.pull_repos([source_path, target_path])
+        head = self._detect_source_changes(source_path, target_path)
         
         # Aktualizacja plików HTML
         self.log("\n📝 Aktualizowanie plików HTML:")
         changes_found = False  # Tracker zmian (NOWE v4.0)
+        html_files, processed = [], False
 
         for folder in sorted(self.ALLOWED_FOLDERS, key=natural_sort_key):
             html_file = target_path / f"{folder}.html"
             if html_file.exists():
+                html_files.append(html_file)
+                if self._can_skip_page(html_file, source_path, folder):
+                    self.log(f"  ⚡ Bez zmian (git): {html_file.name}")
+                    continue
+                processed = True
                 if self.update_html_file(html_file, source_path, folder):
                     changes_found = True  # Oznacz że były zmiany
             else:
                 self.log(f"  ⚠️  Plik nie istnieje: {html_file.name}")
+
+        if self._record_source_commit(source_path, target_path, head, html_files) or processed:
+            self._save_structure_cache()
         
         # Sprawdź czy były jakiekolwiek zmiany (NOWE v4.0)
         if not changes_found:
@@ -881,41 +3060,217 @@ class UpdateManager:
             return True
 
         # Commit i push (tylko jeśli były zmiany)
+        self.log("\n📊 Zmiany:")
+        self.log(self.get_diff_report())
         self.log("\n📤 Commitowanie i push:")
         self.commit_and_push(target_path)
         
         self.log("\n✅ Aktualizacja zakończona!")
         return True
 
+    # TRYB OBSERWACJI (WATCH)
+    def run_folders_update(self, source_path: Path, target_path: Path, folders: Iterable[str],
+                           run: Optional[UpdateRun] = None) -> bool:
+        """
+        Przyrostowa aktualizacja tylko wskazanych folderów (np. zmienionych wg obserwatora)
+
+        Struktura skanowana jest z dysku (working tree - zapisane, ale niezcommitowane
+        ćwiczenia też trafiają na stronę), źródło nie jest pullowane, a zapisany commit
+        źródła się nie zmienia. Strony pozostałych folderów nie są nawet czytane.
+
+        Args:
+            source_path: Repozytorium źródłowe
+            target_path: Repozytorium strony
+            folders: Zmienione foldery (spoza ALLOWED_FOLDERS są pomijane)
+            run: Run do wypełnienia (domyślnie nowy - patrz start_run)
+
+        Returns:
+            True jeśli powodzenie, False jeśli błąd
+        """
+        run = run or self.start_run(source_path, target_path)
+        run.scanner = "fs"
+        with self.activate(run):
+            folders = sorted(self.ALLOWED_FOLDERS & set(folders), key=natural_sort_key)
+            self.log(f"🔄 Aktualizacja zmienionych folderów: {', '.join(folders) if folders else 'brak'}")
+            if not folders:
+                return True
+            if not self.validate_git_repo(target_path):
+                self.log("❌ Błąd: Repozytorium strony nie jest dostępne!")
+                return False
+            self.pull_repo(target_path)
+
+            changes_found = processed = False
+            for folder in folders:
+                html_file = target_path / f"{folder}.html"
+                if not html_file.exists():
+                    self.log(f"  ⚠️  Plik nie istnieje: {html_file.name}")
+                    continue
+                processed = True
+                if self.update_html_file(html_file, source_path, folder):
+                    changes_found = True
+            if processed:
+                self._save_structure_cache()
+
+            if not changes_found:
+                self.log("ℹ️  Strony aktualne - zmiany nie wpływają na karty")
+                return True
+
+            self.log("\n📊 Zmiany:")
+            self.log(self.get_diff_report())
+            self.commit_and_push(target_path)
+            return True
+
+    def create_watcher(self, source_path: Path, target_path: Path, **options) -> SourceWatcher:
+        """
+        Obserwator ALLOWED_FOLDERS źródła, który po serii zmian aktualizuje zmienione foldery
+
+        Args:
+            source_path: Repozytorium źródłowe
+            target_path: Repozytorium strony
+            **options: Ustawienia SourceWatcher (debounce, max_delay, poll_interval, backend)
+
+        Returns:
+            SourceWatcher (nieuruchomiony - start()/stop())
+        """
+        return SourceWatcher(
+            source_path, self.ALLOWED_FOLDERS,
+            lambda folders: self.run_folders_update(source_path, target_path, folders),
+            log_callback=self.log, **options
+        )
+
+    # PLAN (DRY-RUN)
+    def plan_update(self, source_path: Path, target_path: Path) -> Dict[str, Any]:
+        """
+        Plan aktualizacji bez wykonywania jej (dry-run)
+
+        Dla każdej strony: karty do dodania/usunięcia/przeniesienia oraz sekcje do
+        utworzenia/usunięcia. Nie zapisuje plików, nie tworzy backupów, nie wykonuje
+        pull/commit/push - strony są tylko czytane, a uzgodnienie odbywa się w pamięci.
+
+        Args:
+            source_path: Repozytorium źródłowe
+            target_path: Repozytorium strony
+
+        Returns:
+            Dict z listą planów stron ('pages') i sumami ('totals')
+        """
+        started = datetime.now()
+        run = UpdateRun(source_path=source_path, target_path=target_path, dry_run=True)
+        with self.activate(run):
+            self.log("🔎 Plan aktualizacji (dry-run)...")
+            self._detect_source_changes(source_path, target_path)
+
+            pages = []
+            for folder in sorted(self.ALLOWED_FOLDERS, key=natural_sort_key):
+                html_file = target_path / f"{folder}.html"
+                if not html_file.exists():
+                    continue
+                if self._can_skip_page(html_file, source_path, folder):
+                    result, error = ReconcileResult(), None
+                else:
+                    result = self.plan_page(html_file, source_path, folder)
+                    error = None if result is not None else "Nie można zaplanować strony"
+                pages.append({"page": html_file.name, "folder": folder, "error": error,
+                              **asdict(result or ReconcileResult())})
+
+        totals = {name: sum(len(page[name]) for page in pages) for name in self.DIFF_FIELDS}
+        self.log(f"🔎 Plan: +{totals['added']} -{totals['removed']} ~{totals['moved']} kart, "
+                 f"sekcje +{totals['sections_added']} -{totals['sections_removed']}")
+        return {
+            "source": str(source_path),
+            "target": str(target_path),
+            "pages": pages,
+            "totals": totals,
+            "duration": (datetime.now() - started).total_seconds(),
+        }
+
+    def plan_request(self, source_repo: Optional[str] = None, target_repo: Optional[str] = None) -> Dict[str, Any]:
+        """
+        plan_update z parametrami żądania API (plan_callback dla APIManager i WebDashboard)
+
+        Args:
+            source_repo: Ścieżka repozytorium źródłowego
+            target_repo: Ścieżka repozytorium strony
+        """
+        if not source_repo or not target_repo:
+            raise ValueError("Wymagane source_repo i target_repo")
+        return self.plan_update(Path(source_repo), Path(target_repo))
+
+    def plan_page(self, html_path: Path, source_path: Path, folder_name: str) -> Optional[ReconcileResult]:
+        """
+        Plan zmian jednej strony - uzgodnienie na kopii w pamięci, bez zapisu
+
+        Returns:
+            ReconcileResult z operacjami, które wykonałaby aktualizacja, lub None gdy
+            strony nie da się odczytać
+        """
+        structure = self.scan_directory(source_path / folder_name, folder_name)
+
+        try:
+            soup = BeautifulSoup(html_path.read_bytes().decode('utf-8'), 'html.parser')
+        except (OSError, UnicodeDecodeError) as e:
+            self.log(f"  ❌ Błąd odczytu HTML: {str(e)}")
+            return None
+
+        container = soup.find('div', {'class': 'content-wrapper'})
+        if not container:
+            self.log(f"  ⚠️  Nie znaleziono content-wrapper w {html_path.name}")
+            return None
+
+        # Pusta struktura - aktualizacja pomija stronę
+        if not structure:
+            return ReconcileResult()
+        return self.reconcile(container, soup, structure)
+
     def commit_and_push(self, repo_path: Path) -> bool:
         """Commitowanie i push zmian"""
-        # v4.1: Async commit w osobnym wątku
-        thread = threading.Thread(target=self._commit_and_push_async, args=(repo_path,), daemon=True)
-        thread.start()
+        # v4.1: Async commit na pętli GitRunner (z aktywnym runem - wiadomość commita z jego podsumowania)
+        future = self.git_runner.submit(self._commit_and_push_async(repo_path))
+        ctx = contextvars.copy_context()
+        future.add_done_callback(lambda done: ctx.run(self._log_commit_error, done))
         return True
 
-    def _commit_and_push_async(self, repo_path: Path):
-        """v4.1: Asynchroniczny commit i push"""
-        with self.git_lock:
-            subprocess.run(
-                ["git", "-C", str(repo_path), "add", "-A"],
-                capture_output=True
-            )
+    def _log_commit_error(self, future: Future):
+        """Loguje wyjątek zadania commit/push (inaczej zostałby tylko w porzuconym Future)"""
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            self.log(f"  ❌ Błąd commit/push: {error!r}")
+            self.logger.error("Błąd commit/push", exc_info=error)
 
-            result = subprocess.run(
-                ["git", "-C", str(repo_path), "status", "--porcelain"],
-                capture_output=True,
-                text=True
-            )
+    def _written_pages(self, repo_path: Path) -> List[str]:
+        """Strony zapisane w aktywnym runie (pathspec względem repozytorium strony)"""
+        return [name for name in sorted(self.current_run.page_diffs) if (repo_path / name).is_file()]
 
-            if result.stdout.strip():
+    async def _commit_and_push_async(self, repo_path: Path):
+        """
+        v4.1: Asynchroniczny commit i push
+
+        Indeks aktualizowany jest tylko dla stron zapisanych w runie (pathspec), bez
+        `git add -A` i `git status` po całym drzewie roboczym - duże assety repozytorium
+        strony nie są skanowane, a inne zmiany w repozytorium nie trafiają do commita.
+        """
+        pages = self._written_pages(repo_path)
+        if not pages:
+            self.log("  ℹ️  Brak zmian do commitowania")
+            return
+
+        async with self.git_runner.repo_lock(repo_path):
+            config = await self._git_index_config(repo_path)
+            result = await self._git_async(repo_path, "add", "--", *pages, config=config)
+            if result.returncode != 0:
+                self.log(f"  ⚠️  git add failed: {result.stderr}")
+                return
+
+            # Kod 1 = są zmiany w indeksie dla tych stron
+            result = await self._git_async(repo_path, "diff", "--cached", "--quiet", "--", *pages, config=config)
+            if result.returncode > 1:
+                self.log(f"  ⚠️  git diff failed: {result.stderr}")
+                return
+
+            if result.returncode == 1:
                 commit_msg = self._generate_commit_message()
 
-                result = subprocess.run(
-                    ["git", "-C", str(repo_path), "commit", "-m", commit_msg],
-                    capture_output=True,
-                    text=True
-                )
+                result = await self._git_async(repo_path, "commit", "-m", commit_msg, "--", *pages, config=config)
 
                 if result.returncode == 0:
                     self.log(f"  ✓ Commit: {commit_msg.split(chr(10))[0]}")
@@ -923,11 +3278,7 @@ class UpdateManager:
                     self.log(f"  ⚠️  Commit failed: {result.stderr}")
                     return
 
-                result = subprocess.run(
-                    ["git", "-C", str(repo_path), "push"],
-                    capture_output=True,
-                    text=True
-                )
+                result = await self._git_async(repo_path, "push")
 
                 if result.returncode == 0:
                     self.log(f"  ✓ Push ukończony")
@@ -937,35 +3288,64 @@ class UpdateManager:
                 self.log(f"  ℹ️  Brak zmian do commitowania")
 
     # v4.1: DIFF & COMPARISON
-    def _get_html_diff(self, old_content: str, new_content: str) -> Dict[str, Any]:
+    DIFF_FIELDS = ("added", "removed", "moved", "sections_added", "sections_removed")
+
+    def get_diff(self, run: Optional[UpdateRun] = None) -> Dict[str, Any]:
         """
-        v4.1: Porównaj stary i nowy HTML - zwróć statystykę zmian
+        Strukturalny diff runu - operacje zapisane podczas uzgadniania stron
+
+        Args:
+            run: Run (domyślnie aktywny)
 
         Returns:
-            Dict z informacjami o zmianach
+            Dict z operacjami per strona ('pages'), połączonymi listami URL'i/sekcji
+            i ich licznikami ('totals')
         """
-        try:
-            old_soup = BeautifulSoup(old_content, 'html.parser')
-            new_soup = BeautifulSoup(new_content, 'html.parser')
-
-            # Sprawdź liczę kart
-            old_cards = len(old_soup.find_all('div', class_=lambda x: x and 'col-sm-6' in x))
-            new_cards = len(new_soup.find_all('div', class_=lambda x: x and 'col-sm-6' in x))
-
-            # Sprawdź sekcji
-            old_sections = len(old_soup.find_all('h3', {'class': 'subsection-title'}))
-            new_sections = len(new_soup.find_all('h3', {'class': 'subsection-title'}))
-
-            return {
-                'cards_added': max(0, new_cards - old_cards),
-                'cards_removed': max(0, old_cards - new_cards),
-                'sections_added': max(0, new_sections - old_sections),
-                'sections_removed': max(0, old_sections - new_sections),
-                'cards_total': new_cards,
-                'sections_total': new_sections
-            }
-        except Exception:
+        run = run or self.current_run
+        pages = {name: asdict(result) for name, result in run.page_diffs.items()}
+        diff = {name: [item for page in pages.values() for item in page[name]] for name in self.DIFF_FIELDS}
+        diff["pages"] = pages
+        diff["totals"] = {name: len(diff[name]) for name in self.DIFF_FIELDS}
+        return diff
+
+    def get_update_summary(self, run: Optional[UpdateRun] = None) -> Dict[str, Any]:
+        """
+        Podsumowanie runu dla powiadomień i historii w bazie (z zapisanego diffu, bez parsowania)
+
+        Returns:
+            Dict z added_count/modified_count/removed_count, folderami, czasem i pełnym diffem
+        """
+        run = run or self.current_run
+        diff = self.get_diff(run)
+        return {
+            'added_count': diff['totals']['added'],
+            'modified_count': diff['totals']['moved'],
+            'removed_count': diff['totals']['removed'],
+            'folders': sorted(set(run.changes_summary['folders_updated'])),
+            'duration': round((datetime.now() - run.started_at).total_seconds(), 1),
+            'cache_used': bool(run.clean_folders),
+            'diff': diff,
+        }
+
+    def _get_html_diff(self, file_name: str, run: Optional[UpdateRun] = None) -> Dict[str, Any]:
+        """
+        v4.1: Statystyka zmian strony - z wyniku uzgodnienia zapisanego w runie
+
+        Returns:
+            Dict z informacjami o zmianach ({'error': True} gdy strona nie była zmieniana)
+        """
+        result = (run or self.current_run).page_diffs.get(file_name)
+        if result is None:
             return {'error': True}
+        return {
+            'cards_added': len(result.added),
+            'cards_removed': len(result.removed),
+            'cards_moved': len(result.moved),
+            'sections_added': len(result.sections_added),
+            'sections_removed': len(result.sections_removed),
+            'cards_total': result.cards_total,
+            'sections_total': result.sections_total
+        }
 
     def _generate_diff_report(self, diff_stats: Dict[str, Any], file_name: str) -> str:
         """v4.1: Generuj raport zmian"""
@@ -977,11 +3357,21 @@ class UpdateManager:
             report += f" +{diff_stats['cards_added']}🃏"
         if diff_stats['cards_removed'] > 0:
             report += f" -{diff_stats['cards_removed']}🗑️"
+        if diff_stats.get('cards_moved', 0) > 0:
+            report += f" ~{diff_stats['cards_moved']}🔀"
         if diff_stats['sections_added'] > 0:
             report += f" +{diff_stats['sections_added']}📁"
+        if diff_stats.get('sections_removed', 0) > 0:
+            report += f" -{diff_stats['sections_removed']}📁"
 
         return report
 
+    def get_diff_report(self, run: Optional[UpdateRun] = None) -> str:
+        """Raport zmian wszystkich stron runu (jedna linia na stronę)"""
+        run = run or self.current_run
+        return "\n".join(self._generate_diff_report(self._get_html_diff(name, run), name)
+                         for name in sorted(run.page_diffs))
+
     # v4.1: BATCH PROCESSING
     def _process_html_file_batch(self, args: Tuple[Path, Path, str]) -> Tuple[str, bool]:
         """
@@ -1002,13 +3392,84 @@ class UpdateManager:
             self.log(f"  ❌ Błąd batch: {folder_name}: {str(e)}")
             return (folder_name, False)
 
-    def run_full_update_batch(self, source_path: Path, target_path: Path) -> bool:
+    def _page_job(self, html_path: Path, source_path: Path, folder_name: str) -> Dict[str, Any]:
+        """Zadanie dla procesu roboczego - ustawienia i ciepły cache dla jednej strony"""
+        return {
+            'html_path': html_path,
+            'source_path': source_path,
+            'folder_name': folder_name,
+            'backup_enabled': self.backup_enabled,
+            'output_mode': self.output_mode,
+            'scanner': self.current_run.scanner or self.scanner,
+            'validation': self.validation,
+            'structure': self.structure_cache.get(self._cache_key(source_path / folder_name)),
+            'folder_hash': self.file_hashes.get(self._cache_key(source_path / folder_name)),
+            'fingerprint': self.folder_fingerprints.get(self._cache_key(source_path / folder_name)),
+            'folder_clean': self._cache_key(source_path / folder_name) in self.current_run.clean_folders,
+            'page_layout': self.page_layouts.get(self._cache_key(html_path)),
+            'descriptions': self._descriptions_snapshot(),
+        }
+
+    def _descriptions_snapshot(self) -> Dict[str, str]:
+        """Kopia opisów dla procesu roboczego (żeby nie liczył ich od nowa)"""
+        self._load_descriptions()
+        return dict(self.description_cache.items())
+
+    def _merge_page_result(self, result: Dict[str, Any]) -> bool:
+        """Scala wynik procesu roboczego ze stanem manager'a (logi, podsumowanie, cache)"""
+        for message in result['log']:
+            self.log(message)
+
+        for key, values in result['changes_summary'].items():
+            self.changes_summary.setdefault(key, []).extend(values)
+        self.removed_urls.update(result['removed_urls'])
+        self.seen_urls.update(result['seen_urls'])
+        for name, diff in result['page_diffs'].items():
+            self.current_run.page_diffs[name] = ReconcileResult(**diff)
+
+        key = result['cache_key']
+        if result['structure'] is not None:
+            self.structure_cache[key] = result['structure']
+        if result['folder_hash'] is not None:
+            self.file_hashes[key] = result['folder_hash']
+        if result['fingerprint'] is not None:
+            self.folder_fingerprints[key] = result['fingerprint']
+        self.description_cache.update(result['descriptions'])
+
+        page_key = result['page_key']
+        if result['page_signature'] is not None:
+            self.page_signatures[page_key] = result['page_signature']
+        else:
+            self.page_signatures.pop(page_key, None)
+        if result['page_layout'] is not None:
+            if result['page_layout'] != self.page_layouts.get(page_key):
+                self.page_layouts[page_key] = result['page_layout']
+        else:
+            self.page_layouts.pop(page_key, None)
+
+        return result['has_changes']
+
+    def run_full_update_batch(self, source_path: Path, target_path: Path, use_processes: bool = False,
+                              run: Optional[UpdateRun] = None) -> bool:
         """
         v4.1: Pełna aktualizacja HTML z batch processing (3x szybciej!)
 
+        Args:
+            source_path: Repozytorium źródłowe
+            target_path: Repozytorium strony
+            use_processes: Przetwarzaj strony w osobnych procesach (parsowanie HTML
+                nie jest wtedy ograniczone przez GIL)
+
+            run: Run do wypełnienia (domyślnie nowy - patrz start_run)
+
         Returns:
             True jeśli powodzenie, False jeśli błąd
         """
+        with self.activate(run or self.start_run(source_path, target_path)):
+            return self._full_update_batch(source_path, target_path, use_processes)
+
+    def _full_update_batch(self, source_path: Path, target_path: Path, use_processes: bool) -> bool:
+        """Pełna aktualizacja HTML z batch processing w aktywnym runie"""
         self.log("🔄 Rozpoczynanie aktualizacji (v4.1 - batch)...")
 
         # Walidacja repozytoriów
@@ -1019,14 +3480,9 @@ class UpdateManager:
 
         # v4.1: Pull repozytoriów asynchronicznie
         self.log("\n📤 Aktualizowanie repozytoriów:")
-        threads = []
-        for path in [source_path, target_path]:
-            t = threading.Thread(target=self.pull_repo, args=(path,), daemon=True)
-            threads.append(t)
-            t.start()
+        self.pull_repos([source_path, target_path])
 
-        for t in threads:
-            t.join()
+        head = self._detect_source_changes(source_path, target_path)
 
         # v4.1: Batch processing plików HTML
         self.log("\n📝 Aktualizowanie plików HTML (batch mode):")
@@ -1041,22 +3497,51 @@ class UpdateManager:
             self.log("  ⚠️  Brak plików HTML do przetworzenia")
             return False
 
+        pages = [args[0] for args in html_files]
+        pending = []
+        for args in html_files:
+            if self._can_skip_page(*args):
+                self.log(f"  ⚡ Bez zmian (git): {args[0].name}")
+            else:
+                pending.append(args)
+        html_files = pending
+
         changes_found = False
+        workers = min(self.max_workers, len(html_files))
+
+        if use_processes and html_files:
+            # Każdy proces obsługuje jedną stronę z własnym stanem, wyniki scalane tutaj
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_update_page_in_process, self._page_job(*args)): args[2]
+                    for args in html_files
+                }
+
+                for future in as_completed(futures):
+                    try:
+                        if self._merge_page_result(future.result()):
+                            changes_found = True
+                    except Exception as e:
+                        self.log(f"  ❌ Błąd batch: {futures[future]}: {str(e)}")
+        elif html_files:
+            # v4.1: ThreadPoolExecutor dla batch processing
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._in_context(self._process_html_file_batch, args)): args[2]
+                    for args in html_files
+                }
+
+                for future in as_completed(futures):
+                    try:
+                        folder_name, has_changes = future.result()
+                        if has_changes:
+                            changes_found = True
+                    except Exception as e:
+                        self.log(f"  ❌ Błąd: {str(e)}")
 
-        # v4.1: ThreadPoolExecutor dla batch processing
-        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
-            futures = {
-                executor.submit(self._process_html_file_batch, args): args[2]
-                for args in html_files
-            }
-
-            for future in as_completed(futures):
-                try:
-                    folder_name, has_changes = future.result()
-                    if has_changes:
-                        changes_found = True
-                except Exception as e:
-                    self.log(f"  ❌ Błąd: {str(e)}")
+        # v4.1: Zapisz cache (razem z przetworzonym commitem źródła)
+        if self._record_source_commit(source_path, target_path, head, pages) or html_files:
+            self._save_structure_cache()
 
         # Sprawdzenie zmian
         if not changes_found:
@@ -1066,12 +3551,11 @@ class UpdateManager:
             return True
 
         # v4.1: Asynchroniczny commit i push
+        self.log("\n📊 Zmiany:")
+        self.log(self.get_diff_report())
         self.log("\n📤 Commitowanie i push (async):")
         self.commit_and_push(target_path)
 
-        # v4.1: Zapisz cache
-        self._save_structure_cache()
-
         self.log("\n✅ Aktualizacja zakończona (v4.1)!")
         return True
 
@@ -1089,6 +3573,9 @@ class UpdateManager:
         if summary["folders_updated"]:
             lines.append(f"\n📁 Foldery: {', '.join(sorted(set(summary['folders_updated'])))}")
         
+        totals = self.get_diff()["totals"]
+        if totals["added"]:
+            lines.append(f"\n➕ Dodane: {totals['added']} kart")
         if self.removed_urls:
             lines.append(f"\n🗑️  Usunięte: {len(self.removed_urls)} kart")
         
@@ -1098,81 +3585,45 @@ class UpdateManager:
         """
         ⭐ NOWE: Waliduje czy HTML jest poprawny
 
+        Plik czytany jest strumieniowo i sprawdzany w jednym przejściu parsera
+        (html_validator), bez budowania drzewa BeautifulSoup.
+
         Args:
             html_path: Ścieżka do pliku HTML
 
         Returns:
             Tuple (is_valid, errors) - czy HTML jest poprawny i lista błędów
         """
-        errors = []
-
         try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # Sprawdzenie 1: Czy istnieje content-wrapper
-            if not soup.find('div', {'class': 'content-wrapper'}):
-                errors.append("Brak div.content-wrapper")
-
-            # Sprawdzenie 2: Czy wszystkie col-* są w row
-            cols = soup.find_all('div', class_=lambda x: x and 'col-' in x)
-            for col in cols:
-                parent = col.parent
-                grandparent = parent.parent if parent else None
-                has_row_parent = (
-                    parent and 'row' in parent.get('class', []) or
-                    grandparent and 'row' in grandparent.get('class', [])
-                )
-                if not has_row_parent:
-                    errors.append(f"Element col-* nie jest w row: {col.get('class')}")
-                    break
-
-            # Sprawdzenie 3: Czy nie ma podwójnych slashów w URL
-            links = soup.find_all('a', href=True)
-            for link in links:
-                url = link.get('href', '')
-                if 'prakt.dziadu.dev' in url and '//' in url.split('prakt.dziadu.dev')[1]:
-                    errors.append(f"Podwójny slash w URL: {url}")
-
-            # Sprawdzenie 4: Czy spacje są enkodowane w URL
-            for link in links:
-                url = link.get('href', '')
-                if ' ' in url:
-                    errors.append(f"Nieenkodowana spacja w URL: {url}")
-
-            # Sprawdzenie 5: Czy wszystkie tagi HTML są zamknięte
-            if content.count('<') != content.count('>'):
-                errors.append("Niezamknięte tagi HTML")
-
-            # Sprawdzenie 6: Czy nie ma duplikatów kart
-            stretched_links = soup.find_all('a', {'target': '_blank', 'class': 'stretched-link'})
-            urls = [link.get('href') for link in stretched_links]
-            if len(urls) != len(set(urls)):
-                duplicates = [url for url in urls if urls.count(url) > 1]
-                errors.append(f"Zduplikowane karty: {len(set(duplicates))} unikalnych duplikatów")
-
-            is_valid = len(errors) == 0
-            if is_valid:
-                self.log(f"  ✅ HTML poprawny: {html_path.name}")
-            else:
-                self.log(f"  ⚠️ Błędy w HTML ({len(errors)}): {html_path.name}")
-                for error in errors:
-                    self.log(f"     - {error}")
-
-            return is_valid, errors
-
+            errors = html_validator.validate_file(html_path, self._validation_host())
         except Exception as e:
             error_msg = f"Błąd walidacji HTML: {str(e)}"
-            errors.append(error_msg)
             self.log(f"  ❌ {error_msg}")
-            return False, errors
+            return False, [error_msg]
+
+        if errors:
+            self._log_validation_errors(html_path, errors)
+        else:
+            self.log(f"  ✅ HTML poprawny: {html_path.name}")
+        return not errors, errors
+
+    def _validation_host(self) -> str:
+        """Domena stron (z BASE_URL) dla sprawdzenia podwójnych slashów"""
+        return self.BASE_URL.split("://", 1)[-1].rstrip("/")
+
+    def _log_validation_errors(self, html_path: Path, errors: List[str]):
+        self.log(f"  ⚠️ Błędy w HTML ({len(errors)}): {html_path.name}")
+        for error in errors:
+            self.log(f"     - {error}")
 
     def cleanup_old_backups(self, days: int = 30) -> int:
         """
         ⭐ NOWE: Usuwa stare backupy starsze niż N dni
 
+        Backupy w magazynie podlegają też retencji (BACKUP_KEEP_LAST/DAILY/WEEKLY);
+        nieużywane obiekty są usuwane z dysku. Usuwane są również pliki
+        *_backup_*.html ze starszych wersji.
+
         Args:
             days: Liczba dni - backupy starsze będą usunięte
 
@@ -1180,26 +3631,34 @@ class UpdateManager:
             Liczba usuniętych backupów
         """
         from datetime import timedelta
-        backup_dir = Path("backups")
+        backup_dir = Path(self.BACKUP_DIR)
         if not backup_dir.exists():
             return 0
 
-        removed_count = 0
-        now = datetime.now()
-        cutoff_time = now - timedelta(days=days)
+        cutoff_time = datetime.now() - timedelta(days=days)
 
         try:
-            for backup_file in backup_dir.glob("*.backup"):
-                # Sprawdź czas modyfikacji pliku
-                file_mtime = datetime.fromtimestamp(backup_file.stat().st_mtime)
+            pruned = self.backup_store.prune(
+                keep_last=self.BACKUP_KEEP_LAST,
+                keep_daily=self.BACKUP_KEEP_DAILY,
+                keep_weekly=self.BACKUP_KEEP_WEEKLY,
+                max_age_days=days,
+            )
+            removed_count = pruned["entries"]
+            reclaimed = pruned["bytes"]
 
-                if file_mtime < cutoff_time:
+            for backup_file in backup_dir.glob("*_backup_*.html"):
+                # Sprawdź czas modyfikacji pliku
+                stat = backup_file.stat()
+                if datetime.fromtimestamp(stat.st_mtime) < cutoff_time:
                     backup_file.unlink()
                     self.log(f"  🗑️  Usunięty stary backup: {backup_file.name}")
                     removed_count += 1
+                    reclaimed += stat.st_size
 
             if removed_count > 0:
-                self.log(f"  ✓ Usunięto {removed_count} starych backupów (>{days} dni)")
+                self.log(f"  ✓ Usunięto {removed_count} starych backupów (>{days} dni, "
+                         f"odzyskano {reclaimed / 1024:.1f} KB)")
 
             return removed_count
 
@@ -1222,31 +3681,141 @@ class UpdateManager:
         Returns:
             Dict z mediaami ppogrupowanymi po typach
         """
-        media_extensions = {
-            'images': ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp'],
-            'videos': ['.mp4', '.avi', '.mov', '.mkv', '.webm'],
-            'documents': ['.pdf', '.doc', '.docx', '.xls', '.xlsx'],
-            'archives': ['.zip', '.rar', '.7z', '.tar', '.gz']
-        }
+        media = self._media_index(source_path, folder_name)
 
-        media_files = {media_type: [] for media_type in media_extensions}
+        # Loguj wyniki
+        for media_type, info in media.items():
+            if info['files']:
+                self.log(f"  📎 {media_type.capitalize()}: {len(set(info['files']))} plików")
 
-        try:
-            folder_path = source_path / folder_name
+        return {media_type: list(info['files']) for media_type, info in media.items()}
+
+    def get_media_stats(self, source_path: Path, folder_name: str) -> Dict[str, Dict[str, int]]:
+        """
+        Liczba i łączny rozmiar mediów per typ (z cache, gdy folder się nie zmienił)
+
+        Returns:
+            Dict {typ: {'count': liczba plików, 'size': bajty}}
+        """
+        return {
+            media_type: {'count': info['count'], 'size': info['size']}
+            for media_type, info in self._media_index(source_path, folder_name).items()
+        }
 
-            for ext_type, extensions in media_extensions.items():
-                for ext in extensions:
-                    files = list(folder_path.rglob(f'*{ext}'))
-                    files += list(folder_path.rglob(f'*{ext.upper()}'))
-                    media_files[ext_type].extend([f.name for f in files])
+    def _classify_media(self, files: List[Tuple[str, int]]) -> Dict[str, Dict[str, Any]]:
+        """Jedno przejście po plikach - klasyfikacja po rozszerzeniu (bez względu na wielkość liter)"""
+        media = {media_type: {'files': [], 'count': 0, 'size': 0} for media_type in self.MEDIA_EXTENSIONS}
+        for name, size in files:
+            media_type = self.MEDIA_TYPES_BY_SUFFIX.get(os.path.splitext(name)[1].lower())
+            if media_type is not None:
+                info = media[media_type]
+                info['files'].append(name)
+                info['count'] += 1
+                info['size'] += size
+        return media
+
+    def _media_index(self, source_path: Path, folder_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Media folderu - jedno przejście (git ls-tree -l lub walker), cache po odcisku folderu
 
-            # Loguj wyniki
-            for media_type, files in media_files.items():
-                if files:
-                    self.log(f"  📎 {media_type.capitalize()}: {len(set(files))} plików")
+        Odcisk to sha drzewa folderu w HEAD (obejmuje całą głębokość), więc przy niezmienionym
+        folderze wynik jest gotowy bez chodzenia po plikach. Bez repozytorium Git odciskiem jest
+        digest SourceTree z dysku (ten sam co "fs:" hash w scan_directory) - przy niezmienionym
+        digeście walker nie przechodzi wszystkich plików folderu.
+        """
+        folder_path = source_path / folder_name
+        key = self._cache_key(folder_path)
 
-            return media_files
+        try:
+            fingerprint = None
+            if self._is_git_source(source_path):
+                result = self._git(source_path, "rev-parse", f"HEAD:{folder_name}")
+                if result.returncode == 0:
+                    fingerprint = f"git:{result.stdout.strip()}"
+            if not fingerprint and folder_path.is_dir():
+                fingerprint = f"fs:{SourceTree.from_filesystem(folder_path).digest}"
+
+            cached = self.media_cache.get(key)
+            if fingerprint and cached and cached['fingerprint'] == fingerprint:
+                return cached['media']
+
+            files: List[Tuple[str, int]] = []
+            from_git = bool(fingerprint and fingerprint.startswith("git:")
+                            and self.scan_git_tree(source_path, folder_name, blobs=files) is not None)
+            if not from_git:
+                if fingerprint and fingerprint.startswith("git:"):
+                    fingerprint = None  # ls-tree nie powiodło się - odczyt z dysku bez zapisu w cache
+                if folder_path.is_dir():
+                    files = [(entry.name, entry.size) for entry in fs_walker.walk_files(folder_path)]
+
+            media = self._classify_media(files)
+            if fingerprint:
+                self.media_cache[key] = {'fingerprint': fingerprint, 'media': media}
+            return media
 
         except Exception as e:
             self.log(f"  ⚠️  Błąd skanowania mediów: {str(e)}")
-            return media_files
+            return self._classify_media([])
+
+
+def _update_page_in_process(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aktualizuje jedną stronę w procesie roboczym ProcessPoolExecutor
+
+    Manager w procesie ma izolowany stan (seen_urls, changes_summary, bufor logów),
+    a wynik wraca do procesu głównego jako słownik do scalenia.
+
+    Args:
+        job: Słownik z UpdateManager._page_job
+
+    Returns:
+        Słownik z wynikiem, logami i zaktualizowanym cache dla folderu
+    """
+    log_buffer: List[str] = []
+    manager = UpdateManager(
+        log_callback=log_buffer.append,
+        backup_enabled=job['backup_enabled'],
+        output_mode=job['output_mode'],
+        scanner=job['scanner'],
+        validation=job['validation'],
+        log_to_file=False,
+        load_cache=False,
+    )
+    folder_name = job['folder_name']
+    key = manager._cache_key(job['source_path'] / folder_name)
+    if job['structure'] is not None:
+        manager.structure_cache[key] = job['structure']
+    if job['folder_hash'] is not None:
+        manager.file_hashes[key] = job['folder_hash']
+    if job['fingerprint'] is not None:
+        manager.folder_fingerprints[key] = job['fingerprint']
+    if job['folder_clean']:
+        manager.current_run.clean_folders.add(key)
+    if job['page_layout'] is not None:
+        manager.page_layouts[manager._cache_key(job['html_path'])] = job['page_layout']
+    manager.description_cache.update(job['descriptions'])
+    known_descriptions = set(job['descriptions'])
+
+    try:
+        has_changes = manager.update_html_file(job['html_path'], job['source_path'], folder_name)
+    except Exception as e:
+        manager.log(f"  ❌ Błąd batch: {folder_name}: {str(e)}")
+        has_changes = False
+
+    return {
+        'folder_name': folder_name,
+        'has_changes': has_changes,
+        'log': log_buffer,
+        'changes_summary': manager.changes_summary,
+        'removed_urls': sorted(manager.removed_urls),
+        'seen_urls': sorted(manager.seen_urls),
+        'cache_key': key,
+        'structure': manager.structure_cache.get(key),
+        'folder_hash': manager.file_hashes.get(key),
+        'fingerprint': manager.folder_fingerprints.get(key),
+        'page_key': manager._cache_key(job['html_path']),
+        'page_signature': manager.page_signatures.get(manager._cache_key(job['html_path'])),
+        'page_layout': manager.page_layouts.get(manager._cache_key(job['html_path'])),
+        'page_diffs': {name: asdict(diff) for name, diff in manager.current_run.page_diffs.items()},
+        'descriptions': {name: desc for name, desc in manager.description_cache.items() if name not in known_descriptions},
+    }
@@ -30,7 +30,8 @@ class WebDashboard:
                  host: str = "127.0.0.1",
                  port: int = 5000,
                  update_callback: Optional[Callable] = None,
-                 log_callback: Optional[Callable] = None):
+                 log_callback: Optional[Callable] = None,
+                 plan_callback: Optional[Callable] = None):
         """
         Inicjalizacja Web Dashboard
 
@@ -39,6 +40,8 @@ class WebDashboard:
             port: Port do nasłuchiwania
             update_callback: Callback dla aktualizacji
             log_callback: Callback dla logowania
+            plan_callback: Callback zwracający plan aktualizacji (dry-run) - wywoływany z source_repo/target_repo,
+                np. UpdateManager.plan_request
         """
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'aktualizator-strony-secret-v5.1'
@@ -48,6 +51,7 @@ class WebDashboard:
         self.host = host
         self.port = port
         self.update_callback = update_callback
+        self.plan_callback = plan_callback
         self.log_callback = log_callback or print
         self.is_running = False
         self.server_thread = None
@@ -82,6 +86,7 @@ class WebDashboard:
                     'GET /api/stats': 'Pobierz statystyki',
                     'GET /api/status': 'Status aplikacji',
                     'POST /api/update': 'Uruchom aktualizację',
+                    'POST /api/plan': 'Podgląd aktualizacji (dry-run)',
                     'GET /api/config': 'Pobierz konfigurację',
                     'POST /api/config': 'Zaktualizuj konfigurację',
                     'WebSocket': 'Połączenie WebSocket na /'
@@ -132,6 +137,33 @@ class WebDashboard:
                     'message': str(e)
                 }), 500
 
+        @self.app.route('/api/plan', methods=['POST'])
+        def plan_update():
+            """Podgląd aktualizacji (dry-run) - bez zapisu plików i git"""
+            try:
+                data = request.get_json(silent=True) or {}
+
+                if self.plan_callback:
+                    plan = self.plan_callback(source_repo=data.get('source_repo'),
+                                              target_repo=data.get('target_repo'))
+                    return jsonify({
+                        'status': 'ok',
+                        'message': 'Plan aktualizacji',
+                        'plan': plan
+                    })
+                else:
+                    return jsonify({
+                        'status': 'error',
+                        'message': 'Plan callback nie skonfigurowany'
+                    }), 500
+
+            except Exception as e:
+                self.log(f"❌ Błąd plan update: {str(e)}")
+                return jsonify({
+                    'status': 'error',
+                    'message': str(e)
+                }), 500
+
         @self.app.route('/api/config', methods=['GET'])
         def get_config():
             """Pobierz konfigurację"""
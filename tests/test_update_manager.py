@@ -4,6 +4,7 @@ Testy dla UpdateManager v2.3+
 Uruchom: pytest tests/test_update_manager.py -v
 """
 
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -13,7 +14,8 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
-from update_manager import UpdateManager
+import html_validator
+from update_manager import UpdateManager, PageIndex, Section, Task, structure_from_dict, structure_to_dict
 
 
 class TestUpdateManagerInit:
@@ -66,6 +68,44 @@ class TestValidateHtml:
         assert isinstance(is_valid, bool)
         assert isinstance(errors, list)
 
+    def test_streaming_validator_checks(self):
+        """Wszystkie sprawdzenia w jednym przejściu, niezależnie od podziału na kawałki"""
+        url = f"{UpdateManager.BASE_URL}/test//a b.html"
+        html = ('<html><body><div class="content-wrapper"><div class="row g-3">'
+                + _card(url, "a") + _card(url, "a") + '</div><div class="col-sm-6"><span>x</div>'
+                + '</em><p>bez zamknięcia<br></div></body></html>')
+
+        errors = html_validator.validate_content(html)
+        assert errors == [
+            "Element col-* nie jest w row: ['col-sm-6']",
+            f"Podwójny slash w URL: {url}",
+            f"Nieenkodowana spacja w URL: {url}",
+            f"Podwójny slash w URL: {url}",
+            f"Nieenkodowana spacja w URL: {url}",
+            "Niezamknięty tag: <span>",
+            "Nadmiarowy tag zamykający: </em>",
+            "Zduplikowane karty: 1 unikalnych duplikatów",
+        ]
+        assert html_validator.validate_chunks(html[i:i + 7] for i in range(0, len(html), 7)) == errors
+        assert html_validator.validate_content(_page(_card("u1", "a"))) == ["Element col-* nie jest w row: "
+                                                                            "['col-sm-6', 'col-lg-4']"]
+        assert html_validator.validate_content("<div></div>") == ["Brak div.content-wrapper"]
+
+    def test_strict_validation_blocks_write(self, tmp_path):
+        """Tryb strict nie zapisuje strony, której wynik ma błędy"""
+        source = tmp_path / "source"
+        (source / "test" / "S1").mkdir(parents=True)
+        (source / "test" / "S1" / "zadanie1.html").write_text("<html></html>")
+        html_file = tmp_path / "test.html"
+        html_file.write_text(_page('<span>'), encoding='utf-8')
+        before = html_file.read_bytes()
+
+        assert UpdateManager(backup_enabled=False, validation="strict").update_html_file(
+            html_file, source, "test") is False
+        assert html_file.read_bytes() == before
+        assert UpdateManager(backup_enabled=False).update_html_file(html_file, source, "test") is True
+        assert UpdateManager(backup_enabled=False).validate_html(html_file)[1] == ["Niezamknięty tag: <span>"]
+
 
 class TestExtractDescription:
     """Testy wyciągania opisów"""
@@ -105,6 +145,23 @@ class TestExtractDescription:
             # Powinno zwrócić coś sensownego
             assert len(desc) > 0
 
+    def test_description_cache_bounded_and_persistent(self, tmp_path, monkeypatch):
+        """Cache opisów ma limit (LRU) i jest zapisywany razem z cache struktury"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(UpdateManager, "DESCRIPTION_CACHE_SIZE", 2)
+        manager = UpdateManager(log_callback=lambda message: None)
+        manager._extract_description("zad1")
+        manager._extract_description("cw2")
+        manager._extract_description("zad1")
+        assert manager._extract_description("lab3_final") == "Laboratorium 3 Final"
+        assert list(manager.description_cache) == ["zad1", "lab3_final"]
+        manager._save_structure_cache()
+
+        reloaded = UpdateManager(log_callback=lambda message: None)
+        monkeypatch.setattr("update_manager.DescriptionEngine.describe", lambda name: pytest.fail(name))
+        assert reloaded._extract_description("zad1") == "Zadanie 1"
+        assert reloaded._extract_description("lab3_final") == "Laboratorium 3 Final"
+
 
 class TestCleanupOldBackups:
     """Testy czyszczenia backupów"""
@@ -122,6 +179,80 @@ class TestCleanupOldBackups:
         assert isinstance(result, int)
         assert result >= 0
 
+    def test_cleanup_removes_legacy_backup_files(self, tmp_path, monkeypatch):
+        """Stare pliki *_backup_*.html są faktycznie usuwane"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "backups").mkdir()
+        old_file = tmp_path / "backups" / "index_backup_20200101_000000.html"
+        old_file.write_text("<html></html>")
+        os.utime(old_file, (0, 0))
+
+        assert UpdateManager(load_cache=False).cleanup_old_backups(days=30) == 1
+        assert not old_file.exists()
+
+
+class TestBackupStore:
+    """Testy deduplikowanego magazynu backupów"""
+
+    def test_deduplicated_backup_and_restore(self, tmp_path, monkeypatch):
+        """Ta sama treść zapisana raz, przywracanie najnowszej lub wskazanej wersji"""
+        monkeypatch.chdir(tmp_path)
+        manager = UpdateManager(load_cache=False)
+        page = tmp_path / "index.html"
+        page.write_bytes(b"<html>v1</html>")
+
+        first = manager.create_backup(page)
+        assert manager.create_backup(page) == first
+        assert len(manager.backup_store.entries(page)) == 1
+        timestamp = manager.backup_store.entries(page)[0]["timestamp"]
+
+        page.write_bytes(b"<html>v2</html>")
+        manager.create_backup(page)
+        page.write_bytes(b"<html>zepsute</html>")
+
+        assert manager.restore_backup(page)
+        assert page.read_bytes() == b"<html>v2</html>"
+        assert manager.restore_backup(page, timestamp)
+        assert page.read_bytes() == b"<html>v1</html>"
+        assert manager.backup_store.stats()["objects"] == 2
+
+    def test_retention_reclaims_objects(self, tmp_path):
+        """Polityki keep_last/daily/weekly usuwają wpisy i nieużywane obiekty"""
+        from backup_store import BackupStore
+        store = BackupStore(tmp_path / "backups")
+        start = datetime(2026, 1, 1, 12)
+        for day in range(30):
+            for hour in range(2):
+                store.add("page.html", f"{day}-{hour}".encode(), start + timedelta(days=day, hours=hour))
+        assert store.stats()["entries"] == 60
+
+        result = store.prune(keep_last=3, keep_daily=5, keep_weekly=2)
+        kept = [entry["timestamp"][:13] for entry in store.entries("page.html")]
+        # 3 ostatnie + najnowsze z dni 28-26 + najnowszy z poprzedniego tygodnia (ISO)
+        assert kept == ["2026-01-30T13", "2026-01-30T12", "2026-01-29T13", "2026-01-28T13",
+                        "2026-01-27T13", "2026-01-26T13", "2026-01-25T13"]
+        assert result["entries"] == 53 and result["objects"] == 53
+        assert store.stats()["objects"] == 7
+        assert store.read("page.html") == b"29-1"
+
+    def test_max_age_keeps_last_backups(self, tmp_path):
+        """max_age_days nie usuwa keep_last najnowszych ani jedynego backupu strony"""
+        from backup_store import BackupStore
+        store = BackupStore(tmp_path / "backups")
+        now = datetime(2026, 6, 1)
+        for day in range(5):
+            store.add("stara.html", f"v{day}".encode(), now - timedelta(days=100 - day))
+        store.add("jedna.html", b"v0", now - timedelta(days=100))
+
+        result = store.prune(keep_last=2, max_age_days=30, now=now)
+        assert [entry["timestamp"][:10] for entry in store.entries("stara.html")] == ["2026-02-25", "2026-02-24"]
+        assert store.read("stara.html") == b"v4"
+        assert result["entries"] == 3
+
+        store.prune(max_age_days=30, now=now)
+        assert store.read("jedna.html") == b"v0"
+        assert len(store.entries("stara.html")) == 1
+
 
 class TestErrorHandling:
     """Testy obsługi błędów"""
@@ -164,6 +295,959 @@ class TestScanDirectory:
         assert isinstance(result, dict)
 
 
+def _card(url, title):
+    """Minimalna karta w formacie generowanym przez UpdateManager"""
+    return (f'<div class="col-sm-6 col-lg-4"><div class="link-card">'
+            f'<a class="stretched-link" href="{url}" target="_blank"></a>'
+            f'<h3 class="mb-3 fs-5 fw-semibold">{title}</h3><p class="mb-3">{title}</p></div></div>')
+
+
+def _page(sections_html=""):
+    """Strona z content-wrapper"""
+    return f'<html><body><div class="content-wrapper">{sections_html}</div></body></html>'
+
+
+class TestPageIndex:
+    """Testy indeksu strony"""
+
+    def test_index_maps_sections_rows_and_cards(self):
+        """Indeks mapuje sekcje, podsekcje, wiersze i karty"""
+        html = _page(
+            '<div class="mb-4"><h3 class="subsection-title">S1</h3>'
+            '<div class="row g-3">' + _card("u1", "a") + '</div>'
+            '<h4 class="subsection-subtitle">P1</h4>'
+            '<div class="row g-3">' + _card("u2", "b") + _card("u2", "b") + '</div></div>'
+        )
+        container = BeautifulSoup(html, 'html.parser').find('div', {'class': 'content-wrapper'})
+        index = PageIndex(container)
+
+        assert set(index.cards) == {"u1", "u2"}
+        assert index.locations["u1"] == ("S1", None)
+        assert index.locations["u2"] == ("S1", "P1")
+        assert ("S1", "P1") in index.subsections
+        assert len(index.duplicates) == 1
+        assert index.section_counts["S1"] == 2
+
+        assert index.remove_card("u1")
+        assert "u1" not in index.cards
+        assert index.section_counts["S1"] == 1
+
+    def test_update_html_file_adds_and_removes_cards(self, tmp_path):
+        """Aktualizacja dodaje nowe karty i usuwa nieaktualne"""
+        manager = UpdateManager(backup_enabled=False)
+        source = tmp_path / "source"
+        (source / "test" / "S1").mkdir(parents=True)
+        (source / "test" / "S1" / "zadanie1.html").write_text("<html></html>")
+        (source / "test" / "S1" / "zadanie2.html").write_text("<html></html>")
+
+        url1 = f"{UpdateManager.BASE_URL}/test/S1/zadanie1.html"
+        html_file = tmp_path / "test.html"
+        html_file.write_text(_page(
+            '<div class="mb-4"><h3 class="subsection-title">S1</h3><div class="row g-3">'
+            + _card(url1, "zadanie1") + _card("https://old/x.html", "old") + '</div></div>'
+        ), encoding='utf-8')
+
+        assert manager.update_html_file(html_file, source, "test") is True
+
+        container = BeautifulSoup(html_file.read_text(encoding='utf-8'), 'html.parser').find(
+            'div', {'class': 'content-wrapper'})
+        index = PageIndex(container)
+        assert set(index.cards) == {url1, f"{UpdateManager.BASE_URL}/test/S1/zadanie2.html"}
+        assert len(index.sections) == 1
+
+
+def _task(title, url=None):
+    """Zadanie w formacie struktury scan_directory"""
+    return {"title": title, "description": title, "url": url or title, "type": "file"}
+
+
+class TestReconcile:
+    """Testy uzgadniania strony ze strukturą"""
+
+    def _container(self, sections_html):
+        soup = BeautifulSoup(_page(sections_html), 'html.parser')
+        return soup, soup.find('div', {'class': 'content-wrapper'})
+
+    def test_reconcile_minimal_operations(self):
+        """Tylko karta spoza posortowanego podciągu jest przenoszona"""
+        manager = UpdateManager()
+        soup, container = self._container(
+            '<div class="mb-4"><h3 class="subsection-title">S1</h3><div class="row g-3">'
+            + _card("c", "c") + _card("a", "a") + _card("b", "b") + '</div></div>'
+            '<div class="mb-4"><h3 class="subsection-title">Old</h3><div class="row g-3">'
+            + _card("o", "o") + '</div></div>'
+        )
+        structure = {"S1": [_task("a"), _task("b"), _task("c"), _task("d")]}
+
+        result = manager.reconcile(container, soup, structure)
+
+        assert result.added == ["d"]
+        assert result.moved == ["c"]
+        assert result.removed == ["o"]
+        assert result.sections_removed == ["Old"]
+        assert set(PageIndex(container).cards) == {"a", "b", "c", "d"}
+        assert [PageIndex.card_url(card) for card in container.find_all('div', class_='col-sm-6')] == \
+            ["a", "b", "c", "d"]
+
+    def test_reconcile_is_noop_when_page_matches(self):
+        """Drugie uzgodnienie niczego nie zmienia"""
+        manager = UpdateManager()
+        soup, container = self._container("")
+        structure = {
+            "S1": [_task("zad2"), _task("zad10"),
+                   {"type": "subsection", "name": "P1", "tasks": [_task("x")]}],
+        }
+
+        first = manager.reconcile(container, soup, structure)
+        assert first.sections_added == ["S1"]
+        assert first.has_changes
+
+        second = manager.reconcile(container, soup, structure)
+        assert not second.has_changes
+        assert [PageIndex.card_url(card) for card in container.find_all('div', class_='col-sm-6')] == \
+            ["zad2", "zad10", "x"]
+
+    def test_sort_keys_stored_in_cards(self):
+        """Karty niosą data-sort-key zgodny z naturalnym sortowaniem"""
+        from update_manager import natural_sort_key, natural_sort_token
+        names = ["zad10", "Zad 2", "zad2", "zad", "zad!1", "a-1", "a 1", "007", "7b", ""]
+        assert sorted(names, key=natural_sort_token) == sorted(names, key=natural_sort_key)
+
+        manager = UpdateManager()
+        soup, container = self._container(
+            '<div class="mb-4"><h3 class="subsection-title">S1</h3><div class="row g-3">'
+            + _card("zad10", "zad10") + _card("zad2", "zad2") + '</div></div>'
+        )
+        manager.reconcile(container, soup, {"S1": [_task("zad2"), _task("zad10"), _task("zad11")]})
+        cards = container.find_all('div', class_='col-sm-6')
+        assert cards[-1]['data-sort-key'] == natural_sort_token("zad11")
+
+        # Karty bez klucza (starsze) i z kluczem - już posortowane, nic nie jest ruszane
+        index = PageIndex(container)
+        assert manager.sort_cards_in_section(container, index) == 0
+        assert not index.touched
+
+
+class TestCardTemplate:
+    """Testy szablonu karty"""
+
+    def test_template_matches_generated_html(self):
+        """Klon szablonu renderuje się tak samo jak sparsowany _generate_card_html"""
+        manager = UpdateManager()
+        task = {"url": "https://x/a%20b.html", "title": "zadanie1", "description": "Zadanie 1"}
+
+        expected = BeautifulSoup(manager._generate_card_html(task), 'html.parser').find('div', class_='col-sm-6')
+        card = manager.card_template.build(task)
+
+        assert card.decode(indent_level=0) == expected.decode(indent_level=0)
+
+    def test_build_many_returns_independent_cards(self):
+        """Karty z jednego wywołania są niezależnymi kopiami"""
+        manager = UpdateManager()
+        cards = manager.card_template.build_many([_task("a"), _task("b")])
+
+        assert [PageIndex.card_url(card) for card in cards] == ["a", "b"]
+        assert cards[0].find('h3').get_text(strip=True) == "a"
+        assert manager.card_template.node.find('h3').get_text(strip=True) == "__TITLE__"
+
+
+class TestMinimalOutput:
+    """Testy zapisu z minimalnym diffem"""
+
+    def _source(self, tmp_path, sections):
+        source = tmp_path / "source"
+        for section, names in sections.items():
+            (source / "test" / section).mkdir(parents=True, exist_ok=True)
+            for name in names:
+                (source / "test" / section / f"{name}.html").write_text("<html></html>")
+        return source
+
+    def test_unchanged_sections_kept_byte_for_byte(self, tmp_path):
+        """Niezmienione fragmenty strony zostają bajt w bajt, nowa sekcja jest dopisana"""
+        source = self._source(tmp_path, {"S1": ["zadanie1"]})
+        html_file = tmp_path / "test.html"
+        head = '<html>\n<head><title>T</title></head>\n<body>\n<div class="content-wrapper">\n  <h1>Tytuł</h1>\n'
+        html_file.write_text(head + '</div>\n</body>\n</html>\n', encoding='utf-8')
+
+        manager = UpdateManager(backup_enabled=False)
+        assert manager.update_html_file(html_file, source, "test") is True
+
+        content = html_file.read_text(encoding='utf-8')
+        assert content.startswith(head)
+        assert content.endswith('</div>\n</body>\n</html>\n')
+        assert f"{UpdateManager.BASE_URL}/test/S1/zadanie1.html" in content
+        assert not list(tmp_path.glob(".test.html.*.tmp"))
+
+    def test_unchanged_page_is_not_rewritten(self, tmp_path):
+        """Drugie uruchomienie bez zmian w źródle nie zapisuje pliku"""
+        source = self._source(tmp_path, {"S1": ["zadanie1", "zadanie2"]})
+        html_file = tmp_path / "test.html"
+        html_file.write_text(_page(), encoding='utf-8')
+
+        manager = UpdateManager(backup_enabled=False)
+        assert manager.update_html_file(html_file, source, "test") is True
+        before = html_file.read_bytes()
+        mtime = html_file.stat().st_mtime_ns
+
+        assert manager.update_html_file(html_file, source, "test") is False
+        assert html_file.read_bytes() == before
+        assert html_file.stat().st_mtime_ns == mtime
+
+    def test_prettify_mode_output_is_stable(self, tmp_path):
+        """Tryb prettify daje ten sam wynik co minimal dla sformatowanej strony"""
+        source = self._source(tmp_path, {"S1": ["zadanie1"], "S2": ["lab1"]})
+        html_file = tmp_path / "test.html"
+        html_file.write_text(BeautifulSoup(_page(), 'html.parser').prettify(), encoding='utf-8')
+
+        assert UpdateManager(backup_enabled=False, output_mode="prettify").update_html_file(
+            html_file, source, "test") is True
+        assert UpdateManager(backup_enabled=False).update_html_file(html_file, source, "test") is False
+
+    def test_stream_mode_parses_only_content_wrapper(self, tmp_path, monkeypatch):
+        """Tryb stream daje wynik identyczny z minimal, a BeautifulSoup widzi tylko content-wrapper"""
+        source = self._source(tmp_path, {"S1": ["zadanie1"], "S2": ["lab1"]})
+        page = BeautifulSoup(
+            '<html><head><title>Łódź</title><script>var s = "<div class=\'content-wrapper\'>";</script></head>'
+            '<body><main><div class="content-wrapper"><div class="mb-4"><h3 class="subsection-title">S1</h3>'
+            '<div class="row g-3">' + _card("https://old/x.html", "old") + '</div></div></div></main>'
+            '<footer>żółw</footer></body></html>', 'html.parser').prettify().replace("\n", "\r\n")
+        minimal_file, stream_file = tmp_path / "minimal.html", tmp_path / "stream.html"
+        minimal_file.write_text(page, encoding='utf-8', newline='')
+        stream_file.write_text(page, encoding='utf-8', newline='')
+
+        assert UpdateManager(backup_enabled=False).update_html_file(minimal_file, source, "test") is True
+
+        from backup_store import BackupStore
+        parsed = []
+        monkeypatch.setattr("update_manager.BeautifulSoup",
+                            lambda markup, *args: parsed.append(markup) or BeautifulSoup(markup, *args))
+        manager = UpdateManager(output_mode="stream", load_cache=False)
+        manager.backup_store = BackupStore(tmp_path / "backups")
+        assert manager.update_html_file(stream_file, source, "test") is True
+
+        assert stream_file.read_bytes() == minimal_file.read_bytes()
+        assert parsed[0].startswith('<div class="content-wrapper">') and parsed[0].endswith('</div>')
+        assert "<head>" not in "".join(parsed)
+        assert manager.backup_store.read(stream_file) == page.encode('utf-8')
+        assert UpdateManager(backup_enabled=False, output_mode="stream").update_html_file(
+            stream_file, source, "test") is False
+
+    def test_render_mode_regenerates_content_wrapper(self, tmp_path):
+        """Tryb render generuje kontener ze struktury - bajtowo jak minimal, stabilnie i z podsumowaniem zmian"""
+        source = self._source(tmp_path, {"S1": ["zadanie1", "zadanie2"], "S2": ["lab1"]})
+        page = BeautifulSoup('<html><head><title>T</title></head><body><main>'
+                             '<div class="content-wrapper" id="c"></div></main></body></html>',
+                             'html.parser').prettify()
+        minimal_file, render_file = tmp_path / "minimal.html", tmp_path / "render.html"
+        minimal_file.write_text(page, encoding='utf-8')
+        render_file.write_text(page, encoding='utf-8')
+
+        assert UpdateManager(backup_enabled=False).update_html_file(minimal_file, source, "test") is True
+        assert UpdateManager(backup_enabled=False, output_mode="render").update_html_file(
+            render_file, source, "test") is True
+        assert render_file.read_bytes() == minimal_file.read_bytes()
+        assert UpdateManager(backup_enabled=False, output_mode="render").update_html_file(
+            render_file, source, "test") is False
+
+        url = f"{UpdateManager.BASE_URL}/test/S1/zadanie%d.html"
+        render_file.write_text(_page(
+            '<div class="mb-4"><h3 class="subsection-title">S1</h3><div class="row g-3">'
+            + _card(url % 2, "zadanie2") + _card(url % 1, "zadanie1") + _card("https://old/x.html", "old")
+            + '</div></div><div class="mb-4"><h3 class="subsection-title">Stara</h3></div>'), encoding='utf-8')
+        manager = UpdateManager(backup_enabled=False, output_mode="render")
+        assert manager.update_html_file(render_file, source, "test") is True
+
+        result = manager.current_run.page_diffs["render.html"]
+        assert result.added == [f"{UpdateManager.BASE_URL}/test/S2/lab1.html"]
+        assert result.removed == ["https://old/x.html"]
+        assert result.moved == [url % 2]
+        assert (result.sections_added, result.sections_removed) == (["S2"], ["Stara"])
+        assert (result.cards_total, result.sections_total) == (3, 2)
+
+    def test_cached_page_index_parses_only_changed_sections(self, tmp_path, monkeypatch):
+        """Strona niezmieniona od zapisu: indeks z cache, parsowane tylko regiony zmienianych sekcji"""
+        monkeypatch.chdir(tmp_path)
+        source = self._source(tmp_path, {"S1": ["zadanie1"], "S2": ["lab1"], "S3": ["cw1"]})
+        cached_file, fresh_file = tmp_path / "cached.html", tmp_path / "fresh.html"
+        cached_file.write_text(_page(), encoding='utf-8')
+
+        manager = UpdateManager(backup_enabled=False, log_callback=lambda message: None)
+        assert manager.update_html_file(cached_file, source, "test") is True
+        manager._save_structure_cache()
+        fresh_file.write_bytes(cached_file.read_bytes())
+
+        (source / "test" / "S2" / "lab2.html").write_text("<html></html>")
+        parsed = []
+        monkeypatch.setattr("update_manager.BeautifulSoup",
+                            lambda markup, *args: parsed.append(markup) or BeautifulSoup(markup, *args))
+        reloaded = UpdateManager(backup_enabled=False, log_callback=lambda message: None)
+        assert reloaded.update_html_file(cached_file, source, "test") is True
+
+        assert parsed[0].count("<!--region:") == 2
+        assert "S2" in parsed[0] and "zadanie1" not in parsed[0]
+        assert reloaded.current_run.page_diffs["cached.html"].cards_total == 4
+
+        assert UpdateManager(backup_enabled=False, load_cache=False).update_html_file(
+            fresh_file, source, "test") is True
+        assert cached_file.read_bytes() == fresh_file.read_bytes()
+
+        parsed.clear()
+        assert reloaded.update_html_file(cached_file, source, "test") is False
+        assert parsed == []
+
+    def test_invalid_output_mode(self):
+        """Nieznany tryb zapisu"""
+        with pytest.raises(ValueError):
+            UpdateManager(output_mode="bogus")
+
+
+def _git_repo(path):
+    """Tworzy puste repozytorium Git"""
+    import subprocess
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    return path
+
+
+class TestBatchProcesses:
+    """Testy trybu procesów dla run_full_update_batch"""
+
+    def test_process_pool_merges_results(self, tmp_path, monkeypatch):
+        """Wyniki z procesów roboczych trafiają do changes_summary i cache rodzica"""
+        monkeypatch.chdir(tmp_path)
+        source = _git_repo(tmp_path / "source")
+        target = _git_repo(tmp_path / "target")
+        for folder in ("TSiAI", "WiAI"):
+            (source / folder / "S1").mkdir(parents=True)
+            (source / folder / "S1" / "zadanie1.html").write_text("<html></html>")
+            (target / f"{folder}.html").write_text(_page(), encoding='utf-8')
+
+        manager = UpdateManager(backup_enabled=False, max_workers=2)
+        monkeypatch.setattr(manager, "commit_and_push", lambda repo_path: True)
+
+        assert manager.run_full_update_batch(source, target, use_processes=True) is True
+        assert sorted(manager.changes_summary["modified"]) == ["TSiAI.html", "WiAI.html"]
+        assert set(manager.structure_cache) >= {UpdateManager._cache_key(source / "TSiAI"),
+                                                 UpdateManager._cache_key(source / "WiAI")}
+        assert f"{UpdateManager.BASE_URL}/WiAI/S1/zadanie1.html" in (target / "WiAI.html").read_text(encoding='utf-8')
+        assert any("WiAI.html" in line for line in manager.detailed_log)
+
+    def test_worker_manager_does_not_write_parent_log(self):
+        """Manager procesu roboczego (log_to_file=False) nie loguje przez handlery rodzica"""
+        import logging
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        parent = logging.getLogger("update_manager")  # Jak po fork: handler i poziom rodzica
+        level = parent.level
+        parent.addHandler(handler)
+        parent.setLevel(logging.DEBUG)
+        try:
+            worker = UpdateManager(log_callback=lambda message: None, log_to_file=False, load_cache=False)
+            worker.log("z procesu roboczego")
+        finally:
+            parent.removeHandler(handler)
+            parent.setLevel(level)
+        assert records == []
+        assert "z procesu roboczego" in worker.detailed_log[-1]
+
+
+def _git_commit_all(path, message="zmiany"):
+    """Commituje wszystkie pliki w repozytorium"""
+    import subprocess
+    subprocess.run(["git", "-C", str(path), "add", "-A"], check=True)
+    subprocess.run(["git", "-C", str(path), "-c", "user.name=test", "-c", "user.email=test@example.com",
+                    "commit", "-q", "-m", message], check=True)
+
+
+class TestGitRunner:
+    """Testy runnera poleceń git (asyncio)"""
+
+    def test_concurrent_commands_timeout_and_stderr(self, tmp_path):
+        """Polecenia równolegle w kolejności, stderr strumieniowany, timeout zabija proces"""
+        from update_manager import GitRunner
+        repo = _git_repo(tmp_path / "repo")
+        runner = GitRunner(max_concurrent=2, timeout=5)
+
+        results = runner.run_all([runner.run_async(repo, "rev-parse", "--is-inside-work-tree") for _ in range(3)])
+        assert [result.stdout.strip() for result in results] == ["true"] * 3
+
+        lines = []
+        result = runner.run(tmp_path, "rev-parse", "--git-dir", on_stderr=lines.append)
+        assert result.returncode != 0 and lines and lines[0].startswith("fatal")
+
+        result = runner.run(repo, "-c", "alias.czekaj=!sleep 2", "czekaj", timeout=0.2)
+        assert result.returncode != 0 and "Timeout" in result.stderr
+
+    def test_repo_validation_cached_until_git_changes(self, tmp_path):
+        """git rev-parse tylko przy pierwszej walidacji i po zmianie .git"""
+        repo = _git_repo(tmp_path / "repo")
+        manager = UpdateManager(backup_enabled=False, load_cache=False, log_callback=lambda message: None)
+        calls = []
+        original = manager._git
+        manager._git = lambda path, *args: calls.append(args) or original(path, *args)
+
+        assert manager.validate_git_repo(repo) is True
+        assert manager.validate_git_repo(repo) is True
+        assert len(calls) == 1
+
+        (repo / ".git" / "nowy").write_text("")
+        assert manager.validate_git_repo(repo) is True
+        assert len(calls) == 2
+
+
+    def test_commit_stages_only_written_pages(self, tmp_path, monkeypatch):
+        """Commit obejmuje tylko strony zapisane w runie - bez add -A i status całego repo"""
+        import subprocess
+        from update_manager import ReconcileResult
+        repo = _git_repo(tmp_path / "repo")
+        git = lambda *args: subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True).stdout
+        git("config", "user.name", "test")
+        git("config", "user.email", "test@example.com")
+        for name in ("WiAI.html", "TSiAI.html", "inne.txt"):
+            (repo / name).write_text("v1")
+        _git_commit_all(repo)
+        for name in ("WiAI.html", "TSiAI.html", "inne.txt"):
+            (repo / name).write_text("v2")
+        (repo / "assets").mkdir()
+        (repo / "assets" / "duzy.bin").write_bytes(b"0" * 1024)
+
+        manager = UpdateManager(backup_enabled=False, load_cache=False, log_callback=lambda message: None)
+        commands = []
+        original = manager.git_runner.run_async
+        monkeypatch.setattr(manager.git_runner, "run_async",
+                            lambda path, *args, **kwargs: commands.append(args) or original(path, *args, **kwargs))
+        run = manager.start_run()
+        run.page_diffs["WiAI.html"] = ReconcileResult()
+        with manager.activate(run):
+            manager.git_runner.submit(manager._commit_and_push_async(repo)).result()
+
+        assert git("show", "--name-only", "--format=", "HEAD").split() == ["WiAI.html"]
+        assert git("status", "--porcelain").split() == ["M", "TSiAI.html", "M", "inne.txt", "??", "assets/"]
+        add = next(args for args in commands if "add" in args)
+        assert add[:2] == ("-c", "core.untrackedCache=true") and add[-3:] == ("add", "--", "WiAI.html")
+        assert not any("-A" in args or "status" in args for args in commands)
+
+
+    def test_commit_error_is_logged(self, tmp_path, monkeypatch):
+        """Wyjątek zadania commit/push trafia do loga aktywnego runu"""
+        import threading
+        from update_manager import ReconcileResult
+        repo = _git_repo(tmp_path / "repo")
+        (repo / "WiAI.html").write_text("v1")
+        manager = UpdateManager(backup_enabled=False, load_cache=False, log_callback=lambda message: None)
+        monkeypatch.setattr(manager, "_generate_commit_message", Mock(side_effect=RuntimeError("wiadomość")))
+        run = manager.start_run()
+        run.page_diffs["WiAI.html"] = ReconcileResult()
+        done = threading.Event()
+        original = manager._log_commit_error
+        monkeypatch.setattr(manager, "_log_commit_error", lambda future: original(future) or done.set())
+
+        with manager.activate(run):
+            assert manager.commit_and_push(repo) is True
+        assert done.wait(10)
+        assert any("Błąd commit/push" in line and "wiadomość" in line for line in run.detailed_log)
+
+
+class TestGitTreeScanner:
+    """Testy budowania struktury z obiektów git"""
+
+    def _source(self, tmp_path):
+        source = _git_repo(tmp_path / "source")
+        for rel in ("test/top.html", "test/S1/a.html", "test/S1/Sub1/index.html",
+                    "test/S1/Sub2/p1/x.txt", "test/S1/Sub2/p10/y.txt", "test/S1/Sub2/p2/z.txt",
+                    "test/.ukryty/b.html", "test/S2/c.html"):
+            (source / rel).parent.mkdir(parents=True, exist_ok=True)
+            (source / rel).write_text("<html></html>")
+        _git_commit_all(source)
+        return source
+
+    def test_git_scanner_matches_filesystem(self, tmp_path):
+        """Struktura z git ls-tree jest identyczna jak ze skanowania dysku"""
+        source = self._source(tmp_path)
+        from_fs = UpdateManager(scanner="fs", load_cache=False).scan_directory(source / "test", "test")
+        from_git = UpdateManager(load_cache=False).scan_directory(source / "test", "test")
+
+        assert from_git == from_fs
+        assert list(from_git) == list(from_fs)
+        assert [task.title for task in from_git["S1"].subsections["Sub2"].tasks] == ["Sub2", "Sub2", "Sub2"]
+
+    def test_bare_mirror(self, tmp_path):
+        """Skanowanie działa na bare mirror bez drzewa roboczego"""
+        import subprocess
+        source = self._source(tmp_path)
+        mirror = tmp_path / "mirror.git"
+        subprocess.run(["git", "clone", "-q", "--mirror", str(source), str(mirror)], check=True)
+
+        manager = UpdateManager(load_cache=False)
+        assert manager.scan_directory(mirror / "test", "test") == \
+            UpdateManager(load_cache=False).scan_directory(source / "test", "test")
+        assert manager.validate_git_repo(mirror) is True
+
+    def test_git_scanner_uses_commit(self, tmp_path, monkeypatch):
+        """Niezacommitowane pliki nie trafiają do struktury z git"""
+        source = self._source(tmp_path)
+        (source / "test" / "S2" / "nowy.html").write_text("<html></html>")
+
+        manager = UpdateManager(load_cache=False)
+        commands = []
+        original = manager.git_runner.run_async
+        monkeypatch.setattr(manager.git_runner, "run_async",
+                            lambda path, *args, **kwargs: commands.append(args) or original(path, *args, **kwargs))
+        structure = manager.scan_directory(source / "test", "test")
+        assert [task.title for task in structure["S2"].tasks] == ["c"]
+        assert any(args[0] == "ls-tree" for args in commands)  # Przez GitRunner (timeout, limit procesów)
+
+    def test_incremental_rescan_reuses_unchanged_sections(self, tmp_path, monkeypatch):
+        """Po zmianie jednej podsekcji pozostałe sekcje i podsekcje są przenoszone z cache"""
+        monkeypatch.chdir(tmp_path)
+        source = self._source(tmp_path)
+        manager = UpdateManager(scanner="fs", load_cache=False)
+        before = manager.scan_directory(source / "test", "test")
+
+        (source / "test" / "S1" / "Sub2" / "p3").mkdir()
+        (source / "test" / "S1" / "Sub2" / "p3" / "w.txt").write_text("x")
+        after = manager.scan_directory(source / "test", "test")
+
+        assert after["S2"] is before["S2"]
+        assert after["S1"].subsections["Sub1"] is before["S1"].subsections["Sub1"]
+        assert len(after["S1"].subsections["Sub2"].tasks) == 4
+        assert after == UpdateManager(scanner="fs", load_cache=False).scan_directory(source / "test", "test")
+
+        # Odciski są zapisywane razem z cache struktury
+        manager._save_structure_cache()
+        reloaded = UpdateManager(scanner="fs")
+        assert reloaded.folder_fingerprints == manager.folder_fingerprints
+
+    def test_structure_records(self, tmp_path):
+        """Podsekcje indeksowane nazwą, wspólny prefiks URL, konwersja tylko przy serializacji"""
+        source = self._source(tmp_path)
+        structure = UpdateManager(load_cache=False).scan_directory(source / "test", "test")
+
+        tasks = structure["S1"].subsections["Sub2"].tasks
+        assert tasks[0].url == "https://prakt.dziadu.dev/test/S1/Sub2/p1/index.html"
+        assert tasks[0].url_prefix is tasks[1].url_prefix
+        assert not hasattr(tasks[0], "__dict__")
+
+        data = structure_to_dict(structure)
+        assert data["S1"][0] == {"title": "a", "description": "A", "url": "https://prakt.dziadu.dev/test/S1/a.html",
+                                 "type": "file", "sort_key": Task("a", "", "a", "file").sort_key}
+        assert structure_from_dict(data) == structure
+
+    def test_invalid_scanner(self):
+        """Nieznany skaner"""
+        with pytest.raises(ValueError):
+            UpdateManager(scanner="bogus")
+
+
+class TestFsWalker:
+    """Testy wspólnego walkera os.scandir"""
+
+    def _tree(self, tmp_path):
+        for rel in ("a.txt", "A/b.png", "A/deep/c.PNG", "B/d.pdf", "B/.ukryty/e.pdf", "C/f.zip"):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("12345")
+        return tmp_path
+
+    def test_walk_matches_rglob(self, tmp_path):
+        """Ten sam zestaw plików i rozmiarów co rglob (także równolegle)"""
+        import fs_walker
+        root = self._tree(tmp_path)
+        expected = {str(p.relative_to(root)) for p in root.rglob("*") if p.is_file()}
+
+        for parallel in (True, False):
+            files = fs_walker.walk_files(root, parallel=parallel)
+            assert {entry.rel_path for entry in files} == expected
+            assert sum(entry.size for entry in files) == 5 * len(expected)
+
+    def test_walk_depth_and_hidden(self, tmp_path):
+        """Ograniczenie głębokości i pomijanie ukrytych katalogów; katalog przed zawartością"""
+        import fs_walker
+        root = self._tree(tmp_path)
+        entries = fs_walker.walk(root, max_depth=2, skip_hidden_dirs=True)
+        rel_paths = [entry.rel_path for entry in entries]
+
+        assert os.path.join("A", "deep") in rel_paths
+        assert os.path.join("A", "deep", "c.PNG") not in rel_paths
+        assert not any(".ukryty" in rel for rel in rel_paths)
+        assert rel_paths.index("A") < rel_paths.index(os.path.join("A", "b.png"))
+
+    def test_scan_media_files(self, tmp_path):
+        """Media zliczane jednym przejściem"""
+        root = self._tree(tmp_path / "src" / "test")
+        media = UpdateManager(load_cache=False).scan_media_files(tmp_path / "src", "test")
+        assert sorted(media["images"]) == ["b.png", "c.PNG"]
+        assert sorted(media["documents"]) == ["d.pdf", "e.pdf"]
+        assert media["archives"] == ["f.zip"]
+
+    def test_media_stats_cached_by_git_tree(self, tmp_path, monkeypatch):
+        """Statystyki mediów z git ls-tree; przy niezmienionym drzewie bez ponownego listowania"""
+        source = _git_repo(tmp_path / "source")
+        self._tree(source / "test")
+        (source / "test" / "A" / "g.Jpeg").write_text("1234567")
+        _git_commit_all(source)
+
+        manager = UpdateManager(load_cache=False)
+        stats = manager.get_media_stats(source, "test")
+        assert stats["images"] == {"count": 3, "size": 17}
+        assert stats["videos"] == {"count": 0, "size": 0}
+
+        monkeypatch.setattr(manager, "scan_git_tree", Mock(side_effect=AssertionError("ponowne listowanie")))
+        assert manager.get_media_stats(source, "test") == stats
+
+    def test_media_stats_cached_by_fs_digest(self, tmp_path, monkeypatch):
+        """Bez Git: cache po digeście z dysku, zmiana w folderze unieważnia wynik"""
+        import fs_walker
+        source = tmp_path / "source"
+        self._tree(source / "test")
+
+        manager = UpdateManager(load_cache=False)
+        stats = manager.get_media_stats(source, "test")
+        assert stats["images"]["count"] == 2
+
+        walk_files = fs_walker.walk_files
+        monkeypatch.setattr(fs_walker, "walk_files", Mock(side_effect=AssertionError("ponowne przejście")))
+        assert manager.get_media_stats(source, "test") == stats
+
+        monkeypatch.setattr(fs_walker, "walk_files", walk_files)
+        (source / "test" / "A" / "nowy.jpg").write_text("123")
+        assert manager.get_media_stats(source, "test")["images"]["count"] == 3
+
+
+class TestCacheStore:
+    """Testy wersjonowanego cache w SQLite"""
+
+    def test_incremental_lazy_store(self, tmp_path):
+        """Zapis tylko zmienionych wpisów, odczyt przy pierwszym dostępie"""
+        from cache_store import CacheStore
+        path = tmp_path / "cache.db"
+        store = CacheStore(path, "v1")
+        store.namespace("structure")["a"] = {"S1": [1, 2]}
+        store.namespace("structure")["b"] = {"S2": []}
+        assert store.flush() == 2
+        assert store.flush() == 0
+        store.namespace("structure")["b"] = {"S3": []}
+        assert store.flush() == 1
+        store.close()
+
+        reopened = CacheStore(path, "v1").namespace("structure")
+        assert reopened.get("a") == {"S1": [1, 2]}
+        assert "missing" not in reopened
+        assert dict(reopened) == {"a": {"S1": [1, 2]}, "b": {"S3": []}}
+
+    def test_version_change_invalidates(self, tmp_path, monkeypatch):
+        """Zmiana BASE_URL unieważnia zapisaną strukturę"""
+        monkeypatch.chdir(tmp_path)
+        manager = UpdateManager(log_callback=lambda message: None)
+        manager.structure_cache["klucz"] = {"S1": Section("S1")}
+        manager._save_structure_cache()
+        assert UpdateManager(log_callback=lambda message: None).structure_cache.get("klucz") == {"S1": Section("S1")}
+
+        monkeypatch.setattr(UpdateManager, "BASE_URL", "https://example.com")
+        assert UpdateManager(log_callback=lambda message: None).structure_cache.get("klucz") is None
+
+    def test_corrupted_cache_is_rebuilt(self, tmp_path):
+        """Uszkodzony plik cache jest tworzony od nowa"""
+        from cache_store import CacheStore
+        path = tmp_path / "cache.db"
+        path.write_bytes(b"to nie jest baza sqlite" * 100)
+        store = CacheStore(path, "v1")
+        assert store.namespace("hashes").get("x") is None
+        store.namespace("hashes")["x"] = "abc"
+        assert store.flush() == 1
+
+    def test_locked_cache_is_kept_and_used_in_memory(self, tmp_path, monkeypatch):
+        """Zablokowana baza nie jest usuwana - cache działa w pamięci, aktualizacja przechodzi"""
+        import sqlite3
+        from cache_store import CacheStore
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(CacheStore, "TIMEOUT", 0.1)
+        manager = UpdateManager(log_callback=lambda message: None)
+        manager.structure_cache["klucz"] = {"S1": Section("S1")}
+        manager._save_structure_cache()
+        manager.cache_store.close()
+
+        lock = sqlite3.connect(UpdateManager.CACHE_FILE)
+        lock.execute("BEGIN EXCLUSIVE")
+        try:
+            logs = []
+            locked = UpdateManager(backup_enabled=False, log_callback=logs.append)
+            assert locked.structure_cache.get("klucz") is None
+            assert locked.cache_store.disabled
+            assert not any("Uszkodzony" in message for message in logs)
+
+            source = tmp_path / "source"
+            (source / "WiAI" / "S1").mkdir(parents=True)
+            (source / "WiAI" / "S1" / "zadanie1.html").write_text("<html></html>")
+            page = tmp_path / "WiAI.html"
+            page.write_text(_page(), encoding='utf-8')
+            assert locked.update_html_file(page, source, "WiAI") is True
+            locked._save_structure_cache()
+        finally:
+            lock.rollback()
+            lock.close()
+
+        assert UpdateManager(log_callback=lambda message: None).structure_cache.get("klucz") == {"S1": Section("S1")}
+
+
+class TestGitChangeDetection:
+    """Testy wykrywania zmian przez git diff"""
+
+    def _setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        source = _git_repo(tmp_path / "source")
+        target = _git_repo(tmp_path / "target")
+        for folder in ("TSiAI", "WiAI"):
+            (source / folder / "S1").mkdir(parents=True)
+            (source / folder / "S1" / "zadanie1.html").write_text("<html></html>")
+            (target / f"{folder}.html").write_text(_page(), encoding='utf-8')
+        _git_commit_all(source)
+
+        manager = UpdateManager(backup_enabled=False, log_callback=lambda message: None)
+        monkeypatch.setattr(manager, "commit_and_push", lambda repo_path: True)
+        monkeypatch.setattr(manager, "pull_repos", lambda paths: [True for path in paths])
+        return manager, source, target
+
+    def test_unchanged_head_skips_parsing(self, tmp_path, monkeypatch):
+        """HEAD bez zmian i nietknięte strony - brak parsowania HTML"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        assert manager.run_full_update(source, target) is True
+        assert len(manager.changes_summary["modified"]) == 2
+
+        import update_manager
+        monkeypatch.setattr(update_manager, "BeautifulSoup", Mock(side_effect=AssertionError("parsowanie")))
+        assert manager.run_full_update(source, target) is True
+        assert manager.changes_summary["modified"] == []
+
+    def test_only_changed_folder_is_processed(self, tmp_path, monkeypatch):
+        """Po commicie w jednym folderze przetwarzana jest tylko jego strona"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        manager.run_full_update_batch(source, target)
+        tsiai_before = (target / "TSiAI.html").read_bytes()
+
+        (source / "WiAI" / "S1" / "zadanie2.html").write_text("<html></html>")
+        _git_commit_all(source)
+        processed = []
+        original = manager.update_html_file
+        monkeypatch.setattr(manager, "update_html_file",
+                            lambda html_path, *args: processed.append(html_path.name) or original(html_path, *args))
+
+        assert manager.run_full_update_batch(source, target) is True
+        assert processed == ["WiAI.html"]
+        assert "zadanie2.html" in (target / "WiAI.html").read_text(encoding='utf-8')
+        assert (target / "TSiAI.html").read_bytes() == tsiai_before
+
+    def test_fs_scanner_sees_uncommitted_files(self, tmp_path, monkeypatch):
+        """Skaner fs: niezcommitowany plik trafia na stronę mimo niezmienionego HEAD"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        manager.scanner = "fs"
+        manager.run_full_update_batch(source, target)
+
+        (source / "WiAI" / "S1" / "zadanie2.html").write_text("<html></html>")
+        assert manager.run_full_update_batch(source, target) is True
+        assert not manager.last_run.clean_folders
+        assert "zadanie2.html" in (target / "WiAI.html").read_text(encoding='utf-8')
+
+    def test_touched_page_is_processed(self, tmp_path, monkeypatch):
+        """Zmieniona ręcznie strona jest przetwarzana mimo braku zmian w źródle"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        manager.run_full_update(source, target)
+
+        (target / "WiAI.html").write_text(_page(), encoding='utf-8')
+        assert manager.run_full_update(source, target) is True
+        assert manager.changes_summary["modified"] == ["WiAI.html"]
+
+    def test_structured_diff_recorded_during_update(self, tmp_path, monkeypatch):
+        """Diff (dodane i usunięte URL'e) zapisany w runie - bez ponownego parsowania"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        manager.run_full_update(source, target)
+        (source / "WiAI" / "S1" / "zadanie1.html").rename(source / "WiAI" / "S1" / "zadanie9.html")
+        _git_commit_all(source, "rename")
+
+        manager.run_full_update_batch(source, target, use_processes=True)
+
+        import update_manager
+        monkeypatch.setattr(update_manager, "BeautifulSoup", Mock(side_effect=AssertionError("parsowanie")))
+        diff = manager.get_diff(manager.last_run)
+        assert diff["added"] == ["https://prakt.dziadu.dev/WiAI/S1/zadanie9.html"]
+        assert diff["removed"] == ["https://prakt.dziadu.dev/WiAI/S1/zadanie1.html"]
+        assert list(diff["pages"]) == ["WiAI.html"]
+        assert manager._get_html_diff("WiAI.html", manager.last_run)["cards_total"] == 1
+        assert "+1🃏 -1🗑️" in manager.get_diff_report(manager.last_run)
+        assert manager.get_update_summary(manager.last_run)["removed_count"] == 1
+
+    def test_plan_update_does_not_write(self, tmp_path, monkeypatch):
+        """Plan (dry-run) wylicza zmiany bez zapisu stron, backupów i git"""
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        manager.backup_enabled = True
+        monkeypatch.setattr(manager, "pull_repos", Mock(side_effect=AssertionError("git pull")))
+        before = {path.name: path.read_bytes() for path in target.glob("*.html")}
+
+        plan = manager.plan_update(source, target)
+
+        assert [page["page"] for page in plan["pages"]] == ["TSiAI.html", "WiAI.html"]
+        assert plan["pages"][0]["added"] == ["https://prakt.dziadu.dev/TSiAI/S1/zadanie1.html"]
+        assert plan["pages"][0]["sections_added"] == ["S1"]
+        assert plan["totals"]["added"] == 2 and plan["totals"]["removed"] == 0
+        assert {path.name: path.read_bytes() for path in target.glob("*.html")} == before
+        assert not (tmp_path / "backups").exists()
+
+        # Po aktualizacji plan jest pusty
+        monkeypatch.setattr(manager, "pull_repos", lambda paths: [True for path in paths])
+        manager.run_full_update(source, target)
+        assert manager.plan_update(source, target)["totals"]["added"] == 0
+
+    def test_plan_request_from_api(self, tmp_path, monkeypatch):
+        """plan_request działa jako plan_callback API, a log planu nie mówi o usunięciach"""
+        from api_manager import APIManager
+        manager, source, target = self._setup(tmp_path, monkeypatch)
+        (source / "WiAI" / "S2").mkdir()
+        (source / "WiAI" / "S2" / "zadanie2.html").write_text("<html></html>")
+        _git_commit_all(source, "S2")
+        manager.run_full_update(source, target)
+        (source / "WiAI" / "S2" / "zadanie2.html").unlink()
+        _git_commit_all(source, "usunięcie")
+        logs = []
+        manager.log_callback = logs.append
+
+        response = APIManager(plan_callback=manager.plan_request, log_callback=lambda message: None).plan_update(
+            {"source_repo": str(source), "target_repo": str(target)})
+
+        assert response.status == "ok"
+        assert response.data["totals"]["removed"] == 1 and response.data["totals"]["sections_removed"] == 1
+        assert any("Karta do usunięcia" in message for message in logs)
+        assert any("Pusta sekcja do usunięcia" in message for message in logs)
+        assert not any("Usunięta" in message for message in logs)
+
+
+class TestSourceWatcher:
+    """Testy trybu obserwacji (watch)"""
+
+    @pytest.mark.parametrize("backend", ["auto", "poll"])
+    def test_burst_of_changes_is_debounced(self, tmp_path, backend):
+        """Seria zmian w jednym folderze - jedno wywołanie tylko z tym folderem"""
+        import threading
+        from source_watcher import SourceWatcher
+        for folder in ("TSiAI", "WiAI"):
+            (tmp_path / folder / "S1").mkdir(parents=True)
+        calls, done = [], threading.Event()
+        watcher = SourceWatcher(tmp_path, {"TSiAI", "WiAI"}, lambda folders: calls.append(folders) or done.set(),
+                                log_callback=lambda message: None, debounce=0.3, poll_interval=0.05,
+                                backend=backend)
+        watcher.start()
+        try:
+            (tmp_path / "WiAI" / "S2").mkdir()
+            for number in range(5):
+                (tmp_path / "WiAI" / "S2" / f"zadanie{number}.html").write_text("<html></html>")
+            (tmp_path / "WiAI" / ".zadanie0.html.swp").write_text("")
+            assert done.wait(5)
+            (tmp_path / "notes.txt").write_text("poza obserwowanymi folderami")
+            done.clear()
+            assert not done.wait(0.6)
+        finally:
+            watcher.stop()
+        assert calls == [{"WiAI"}]
+
+    def test_folders_update_uses_working_tree(self, tmp_path, monkeypatch):
+        """Zapisane (niezcommitowane) ćwiczenie trafia na stronę, inne strony nie są czytane"""
+        monkeypatch.chdir(tmp_path)
+        source = _git_repo(tmp_path / "source")
+        target = _git_repo(tmp_path / "target")
+        for folder in ("TSiAI", "WiAI"):
+            (source / folder / "S1").mkdir(parents=True)
+            (source / folder / "S1" / "zadanie1.html").write_text("<html></html>")
+            (target / f"{folder}.html").write_text(_page(), encoding='utf-8')
+        _git_commit_all(source)
+        manager = UpdateManager(backup_enabled=False, log_callback=lambda message: None)
+        monkeypatch.setattr(manager, "commit_and_push", lambda repo_path: True)
+        pulled = []
+        monkeypatch.setattr(manager, "pull_repo", lambda path: pulled.append(path) or True)
+
+        (source / "WiAI" / "S1" / "zadanie2.html").write_text("<html></html>")
+        tsiai_before = (target / "TSiAI.html").read_bytes()
+        assert manager.run_folders_update(source, target, {"WiAI", "nieznany"}) is True
+        assert manager.changes_summary["modified"] == ["WiAI.html"]
+        assert "zadanie2.html" in (target / "WiAI.html").read_text(encoding='utf-8')
+        assert (target / "TSiAI.html").read_bytes() == tsiai_before
+        assert pulled == [target]
+        assert manager.scanner == "git"
+
+    def test_cli_watch_updates_changed_folders(self, tmp_path, monkeypatch):
+        """apk.watch: zmiana w źródle uruchamia run_folders_update, stop kończy obserwację"""
+        import threading
+        import time
+        monkeypatch.syspath_prepend(str(Path(__file__).parent.parent))
+        import apk
+        source, target = tmp_path / "source", tmp_path / "target"
+        (source / "WiAI" / "S1").mkdir(parents=True)
+        target.mkdir()
+        calls, done, stop = [], threading.Event(), threading.Event()
+        monkeypatch.setattr(UpdateManager, "run_folders_update",
+                            lambda self, source_path, target_path, folders:
+                            calls.append((source_path, target_path, folders)) or done.set())
+
+        thread = threading.Thread(target=apk.watch, args=(source, target, stop),
+                                  kwargs={"debounce": 0.2, "poll_interval": 0.05, "backend": "poll"})
+        thread.start()
+        try:
+            time.sleep(0.2)
+            (source / "WiAI" / "S1" / "zadanie1.html").write_text("<html></html>")
+            assert done.wait(5)
+        finally:
+            stop.set()
+            thread.join(5)
+        assert not thread.is_alive()
+        assert calls == [(source, target, {"WiAI"})]
+
+    def test_cli_watch_flag(self, tmp_path, monkeypatch):
+        """apk.py --watch uruchamia obserwację bez GUI ze ścieżkami z argumentów"""
+        monkeypatch.syspath_prepend(str(Path(__file__).parent.parent))
+        import apk
+        watch = Mock()
+        monkeypatch.setattr(apk, "watch", watch)
+        apk.main(["--watch", "--source", str(tmp_path / "s"), "--target", str(tmp_path / "t")])
+        watch.assert_called_once_with(str(tmp_path / "s"), str(tmp_path / "t"))
+
+
+class TestUpdateRuns:
+    """Testy izolacji stanu między równoległymi runami"""
+
+    def test_concurrent_runs_do_not_share_state(self, tmp_path, monkeypatch):
+        """Dwa runy jednego manager'a na różnych repozytoriach mają osobny stan"""
+        import threading
+        from update_manager import UpdateRun
+
+        monkeypatch.chdir(tmp_path)
+        manager = UpdateManager(backup_enabled=False, log_callback=lambda message: None)
+        monkeypatch.setattr(manager, "commit_and_push", lambda repo_path: True)
+
+        runs = {}
+        for name in ("a", "b"):
+            source = _git_repo(tmp_path / f"source_{name}")
+            target = _git_repo(tmp_path / f"target_{name}")
+            (source / "WiAI" / "S1").mkdir(parents=True)
+            (source / "WiAI" / "S1" / f"zadanie_{name}.html").write_text("<html></html>")
+            (target / "WiAI.html").write_text(_page(), encoding='utf-8')
+            runs[name] = (source, target, UpdateRun(source_path=source, target_path=target))
+
+        threads = [
+            threading.Thread(target=manager.run_full_update_batch, args=(source, target), kwargs={"run": run})
+            for source, target, run in runs.values()
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for name, (source, target, run) in runs.items():
+            other = "b" if name == "a" else "a"
+            assert run.seen_urls == {f"{UpdateManager.BASE_URL}/WiAI/S1/zadanie_{name}.html"}
+            assert run.changes_summary["modified"] == ["WiAI.html"]
+            assert any(f"target_{name}" in line for line in run.detailed_log)
+            assert not any(f"target_{other}" in line for line in run.detailed_log)
+            assert f"zadanie_{other}" not in (target / "WiAI.html").read_text(encoding='utf-8')
+
+
 class TestConstants:
     """Testy stałych aplikacji"""
 